@@ -0,0 +1,100 @@
+"""
+Benchmark the time taken to import `idelib`. Each measurement is made in a
+new interpreter, so nothing is already cached in `sys.modules`.
+
+Usage::
+
+    python benchmarks/bench_import.py [--repeat N] [--modules]
+"""
+
+import argparse
+import json
+import os.path
+import statistics
+import subprocess
+import sys
+
+# Statements to time, each run in a fresh interpreter.
+STATEMENTS = {
+    'python': 'pass',
+    'idelib': 'import idelib',
+    'idelib.importer': 'import idelib.importer',
+    'openFile': ('import idelib.importer; '
+                 'idelib.importer.openFile(%r).close()'),
+}
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_FILE = os.path.join(ROOT, 'test.ide')
+
+
+# ==============================================================================
+#
+# ==============================================================================
+
+def _run(statement, importTime=False):
+    """ Run a statement in a new interpreter.
+
+        :return: The elapsed time (seconds) and the interpreter's stderr.
+    """
+    args = [sys.executable]
+    if importTime:
+        args.extend(['-X', 'importtime'])
+    code = ('import time; t0 = time.perf_counter(); %s; '
+            'print(time.perf_counter() - t0)' % statement)
+    result = subprocess.run(args + ['-c', code], cwd=ROOT, check=True,
+                            capture_output=True, text=True)
+    return float(result.stdout.split()[-1]), result.stderr
+
+
+def benchImport(repeat=10):
+    """ Time each of the `STATEMENTS`.
+
+        :keyword repeat: The number of times to run each statement.
+        :return: A dictionary of results (median, minimum and maximum
+            times in milliseconds) keyed by statement name.
+    """
+    results = {}
+    for name, statement in STATEMENTS.items():
+        if '%r' in statement:
+            statement = statement % TEST_FILE
+        times = [_run(statement)[0] * 1000 for _ in range(repeat)]
+        results[name] = {'median_ms': statistics.median(times),
+                         'min_ms': min(times),
+                         'max_ms': max(times)}
+    return results
+
+
+def slowestModules(limit=15):
+    """ Get the modules that take the longest to import (including their
+        own imports), using ``python -X importtime``.
+
+        :keyword limit: The maximum number of modules to list.
+        :return: A list of (module name, cumulative microseconds) tuples.
+    """
+    _elapsed, stderr = _run('import idelib.importer', importTime=True)
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _self, cumulative, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(cumulative)))
+    modules.sort(key=lambda x: -x[1])
+    return modules[:limit]
+
+
+# ==============================================================================
+#
+# ==============================================================================
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    argparser.add_argument('--repeat', '-r', type=int, default=10,
+                           help="The number of times to run each measurement.")
+    argparser.add_argument('--modules', '-m', action='store_true',
+                           help="Also list the slowest modules to import.")
+    args = argparser.parse_args()
+
+    output = {'import': benchImport(args.repeat)}
+    if args.modules:
+        output['slowest_modules'] = slowestModules()
+    print(json.dumps(output, indent=2))
@@ -0,0 +1,350 @@
+"""
+Benchmark suite: time common operations on synthetic recordings of several
+sizes, and report the throughput and peak memory use of each. Results are
+written as JSON, and can be compared against a previous run (a baseline).
+
+Each benchmark runs in a new interpreter, so that its peak resident set
+size (RSS) isn't affected by the others. Recordings are generated by
+`benchmarks.synthetic` and kept in the data directory for reuse.
+
+Usage::
+
+    python benchmarks/run.py [--sizes small medium] [--output results.json]
+        [--baseline baseline.json] [--threshold 0.2]
+
+The exit status is 1 if any benchmark is slower than the baseline by more
+than the threshold.
+"""
+
+import argparse
+from datetime import datetime
+import hashlib
+import json
+import os.path
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# ==============================================================================
+#
+# ==============================================================================
+
+#: Recording sizes, as keyword arguments for `synthetic.makeRecording()`.
+#: The default channels produce about 33 KB of data per second.
+SIZES = {
+    'small': {'duration': 10.0},
+    'medium': {'duration': 120.0, 'gaps': [(60.0, 1.0)]},
+    'large': {'duration': 1200.0, 'gaps': [(300.0, 2.0), (900.0, 5.0)]},
+}
+
+#: The channel used by benchmarks of a single channel.
+CHANNEL_ID = 8
+
+
+# ==============================================================================
+# The benchmarks. Each takes the recording filename and an opened `Dataset`
+# (or `None` if the benchmark opens the file itself), and returns the number
+# of samples processed.
+# ==============================================================================
+
+def _session(doc):
+    return doc.channels[CHANNEL_ID].getSession()
+
+
+def benchImportFile(filename, _doc):
+    from idelib.importer import importFile
+    doc = importFile(filename)
+    count = sum(len(ch.getSession()) for ch in doc.channels.values())
+    doc.close()
+    return count
+
+
+def benchArraySlice(_filename, doc):
+    return _session(doc).arraySlice().shape[1]
+
+
+def benchArrayRange(_filename, doc):
+    session = _session(doc)
+    start, end = session[0][0], session[-1][0]
+    length = end - start
+    return session.arrayRange(start + length / 4, end - length / 4).shape[1]
+
+
+def benchArrayMinMeanMax(_filename, doc):
+    session = _session(doc)
+    session.arrayMinMeanMax()
+    return len(session)
+
+
+def benchGetMean(_filename, doc):
+    session = _session(doc)
+    session.getMean()
+    return len(session)
+
+
+def benchGetMax(_filename, doc):
+    session = _session(doc)
+    session.getMax()
+    return len(session)
+
+
+def benchExportCsv(_filename, doc):
+    session = _session(doc)
+    with open(os.devnull, 'w') as f:
+        return session.exportCsv(f)[0]
+
+
+def benchExportMat(_filename, doc):
+    from idelib.matfile import exportMat
+    session = _session(doc)
+    with tempfile.TemporaryDirectory() as tempDir:
+        exportMat(session, os.path.join(tempDir, 'export.mat'))
+    return len(session)
+
+
+def benchExtractTime(filename, _doc):
+    from idelib.importer import openFile
+    from idelib.util import extractTime, getLength
+    start, end = getLength(filename)
+    with open(filename, 'rb') as f:
+        doc = openFile(f)
+        with open(os.devnull, 'wb') as out:
+            extractTime(doc, out, start + (end - start) / 4,
+                        end - (end - start) / 4)
+    return 0
+
+
+def benchGetLength(filename, _doc):
+    from idelib.util import getLength
+    getLength(filename)
+    return 0
+
+
+#: All benchmarks, and whether each needs the file to be imported first.
+BENCHMARKS = {
+    'importFile': (benchImportFile, False),
+    'arraySlice': (benchArraySlice, True),
+    'arrayRange': (benchArrayRange, True),
+    'arrayMinMeanMax': (benchArrayMinMeanMax, True),
+    'getMean': (benchGetMean, True),
+    'getMax': (benchGetMax, True),
+    'exportCsv': (benchExportCsv, True),
+    'exportMat': (benchExportMat, True),
+    'extractTime': (benchExtractTime, False),
+    'getLength': (benchGetLength, False),
+}
+
+
+# ==============================================================================
+#
+# ==============================================================================
+
+def _getPeakRss():
+    """ Get the peak resident set size of this process, in bytes, or `None`
+        if it can't be determined.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def runOne(name, filename, repeat=3):
+    """ Run one benchmark in the current process. The file is imported (if
+        required) before timing.
+
+        :param name: The name of the benchmark (a key in `BENCHMARKS`).
+        :param filename: The name of the recording file.
+        :keyword repeat: The number of times to run the benchmark.
+        :return: A dictionary of results.
+    """
+    # Import everything used by the benchmarks, so it isn't timed
+    import idelib.importer
+    import idelib.matfile
+    import idelib.util
+
+    func, needsDoc = BENCHMARKS[name]
+    doc = None
+    if needsDoc:
+        from idelib.importer import importFile
+        doc = importFile(filename)
+        # Make sure the parsed data is in memory, as it would be in use
+        _session(doc).arraySlice(0, 1)
+    baseRss = _getPeakRss()
+
+    times = []
+    samples = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        samples = func(filename, doc)
+        times.append(time.perf_counter() - t0)
+
+    fileSize = os.path.getsize(filename)
+    best = min(times)
+    result = {'seconds': statistics.median(times),
+              'best_seconds': best,
+              'samples': samples,
+              'samples_per_second': samples / best if samples else None,
+              'file_bytes': fileSize,
+              'file_mb_per_second': fileSize / best / 2**20,
+              'peak_rss_bytes': _getPeakRss(),
+              'setup_rss_bytes': baseRss}
+    if doc is not None:
+        doc.close()
+    return result
+
+
+def _runInSubprocess(name, filename, repeat):
+    """ Run one benchmark in a new interpreter. """
+    args = [sys.executable, os.path.abspath(__file__), '--child', name,
+            filename, '--repeat', str(repeat)]
+    output = subprocess.run(args, check=True, capture_output=True, text=True,
+                            cwd=ROOT).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def getRecording(size, dataDir):
+    """ Get the filename of a synthetic recording of the given size,
+        generating it if it doesn't already exist.
+    """
+    from benchmarks.synthetic import makeRecording
+
+    kwargs = SIZES[size]
+    # Include the arguments in the name, so changing them makes a new file
+    key = hashlib.md5(repr(sorted(kwargs.items())).encode()).hexdigest()[:8]
+    filename = os.path.join(dataDir, 'synthetic_%s_%s.IDE' % (size, key))
+    if not os.path.exists(filename):
+        os.makedirs(dataDir, exist_ok=True)
+        makeRecording(filename + '.tmp', **kwargs)
+        os.replace(filename + '.tmp', filename)
+    return filename
+
+
+def runSuite(sizes=None, benchmarks=None, repeat=3, dataDir=None,
+             verbose=False):
+    """ Run the benchmark suite.
+
+        :keyword sizes: The names of the recording sizes to use (keys in
+            `SIZES`). Defaults to all.
+        :keyword benchmarks: The names of the benchmarks to run (keys in
+            `BENCHMARKS`). Defaults to all.
+        :keyword repeat: The number of times to run each benchmark.
+        :keyword dataDir: The directory containing the synthetic
+            recordings. Defaults to a directory in the system temp
+            directory.
+        :keyword verbose: If `True`, write progress to stderr.
+        :return: A dictionary of results, including information about the
+            environment.
+    """
+    import numpy
+    import idelib
+
+    sizes = sizes or list(SIZES)
+    benchmarks = benchmarks or list(BENCHMARKS)
+    dataDir = dataDir or os.path.join(tempfile.gettempdir(), 'idelib-benchmarks')
+
+    results = {}
+    for size in sizes:
+        filename = getRecording(size, dataDir)
+        results[size] = {}
+        for name in benchmarks:
+            if verbose:
+                print("%s/%s..." % (size, name), end=' ', file=sys.stderr,
+                      flush=True)
+            results[size][name] = result = _runInSubprocess(name, filename, repeat)
+            if verbose:
+                print("%.3f s" % result['seconds'], file=sys.stderr)
+
+    return {'date': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': numpy.__version__,
+            'idelib': idelib.__version__,
+            'results': results}
+
+
+def compare(results, baseline, threshold=0.2):
+    """ Compare results to a baseline.
+
+        :param results: The results of `runSuite()`.
+        :param baseline: Previous results of `runSuite()`.
+        :keyword threshold: The fraction by which a benchmark's time may
+            exceed the baseline before being considered a regression.
+        :return: A list of (size, benchmark, baseline seconds, seconds,
+            ratio, regressed) tuples, for the benchmarks in both.
+    """
+    comparison = []
+    for size, benchmarks in results['results'].items():
+        for name, result in benchmarks.items():
+            old = baseline.get('results', {}).get(size, {}).get(name)
+            if not old or not old['seconds']:
+                continue
+            ratio = result['seconds'] / old['seconds']
+            comparison.append((size, name, old['seconds'], result['seconds'],
+                               ratio, ratio > 1 + threshold))
+    return comparison
+
+
+# ==============================================================================
+#
+# ==============================================================================
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    argparser.add_argument('--sizes', '-s', nargs='+', choices=list(SIZES),
+                           help="The recording sizes to use (default: all).")
+    argparser.add_argument('--benchmarks', '-b', nargs='+',
+                           choices=list(BENCHMARKS),
+                           help="The benchmarks to run (default: all).")
+    argparser.add_argument('--repeat', '-r', type=int, default=3,
+                           help="The number of times to run each benchmark.")
+    argparser.add_argument('--data', '-d',
+                           help="The directory for the synthetic recordings.")
+    argparser.add_argument('--output', '-o',
+                           help="The JSON file to which to write the results.")
+    argparser.add_argument('--baseline',
+                           help="A JSON file of previous results to compare.")
+    argparser.add_argument('--threshold', '-t', type=float, default=0.2,
+                           help="The fraction by which a benchmark may be "
+                                "slower than the baseline.")
+    argparser.add_argument('--child', nargs=2, metavar=('NAME', 'FILENAME'),
+                           help=argparse.SUPPRESS)
+    args = argparser.parse_args()
+
+    if args.child:
+        print(json.dumps(runOne(*args.child, repeat=args.repeat)))
+        sys.exit(0)
+
+    output = runSuite(args.sizes, args.benchmarks, args.repeat, args.data,
+                      verbose=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2)
+    else:
+        print(json.dumps(output, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = 0
+        for size, name, old, new, ratio, regressed in compare(output, baseline,
+                                                              args.threshold):
+            regressions += regressed
+            print("%-8s %-16s %9.4f s -> %9.4f s  x%.2f%s" %
+                  (size, name, old, new, ratio, '  REGRESSION' if regressed else ''),
+                  file=sys.stderr)
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,198 @@
+"""
+Deterministic generator of synthetic IDE recordings, for benchmarking.
+Recordings can have any number of channels, each with its own sample rate
+and block size, and gaps (periods with no data on any channel). The same
+arguments always produce the same file.
+
+Usage::
+
+    python benchmarks/synthetic.py OUTPUT.IDE [--duration SECONDS] [--seed N]
+"""
+
+import argparse
+
+from ebmlite import loadSchema
+import numpy as np
+
+__all__ = ['DEFAULT_CHANNELS', 'TIME_SCALE', 'TIME_MODULUS', 'makeRecording',
+           'writeRecording']
+
+# ==============================================================================
+#
+# ==============================================================================
+
+#: The channels written by default: a high rate triaxial accelerometer, a
+#: low rate triaxial accelerometer, and a slow pressure/temperature sensor.
+#: Keyed by channel ID.
+DEFAULT_CHANNELS = {
+    8: {'name': 'Main Acceleration', 'format': '<hhh', 'sampleRate': 5000.0,
+        'blockSize': 672, 'subchannels': ('X', 'Y', 'Z'), 'units': 'g'},
+    32: {'name': 'DC Acceleration', 'format': '<hhh', 'sampleRate': 400.0,
+         'blockSize': 100, 'subchannels': ('X (DC)', 'Y (DC)', 'Z (DC)'),
+         'units': 'g'},
+    59: {'name': 'Pressure/Temperature', 'format': '<ff', 'sampleRate': 10.0,
+         'blockSize': 5, 'subchannels': ('Pressure', 'Temperature'),
+         'units': ('Pa', '\xb0C')},
+}
+
+#: The number of time code ticks per second (the same as real recorders).
+TIME_SCALE = 32768
+
+#: The modulus of the block time codes.
+TIME_MODULUS = 2**24
+
+# The NumPy equivalents of the `struct` types allowed in channel formats.
+_TYPES = {'b': 'i1', 'B': 'u1', 'h': 'i2', 'H': 'u2', 'i': 'i4', 'I': 'u4',
+          'l': 'i4', 'L': 'u4', 'q': 'i8', 'Q': 'u8', 'f': 'f4', 'd': 'f8'}
+
+
+# ==============================================================================
+#
+# ==============================================================================
+
+def _getDtype(fmt):
+    """ Get the NumPy dtype of a channel format string, which must have a
+        byte order and a single repeated type (e.g. ``'<hhh'``).
+
+        :return: The dtype of one value and the number of subchannels.
+    """
+    if fmt[0] not in '<>!' or len(set(fmt[1:])) != 1 or fmt[1] not in _TYPES:
+        raise ValueError("Unsupported channel format: %r" % fmt)
+    return np.dtype(('>' if fmt[0] == '!' else fmt[0]) + _TYPES[fmt[1]]), len(fmt) - 1
+
+
+def _makeValues(rng, dtype, times, numSubchannels):
+    """ Generate sample values: a sine wave of a different frequency in
+        each subchannel, plus noise.
+    """
+    freqs = 10.0 * np.arange(1, numSubchannels + 1)
+    values = np.sin(2 * np.pi * freqs[:, np.newaxis] * times)
+    values += rng.normal(0, 0.1, values.shape)
+    if dtype.kind == 'f':
+        values *= 100
+    else:
+        values *= np.iinfo(dtype).max / 2.0
+        if dtype.kind == 'u':
+            values += np.iinfo(dtype).max / 2.0
+    return values.T.astype(dtype)
+
+
+def _getBlocks(channels, duration, gaps):
+    """ Get the blocks in a recording, in the order they are written.
+
+        :return: A list of (start tick, channel ID, first sample index,
+            number of samples) tuples.
+    """
+    blocks = []
+    for chId, info in channels.items():
+        rate = float(info['sampleRate'])
+        blockSize = int(info.get('blockSize', 256))
+        numSamples = int(duration * rate)
+        for first in range(0, numSamples, blockSize):
+            start = first / rate
+            if any(a <= start < a + length for a, length in gaps):
+                continue
+            blocks.append((int(round(start * TIME_SCALE)), chId, first,
+                           min(blockSize, numSamples - first)))
+    blocks.sort()
+    return blocks
+
+
+def writeRecording(stream, channels=None, duration=10.0, gaps=(), seed=0,
+                   utcStartTime=1500000000):
+    """ Write a synthetic IDE recording.
+
+        :param stream: A writable binary file-like object.
+        :keyword channels: A dictionary of channel descriptions, keyed by
+            channel ID. Each is a dictionary with the keys ``'format'``
+            (a `struct` format with one type repeated for each subchannel,
+            e.g. ``'<hhh'``), ``'sampleRate'`` (Hz), and optionally
+            ``'blockSize'`` (samples per block), ``'name'``,
+            ``'subchannels'`` (subchannel names), and ``'units'``.
+            Defaults to `DEFAULT_CHANNELS`.
+        :keyword duration: The length of the recording, in seconds.
+        :keyword gaps: A list of gaps in the recording, each a tuple of the
+            start time and length (seconds). Blocks starting within a gap
+            are omitted.
+        :keyword seed: The seed for the random noise in the data.
+        :keyword utcStartTime: The recording's start time (epoch seconds).
+        :return: The number of samples written, keyed by channel ID.
+    """
+    channels = DEFAULT_CHANNELS if channels is None else channels
+    schema = loadSchema('mide_ide.xml')
+    rng = np.random.default_rng(seed)
+
+    dtypes = {}
+    sensorList = []
+    channelList = []
+    for chId, info in channels.items():
+        dtype, numSubchannels = _getDtype(info['format'])
+        dtypes[chId] = dtype, numSubchannels
+        names = info.get('subchannels') or [str(i) for i in range(numSubchannels)]
+        units = info.get('units', '')
+        if isinstance(units, str):
+            units = [units] * numSubchannels
+        sensorList.append({'SensorID': chId,
+                           'SensorName': info.get('name', 'Sensor %d' % chId)})
+        channelList.append({
+            'ChannelID': chId,
+            'ChannelName': info.get('name', 'Channel %d' % chId),
+            'ChannelFormat': info['format'],
+            'TimeCodeScale': '1.0/%d' % TIME_SCALE,
+            'TimeCodeModulus': TIME_MODULUS,
+            'SubChannel': [{'SubChannelID': i,
+                            'SubChannelName': names[i],
+                            'SubChannelUnits': units[i],
+                            'SubChannelSensorRef': chId}
+                           for i in range(numSubchannels)]})
+
+    schema.encode(stream, [], headers=True)
+    stream.write(schema['RecordingProperties'].encode(
+        {'SensorList': {'Sensor': sensorList},
+         'ChannelList': {'Channel': channelList}}))
+    stream.write(schema['TimeBaseUTC'].encode(utcStartTime))
+
+    counts = dict.fromkeys(channels, 0)
+    blockEl = schema['ChannelDataBlock']
+    for startTick, chId, first, numSamples in _getBlocks(channels, duration, gaps):
+        dtype, numSubchannels = dtypes[chId]
+        rate = float(channels[chId]['sampleRate'])
+        times = (first + np.arange(numSamples)) / rate
+        values = _makeValues(rng, dtype, times, numSubchannels)
+        endTick = int(round(times[-1] * TIME_SCALE))
+        stream.write(blockEl.encode({
+            'ChannelIDRef': chId,
+            'StartTimeCodeAbs': startTick % TIME_MODULUS,
+            'EndTimeCodeAbs': endTick % TIME_MODULUS,
+            'ChannelDataPayload': values.tobytes()}))
+        counts[chId] += numSamples
+
+    return counts
+
+
+def makeRecording(filename, **kwargs):
+    """ Write a synthetic IDE recording to a file. Takes the same keyword
+        arguments as `writeRecording()`.
+
+        :param filename: The name of the file to write.
+        :return: The number of samples written, keyed by channel ID.
+    """
+    with open(filename, 'wb') as f:
+        return writeRecording(f, **kwargs)
+
+
+# ==============================================================================
+#
+# ==============================================================================
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    argparser.add_argument('output', help="The name of the IDE file to write.")
+    argparser.add_argument('--duration', '-d', type=float, default=10.0,
+                           help="The length of the recording, in seconds.")
+    argparser.add_argument('--seed', '-s', type=int, default=0,
+                           help="The seed for the random noise in the data.")
+    args = argparser.parse_args()
+
+    written = makeRecording(args.output, duration=args.duration, seed=args.seed)
+    print("Wrote %s samples to %s" % (sum(written.values()), args.output))
@@ -16,30 +16,9 @@ python freq_band_rms.py [--file filename] [--freq lowFreq  highFreq]
 
 import argparse
 
-import numpy as np
-
 import idelib
 
 
-def rms(array, axis=-1):
-    """
-    Calcualtes the RMS of a signal.
-    """
-    return np.sqrt(np.mean(np.abs(array) ** 2, axis=axis))
-
-
-def freq_band_rms(array, dt, min_freq=0, max_freq=np.inf):
-    """
-    Calcualtes the RMS of a signal within a specific frequency band.
-    """
-    n = array.shape[-1]
-    fft = np.fft.fft(array, norm="ortho")
-    abs_freqs = np.abs(np.fft.fftfreq(n, d=dt))
-
-    band_mask = (min_freq <= abs_freqs) & (abs_freqs <= max_freq)
-    return np.sqrt(np.sum(np.abs(fft[..., band_mask]) ** 2, axis=-1) / n)
-
-
 if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description="Calculate the RMS on a file "
@@ -63,9 +42,6 @@ if __name__ == "__main__":
 
     min_freq, max_freq = args.freq  # Hz
 
-    # The maximum number of samples to process from a single stream
-    sample_limit = 10**6
-
     # Accelerometer Channel IDs
     ACCEL_CH_IDS = (8, 32, 80)
 
@@ -77,19 +53,10 @@ if __name__ == "__main__":
         accel_channel = doc.channels[ch_id]
         eventlist = accel_channel.getSession()
 
-        if len(eventlist) > sample_limit:
-            print("sample count too high: truncating results to first {} samples"
-                  .format(sample_limit))
-        array = eventlist[:sample_limit]  # truncates to first `n` samples
-        times = array[0]
-        values = array[1:]
-
-        dt_est = np.mean(np.diff(times)) * 1e-6
-
-        time_rms = rms(values, axis=-1)
-        freq_rms = freq_band_rms(
-            values, dt_est, min_freq=min_freq, max_freq=max_freq,
-        )
+        # The full recording is used. The band RMS is computed in batches,
+        # using Welch's method.
+        time_rms = eventlist.getRMS()
+        freq_rms = eventlist.getBandRMS([(min_freq, max_freq)])[:, 0]
 
         print('RMS of', accel_channel.name)
         print('\tx-axis: ', time_rms[0])
@@ -14,7 +14,7 @@ __version__ = '3.2.10'
 
 __status__ = "Production/Stable"
 
-from .importer import importFile
+import importlib
 
 # Add EBML schema path to ebmlite search paths
 import ebmlite
@@ -22,3 +22,27 @@ import ebmlite
 SCHEMA_PATH = "{idelib}/schemata"
 if SCHEMA_PATH not in ebmlite.SCHEMA_PATH:
     ebmlite.SCHEMA_PATH.insert(0, SCHEMA_PATH)
+
+# Submodules and functions imported on first use (PEP 562), keeping
+# `import idelib` fast. The importer pulls in NumPy, and some modules have
+# optional (and slow to import) dependencies.
+_LAZY_MODULES = ('attributes', 'dataset', 'derived', 'importer',
+                 'instrumentation', 'matfile', 'multi_importer', 'parsers',
+                 'rolling', 'sharedmem', 'spectral', 'transforms',
+                 'unit_conversion', 'userdata', 'util')
+_LAZY_ATTRIBUTES = {'importFile': 'importer'}
+
+
+def __getattr__(name):
+    if name in _LAZY_MODULES:
+        return importlib.import_module('.' + name, __name__)
+    elif name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module('.' + _LAZY_ATTRIBUTES[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_MODULES) | set(_LAZY_ATTRIBUTES))
@@ -38,32 +38,33 @@ Created on Sep 26, 2013
 #    `yield`  instead (e.g. parseElement(), etc.)
 # 
 # TODO: Consider thread safety. Use a `threading.RLock` around adding/ending
-#    a Session, updating/using Transforms, appending/accessing EventArray data,
-#    etc. Not (yet?) a serious problem, but it could be in the future; current
-#    handling of race conditions is a hack. Also make some flags (like
-#    `Dataset.loading`) properties that get/set a `threading.Event`?
+#    a Session, updating/using Transforms, etc. Not (yet?) a serious problem,
+#    but it could be in the future.
 
 __all__ = ['Channel', 'Dataset', 'EventArray', 'Plot', 'Sensor', 'Session',
            'SubChannel', 'WarningRange', 'Cascading', 'Transformable']
 
 from collections.abc import Iterable, Sequence
 from datetime import datetime
+from functools import lru_cache
 from math import ceil
-from threading import Lock
+from threading import Condition, Event, Lock, current_thread
 from typing import Any, Dict, Optional
 import warnings
 
 import os.path
 import struct
 import sys
-from time import sleep
 
 from ebmlite.core import loadSchema
 import numpy as np
 import numpy.lib.recfunctions as np_recfunctions
 
-from .transforms import Transform, CombinedPoly, PolyPoly
+from .transforms import Transform, Bivariate, CombinedPoly, ComplexTransform, PolyPoly
 from .parsers import getParserTypes, getParserRanges, ChannelDataBlock
+from .parsers import bindBlocks, packBlocks, unpackBlocks
+from . import rolling
+from . import spectral
 
 
 SCHEMA_FILE = 'mide_ide.xml'
@@ -74,7 +75,6 @@ SCHEMA_FILE = 'mide_ide.xml'
 
 import logging
 logger = logging.getLogger('idelib')
-logging.basicConfig(format="%(asctime)s %(levelname)s: %(message)s")
 
 __DEBUG__ = str(os.environ.get('MIDE_DEV', 0)) == '1'
     
@@ -84,6 +84,14 @@ else:
     logger.setLevel(logging.ERROR)
     
 
+@lru_cache(maxsize=None)
+def getSchema():
+    """ Get the IDE file EBML schema. It is loaded once, and shared by every
+        `Dataset` in the process.
+    """
+    return loadSchema(SCHEMA_FILE)
+
+
 def mapRange(x, in_min, in_max, out_min, out_max):
     """ Given a value `x` between `in_min` and `in_max`, get the equivalent
         value relative to `out_min` and `out_max`.
@@ -91,6 +99,35 @@ def mapRange(x, in_min, in_max, out_min, out_max):
     return ((x - in_min + 0.0) * (out_max - out_min) /
             (in_max - in_min) + out_min)
 
+def _arrayBytes(arrays, seen):
+    """ Get the number of bytes used by one or more arrays (in nested lists
+        or tuples), for memory accounting. Views are counted as their base
+        array, and arrays (by ID) in the set `seen` aren't counted; counted
+        arrays are added to it.
+    """
+    if isinstance(arrays, (list, tuple)):
+        return sum(_arrayBytes(a, seen) for a in arrays)
+    if not isinstance(arrays, np.ndarray):
+        return 0
+    base = arrays
+    while isinstance(base.base, np.ndarray):
+        base = base.base
+    if id(base) in seen:
+        return 0
+    seen.add(id(base))
+    return base.nbytes
+
+
+def _listBytes(items, seen):
+    """ Get the number of bytes used by a list of numbers, for memory
+        accounting. Lists (by ID) in the set `seen` aren't counted.
+    """
+    if id(items) in seen:
+        return 0
+    seen.add(id(items))
+    return sys.getsizeof(items) + sum(sys.getsizeof(x) for x in items)
+
+
 #===============================================================================
 # Mix-In Classes
 #===============================================================================
@@ -213,6 +250,9 @@ class Dataset(Cascading):
         :ivar fileDamaged: Boolean; `True` if the file ended prematurely.
         :ivar loadCancelled: Boolean; `True` if the file loading was aborted 
             part way through.
+        :ivar columnarCache: Boolean; if `True`, each channel's data cache
+            also stores each subchannel's data as a separate contiguous
+            array, which speeds access at the cost of memory.
         :ivar sessions: A list of individual Session objects in the data set.
             A valid file will have at least one, even if there are no 
             `Session` elements in the data.
@@ -222,6 +262,8 @@ class Dataset(Cascading):
             a Channel (or even another plot).
         :ivar transforms: A dictionary of functions (or function-like objects)
             for adjusting/calibrating sensor data.
+        :ivar stats: An `instrumentation.Stats` object, if instrumentation
+            has been enabled (see `enableStats()`), else `None`.
     """
 
     def __init__(self, stream, name=None, quiet=True, attributes=None):
@@ -256,15 +298,21 @@ class Dataset(Cascading):
         
         self.fileDamaged = False
         self.loadCancelled = False
-        self.loading = True
+        self._loaded = Event()  # Set when importing is complete
+        self._importThread = None  # The thread running `readData()`, if any
         self.filename = getattr(stream, "name", None)
 
+        # If `True`, channels' data caches also keep each subchannel's data
+        # as a contiguous array (built after loading; uses more memory).
+        self.columnarCache = False
+
         # For keeping user-defined data
         self._userdata: Optional[Dict[str, Any]] = None
         self._userdataOffset: Optional[int] = None
         self._filesize: Optional[int] = None
 
         self._channelDataLock = Lock()
+        self.stats = None
         
         # Subsets: used when importing multiple files into the same dataset.
         self.subsets = []
@@ -278,7 +326,7 @@ class Dataset(Cascading):
             self.name = name
 
         if stream is not None:
-            schema = loadSchema(SCHEMA_FILE)
+            schema = getSchema()
             self.schemaVersion = schema.version
             self.ebmldoc = schema.load(stream, 'MideDocument', headers=True)
             if self.ebmldoc.version is None:
@@ -292,6 +340,161 @@ class Dataset(Cascading):
                                                      self.schemaVersion))
 
 
+    def __getstate__(self):
+        # The file isn't pickled, just its name. It is opened again when
+        # unpickled; sample data is read from it (by offset) as it is
+        # accessed. A stream without a name (e.g. a `BytesIO`) is pickled
+        # itself, so the pickle will contain a copy of the entire file.
+        state = self.__dict__.copy()
+        ebmldoc = state.pop('ebmldoc', None)
+        state.update(_channelDataLock=None, _parsers=None, stats=None,
+                     _loaded=self._loaded.is_set(), _importThread=None)
+        state.pop('_unpickled', None)
+        if ebmldoc is not None:
+            state['_source'] = self.filename or ebmldoc.stream
+            state['_sourceSize'] = ebmldoc.size
+        return state
+
+
+    def __setstate__(self, state):
+        source = state.pop('_source', None)
+        size = state.pop('_sourceSize', None)
+        self.__dict__.update(state)
+
+        if source is not None:
+            stream = open(source, 'rb') if isinstance(source, str) else source
+            stream.seek(0)
+            self.ebmldoc = getSchema().load(stream, 'MideDocument', headers=True)
+            if self.ebmldoc.size != size:
+                raise IOError("File has changed since the Dataset was pickled: "
+                              "%r" % self.filename)
+        self._channelDataLock = Lock()
+        self._loaded = Event()
+        if state.get('_loaded', True):
+            self._loaded.set()
+
+        # Finish restoring sessions unpickled before the dataset
+        for session in self.__dict__.pop('_unpickled', []):
+            session._restore()
+
+
+    def _getStreams(self):
+        """ Get the file streams that contain the dataset's data: its own,
+            followed by its subsets' (see `multi_importer`). Used
+            internally.
+        """
+        streams = []
+        for d in [self] + self.subsets:
+            ebmldoc = getattr(d, 'ebmldoc', None)
+            streams.append(None if ebmldoc is None else ebmldoc.stream)
+        return streams
+
+
+    def _isRestored(self):
+        """ Has the dataset (and its subsets) been completely unpickled?
+            Used internally.
+        """
+        datasets = [self] + self.__dict__.get('subsets', [])
+        return all(d.__dict__.get('_channelDataLock') is not None
+                   for d in datasets)
+
+
+    def enableStats(self, hook=None):
+        """ Turn on instrumentation of importing and reading data. For
+            complete import statistics, call this before `readData()`.
+
+            :keyword hook: A function to call with the name of an event
+                (e.g. the end of an import phase) and the `Stats` object.
+            :return: The dataset's `instrumentation.Stats` object, also
+                available as `Dataset.stats`.
+        """
+        from .instrumentation import Stats, TimedLock
+
+        if self.stats is None:
+            self.stats = Stats(hook)
+            self._setDataLock(TimedLock(self._channelDataLock, self.stats))
+        else:
+            self.stats.hook = hook
+        return self.stats
+
+
+    def disableStats(self):
+        """ Turn off instrumentation of importing and reading data.
+
+            :return: The dataset's final `instrumentation.Stats`, or `None`
+                if instrumentation wasn't enabled.
+        """
+        stats = self.stats
+        if stats is not None:
+            self.stats = None
+            self._setDataLock(self._channelDataLock.lock)
+        return stats
+
+
+    def _iterSessions(self):
+        """ Iterate over the `EventArray` of every channel and subchannel,
+            in every session. Used internally.
+        """
+        for channel in self._channels.values():
+            for ch in [channel] + list(channel.subchannels):
+                if ch is None:
+                    continue
+                yield from ch.sessions.values()
+
+
+    def _setDataLock(self, lock):
+        """ Replace the lock used when accessing data in this dataset's
+            sessions. Used internally when toggling instrumentation; the new
+            lock must wrap (or be) the same underlying lock.
+        """
+        self._channelDataLock = lock
+        for session in self._iterSessions():
+            session._channelDataLock = lock
+
+
+    @property
+    def loading(self):
+        """ `True` if a file is still loading (or has not yet been loaded).
+            Set to `False` by the importer when it finishes, which also
+            wakes any threads waiting for data (see `waitForLoad()` and
+            `EventArray.waitForData()`).
+        """
+        return not self._loaded.is_set()
+
+
+    @loading.setter
+    def loading(self, value):
+        if value:
+            self._loaded.clear()
+        else:
+            self._loaded.set()
+            for session in self._iterSessions():
+                session._notifyDataReady()
+
+
+    def waitForLoad(self, timeout=None):
+        """ Wait for the import of the dataset's data (e.g. by `readData()`
+            running in another thread) to finish.
+
+            :keyword timeout: The maximum time to wait (in seconds), or
+                `None` to wait indefinitely.
+            :return: `True` if loading has finished, `False` if the wait
+                timed out.
+        """
+        return self._loaded.wait(timeout)
+
+
+    def _isImportingElsewhere(self):
+        """ Is data being imported (by `readData()`) in another thread? If
+            not, waiting for more data is pointless, even if the dataset is
+            still `loading` (e.g. it was opened but hasn't been read). Used
+            internally.
+        """
+        thread = self._importThread
+        return (thread is not None and thread is not current_thread()
+                and thread.is_alive())
+
+
     @property
     def exitCondition(self):
         """ The numeric code number for the condition that stopped the recording. """
@@ -450,7 +653,44 @@ class Dataset(Cascading):
                          **kwargs)
         self.warningRanges[warningId] = w
         return w
-        
+
+
+    def addDerivedChannel(self, sources, function, channelId=None, name=None,
+                          names=None, units=None):
+        """ Add a channel whose data is computed from other channels' data
+            by a vectorized function (e.g. the resultant magnitude of an
+            accelerometer's axes). The data is computed lazily, as it is
+            accessed. See `idelib.derived`.
+
+            :param sources: A list of `Channel` and/or `SubChannel` objects,
+                the data of which are the function's arguments. The derived
+                channel has the same events as the first; the others are
+                interpolated if their events differ.
+            :param function: A vectorized function, taking one array of
+                calibrated values per source (1D for a `SubChannel`, 2D for
+                a `Channel`) and returning an array of values (1D), or one
+                row of values per subchannel (2D).
+            :keyword channelId: The new channel's ID. Defaults to one more
+                than the highest existing channel ID.
+            :keyword name: A custom name for the channel.
+            :keyword names: Names for each of the channel's subchannels.
+            :keyword units: A tuple containing the 'axis name' and unit
+                symbol (e.g. ``('Acceleration', 'g')``), or a list of them
+                (one per subchannel).
+            :return: The new `DerivedChannel`.
+        """
+        from .derived import DerivedChannel
+
+        if channelId is None:
+            channelId = max(self._channels, default=-1) + 1
+        elif channelId in self._channels:
+            raise ValueError("Dataset already has a channel with ID %r" % channelId)
+
+        channel = DerivedChannel(self, channelId, sources, function, name=name,
+                                 names=names, units=units)
+        self._channels[channelId] = channel
+        return channel
+
 
     def path(self):
         """ Get the combined names of all the object's parents/grandparents.
@@ -525,7 +765,79 @@ class Dataset(Cascading):
         for ch in self.channels.values():
             ch.updateTransforms()
 
+    def dropCaches(self, channels=None):
+        """ Release the decoded sample data of channels' sessions, freeing
+            memory. The data is decoded again (from the file) when next
+            accessed. See `EventArray.dropCache()`.
+
+            :keyword channels: A list of channel IDs. Defaults to all
+                channels.
+            :return: The number of sessions whose data was released.
+        """
+        count = 0
+        for chId, channel in self.channels.items():
+            if channels is None or chId in channels:
+                for ea in channel.sessions.values():
+                    count += ea.dropCache()
+        return count
+
+
+    def memoryUsage(self):
+        """ Estimate the memory used by the dataset's sample data, in
+            bytes, per channel and session. Each session's usage includes
+            its SubChannels'. See `EventArray.memoryUsage()` for the
+            categories.
+
+            :return: A dictionary containing ``'total'`` and ``'channels'``,
+                a dictionary keyed by channel ID. Each channel's entry
+                contains ``'total'`` and ``'sessions'``, a dictionary of
+                usage keyed by session ID.
+        """
+        seen = set()
+        channels = {}
+        for chId, channel in self._channels.items():
+            sessions = {}
+            for sessionId, ea in channel.sessions.items():
+                usage = ea.memoryUsage(seen)
+                for subchannel in channel.subchannels:
+                    if subchannel is not None and sessionId in subchannel.sessions:
+                        subUsage = subchannel.sessions[sessionId].memoryUsage(seen)
+                        for k, v in subUsage.items():
+                            usage[k] += v
+                sessions[sessionId] = usage
+            channels[chId] = {'total': sum(u['total'] for u in sessions.values()),
+                              'sessions': sessions}
+        return {'total': sum(c['total'] for c in channels.values()),
+                'channels': channels}
+
+
+    def exportShared(self, channels=None, sessionId=None, display=False):
+        """ Place channels' data in shared memory, for use by other
+            processes (e.g. `ProcessPoolExecutor` workers). See
+            `idelib.sharedmem.exportShared()`.
+
+            :keyword channels: A list of channel IDs to share. Defaults to
+                all.
+            :keyword sessionId: The session to share. Defaults to the last.
+            :keyword display: If `True`, the final 'display' transform (e.g.
+                unit conversion) is applied to the values.
+            :return: A picklable `SharedDataset`. Workers get read-only
+                views of the data with its `attach()` method.
+        """
+        from .sharedmem import exportShared
+        return exportShared(self, channels, sessionId, display)
+
+
     def fillCaches(self):
+        stats = self.stats
+        if stats is not None:
+            with stats.timer('fillCaches'):
+                for channel in self.channels.values():
+                    for ea in channel.sessions.values():
+                        ea.fillCache()
+            stats.push('fillCaches')
+            return
+
         for channel in self.channels.values():
             for ea in channel.sessions.values():
                 ea.fillCache()
@@ -771,6 +1083,21 @@ class Channel(Transformable):
         self.allowMeanRemoval = self.id in (0, 8, 32, 80)
 
 
+    def __getstate__(self):
+        # `struct.Struct` parsers can't be pickled; keep the format instead.
+        state = self.__dict__.copy()
+        if isinstance(state.get('parser'), struct.Struct):
+            state['parser'] = state['parser'].format
+        state['_lastParsed'] = (None, None)
+        return state
+
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if isinstance(self.__dict__.get('parser'), str):
+            self.parser = struct.Struct(self.parser)
+
+
     @property
     def children(self):
         return list(iter(self))
@@ -873,7 +1200,8 @@ class Channel(Transformable):
             return self.sessions[sessionId]
         
         session = self.dataset.sessions[sessionId]
-        return self.sessions.setdefault(sessionId, EventArray(self, session))
+        cls = SingleSampleEventArray if self.singleSample else EventArray
+        return self.sessions.setdefault(sessionId, cls(self, session))
     
     
     def parseBlock(self, block, start=None, end=None, step=1, subchannel=None):
@@ -886,7 +1214,9 @@ class Channel(Transformable):
             :keyword subchannel: If supplied, return only the values for a 
                 specific subchannel (i.e. the method is being called by a
                 SubChannel).
-            :return: A list of tuples, one for each subsample.
+            :return: A list of tuples, one for each subsample. If the
+                channel's parser implements `unpack_array()`, a structured
+                array is returned instead.
         """
         # TODO: Cache this; a Channel's SubChannels will often be used together.
         p = (block, start, end, step, subchannel)
@@ -1202,6 +1532,18 @@ class EventArray(Transformable):
     # Width of rolling mean (microseconds), or -1 for total mean removal.
     DEFAULT_MEAN_SPAN = -1
 
+    # The amount of a sample period by which the time between blocks may
+    # exceed the sample period before it is considered a discontinuity.
+    GAP_TOLERANCE = 0.5
+
+    # The number of recent intervals between single-sample blocks used to
+    # estimate the sample period when there is no nominal sample rate.
+    GAP_INTERVALS = 16
+
+    # The maximum time (seconds) to wait for data still being imported
+    # when it is needed internally, e.g. a bivariate's reference channel.
+    WAIT_TIMEOUT = 1.0
+
     def __init__(self, parentChannel, session=None, parentList=None):
         """ Constructor. This should almost always be done indirectly via
             the `getSession()` method of `Channel` and `SubChannel` objects.
@@ -1226,11 +1568,14 @@ class EventArray(Transformable):
             # Cache of block start times and sample indices for faster search
             self._blockTimes = []
             self._blockIndices = []
+            # Indices of blocks following discontinuities (see `getSegments()`)
+            self._gaps = []
         else:
             s = self.session.sessionId if session is not None else None
             ps = parentChannel.parent.getSession(s)
             self._blockTimes = ps._blockTimes
             self._blockIndices = ps._blockIndices
+            self._gaps = ps._gaps
 
             self.noBivariates = ps.noBivariates
         
@@ -1263,14 +1608,22 @@ class EventArray(Transformable):
 
         self._blockIndicesArray = np.array([], dtype=np.float64)
         self._blockTimesArray = np.array([], dtype=np.float64)
+        self._blockTable = None
+        self._blockSums = None
+        self._blockExtrema = None
+        self._extremaTables = {}
 
         self._mean = None
 
         _format = self.parent.parser.format
-        if not _format:
+        _dtype = getattr(self.parent.parser, 'dtype', None)
+        if not _format and _dtype is None:
             self._npType = np.uint8
         elif isinstance(self.parent, SubChannel):
             self._npType = self.parent.parent.getSession()._npType[self.subchannelId]
+        elif _dtype is not None:
+            # Special-case parser that decodes its own data (`unpack_array()`)
+            self._npType = np.dtype(_dtype)
         else:
             if isinstance(_format, bytes):
                 _format = _format.decode()
@@ -1284,6 +1637,7 @@ class EventArray(Transformable):
             self._npType = np.dtype([(str(i), dtype) for i, dtype in enumerate(dtypes)])
 
         self._channelDataLock = parentChannel.dataset._channelDataLock
+        self._dataReady = Condition()
         self._cacheArray = None
         self._cacheBytes = None
         self._fullyCached = False
@@ -1292,6 +1646,68 @@ class EventArray(Transformable):
         self._cacheBlockStart = None
         self._cacheBlockEnd = None
         self._cacheLen = 0
+        self._columns = None
+
+
+    def __getstate__(self):
+        # Decoded data isn't pickled: blocks are packed with their elements'
+        # file offsets (see `parsers.packBlocks()`), and their data is read
+        # from the file again when accessed.
+        if self.dataset.loading:
+            raise TypeError("Cannot pickle a session that is still loading")
+        state = self.__dict__.copy()
+        state.update(_cacheArray=None, _cacheBytes=None, _columns=None,
+                     _channelDataLock=None, _dataReady=None,
+                     _data=self._getPackedBlocks())
+        state.pop('_packedBlocks', None)
+        return state
+
+
+    def __setstate__(self, state):
+        packed = state['_data']
+        self.__dict__.update(state)
+        self._dataReady = Condition()
+
+        # SubChannel sessions share their parent's packed blocks (and so,
+        # once unpacked, the same list of blocks).
+        if 'blocks' not in packed:
+            packed['blocks'] = unpackBlocks(packed, getSchema())
+            packed['unbound'] = True
+        self._data = packed['blocks']
+        self._packedBlocks = packed
+
+        # Objects are unpickled in an arbitrary order. If the dataset isn't
+        # restored yet, it will finish restoring this session itself.
+        if self.dataset._isRestored():
+            self._restore()
+        else:
+            self.dataset.__dict__.setdefault('_unpickled', []).append(self)
+
+
+    def _getPackedBlocks(self):
+        """ Get the session's blocks, packed for pickling (see
+            `parsers.packBlocks()`). SubChannel sessions share their
+            parent's. Used internally.
+        """
+        if self._parentList is not None and self._parentList._data is self._data:
+            return self._parentList._getPackedBlocks()
+
+        packed = self.__dict__.get('_packedBlocks')
+        if packed is None or packed['count'] != len(self._data):
+            packed = packBlocks(self._data, self.dataset._getStreams())
+            self._packedBlocks = packed
+        return packed
+
+
+    def _restore(self):
+        """ Finish unpickling, once the `Dataset` has been restored: use its
+            lock, and attach the blocks' elements to its file. Used
+            internally.
+        """
+        self._channelDataLock = self.dataset._channelDataLock
+        packed, self._packedBlocks = self._packedBlocks, None
+        if packed.pop('unbound', False):
+            bindBlocks(self._data, packed, self.dataset._getStreams())
 
 
     @property
@@ -1301,9 +1717,9 @@ class EventArray(Transformable):
 
     @rollingMeanSpan.setter
     def rollingMeanSpan(self, value):
-        if value != -1:
-            warnings.warn('Rolling mean has been deprecated, this behavior has '
-                          'been replaced with total mean removal.')
+        """ The width of the window (in microseconds) used for mean removal.
+            -1 (or `None`) removes the mean of the entire requested range.
+        """
         self._rollingMeanSpan = value
 
 
@@ -1377,7 +1793,9 @@ class EventArray(Transformable):
         newList.noBivariates = self.noBivariates
         newList._blockIndices = self._blockIndices
         newList._blockTimes = self._blockTimes
+        newList._gaps = self._gaps
         newList._channelDataLock = self._channelDataLock
+        newList._dataReady = self._dataReady
         newList._cacheArray = self._cacheArray
         newList._cacheBytes = self._cacheBytes
         newList._fullyCached = self._fullyCached
@@ -1385,6 +1803,7 @@ class EventArray(Transformable):
         newList._cacheEnd = self._cacheEnd
         newList._cacheBlockStart = self._cacheBlockStart
         newList._cacheBlockEnd = self._cacheBlockEnd
+        newList._columns = self._columns
         return newList
     
 
@@ -1396,6 +1815,49 @@ class EventArray(Transformable):
             
             :attention: Added elements must be in chronological order!
         """
+        stats = self.dataset.stats
+        if stats is not None:
+            with stats.timer('append'):
+                self._appendBlock(block)
+            stats.blocksAppended += 1
+        else:
+            self._appendBlock(block)
+
+        self._notifyDataReady()
+
+
+    def _notifyDataReady(self):
+        """ Wake any threads waiting for this session's data (see
+            `waitForData()`). Used internally.
+        """
+        with self._dataReady:
+            self._dataReady.notify_all()
+
+
+    def waitForData(self, count=1, timeout=None):
+        """ Wait until the session has a number of data blocks, or its
+            `Dataset` has finished loading. Intended for accessing data while
+            it is being imported in another thread; returns immediately if
+            the data is already available.
+
+            :keyword count: The minimum number of blocks to wait for.
+            :keyword timeout: The maximum time to wait (in seconds), or
+                `None` to wait until the data is available or loading is
+                complete.
+            :return: `True` if the session has at least `count` blocks.
+        """
+        def ready():
+            return len(self._data) >= count or not self.dataset.loading
+
+        with self._dataReady:
+            self._dataReady.wait_for(ready, timeout)
+        return len(self._data) >= count
+
+
+    def _appendBlock(self, block):
+        """ Add one data block's contents to the Channel's list of data.
+            Does the actual work of `append()`.
+        """
         with self._channelDataLock:
             if block.numSamples is None:
                 block.numSamples = block.getNumSamples(self.parent.parser)
@@ -1419,58 +1881,126 @@ class EventArray(Transformable):
                 logger.warning("Ignoring block with bad payload size for %r" % self)
                 return
 
-            block.cache = self.parent.cache
-            oldLength = self._length
-
-            block.blockIndex = len(self._data)
-            block.indexRange = (oldLength, oldLength + block.numSamples)
-
-            # _singleSample hint not explicitly set; set it based on this block.
-            # There will be problems if the first block has only one sample, but
-            # future ones don't. This shouldn't happen, though.
-            if self._singleSample is None:
-                self._singleSample = block.numSamples == 1
-                if self._parentList is not None:
-                    self._parentList._singleSample = self._singleSample
-                if self.parent.singleSample is None:
-                    self.parent.singleSample = self._singleSample
-                if self.parent.parent is not None:
-                    self.parent.parent.singleSample = self._singleSample
-
-            # HACK (somewhat): Single-sample-per-block channels get min/mean/max
-            # which is just the same as the value of the sample. Set the values,
-            # but don't set hasMinMeanMax.
-            if self._singleSample is True:# and not self.hasMinMeanMax:
-                block.minMeanMax = np.tile(block.payload, 3)
-                mmmArr = np_recfunctions.structured_to_unstructured(
-                        block._minMeanMax.view(self._npType))
-                block.min, block.mean, block.max = mmmArr
-                self.hasMinMeanMax = False
-            elif block.minMeanMax is not None:
-                mmmArr = np_recfunctions.structured_to_unstructured(
-                    np.frombuffer(block.minMeanMax, self._npType))
-                block.min, block.mean, block.max = mmmArr
-                self.hasMinMeanMax = True
-            else:
-                # XXX: Attempt to calculate min/mean/max here instead of
-                #  in _computeMinMeanMax(). Causes issues with pressure for some
-                #  reason - it starts removing mean and won't plot.
-                vals = np_recfunctions.structured_to_unstructured(block.payload.view(self._npType))
-                block.min = vals.min(axis=0)
-                block.mean = vals.mean(axis=0)
-                block.max = vals.max(axis=0)
-                self.hasMinMeanMax = True
+            self._addBlock(block)
+
+
+    def _addBlock(self, block):
+        """ Add a block (containing at least one sample) to the session's
+            data, and index it. Called by `_appendBlock()`, which holds the
+            data lock. Used internally.
+        """
+        block.cache = self.parent.cache
+        oldLength = self._length
+
+        block._payload = self._decodePayload(block)
+
+        block.blockIndex = len(self._data)
+        block.indexRange = (oldLength, oldLength + block.numSamples)
+
+        # _singleSample hint not explicitly set; set it based on this block.
+        # There will be problems if the first block has only one sample, but
+        # future ones don't. This shouldn't happen, though.
+        if self._singleSample is None:
+            self._singleSample = block.numSamples == 1
+            if self._parentList is not None:
+                self._parentList._singleSample = self._singleSample
+            if self.parent.singleSample is None:
+                self.parent.singleSample = self._singleSample
+            if self.parent.parent is not None:
+                self.parent.parent.singleSample = self._singleSample
+
+        self._setBlockMinMeanMax(block)
+
+        # Cache the index range for faster searching
+        self._blockIndices.append(oldLength)
+        self._blockTimes.append(block.startTime)
+
+        self._hasSubsamples = self._hasSubsamples or block.numSamples > 1
+
+        if self._data and self._isGapBefore(block):
+            self._gaps.append(block.blockIndex)
+
+        self._data.append(block)
+        self._length += block.numSamples
+
+
+    def _decodePayload(self, block):
+        """ Decode a block's sample data, read from its raw payload. Used
+            internally.
+        """
+        unpack_array = getattr(self.parent.parser, 'unpack_array', None)
+        if unpack_array is not None:
+            return unpack_array(block.getRawPayload())
+        return np.frombuffer(block.getRawPayload(), dtype=self._npType)
+
+
+    def _isGapBefore(self, block):
+        """ Is there a discontinuity between the last block and a newly
+            appended one, i.e. does the time between them exceed the sample
+            period (by more than `GAP_TOLERANCE`)? The longer of the two
+            blocks' sample periods is used, since the first block after a
+            pause in recording can be irregular. Used internally.
+        """
+        prev = self._data[-1]
+        periods = [(b.endTime - b.startTime) / (b.numSamples - 1)
+                   for b in (prev, block)
+                   if b.numSamples > 1 and b.endTime > b.startTime]
+        if periods:
+            period = max(periods)
+        elif self.parent.sampleRate:
+            period = 1e6 / self.parent.sampleRate
+        else:
+            # Single-sample blocks with no nominal sample rate
+            period = self._estimatePeriod(
+                    [b.startTime for b in self._data[-self.GAP_INTERVALS - 1:]])
+
+        if period <= 0:
+            return False
+        return block.startTime - prev.endTime > period * (1 + self.GAP_TOLERANCE)
 
-            # Cache the index range for faster searching
-            self._blockIndices.append(oldLength)
-            self._blockTimes.append(block.startTime)
 
-            self._hasSubsamples = self._hasSubsamples or block.numSamples > 1
+    def _estimatePeriod(self, times):
+        """ Estimate the sample period from the times of recent events, for
+            finding discontinuities in data with no nominal sample rate. The
+            median interval is used, so earlier discontinuities don't affect
+            the estimate. Used internally.
+
+            :param times: The times of the most recent events.
+            :return: The estimated period, or 0 if there are too few events
+                for a meaningful estimate.
+        """
+        if len(times) < 4:
+            return 0
+        return float(np.median(np.diff(times)))
 
-            self._data.append(block)
-            self._length += block.numSamples
 
-            block._payload = np.frombuffer(block._payloadEl.dump(), dtype=self._npType)
+    def _setBlockMinMeanMax(self, block):
+        """ Set a newly appended block's `min`, `mean`, and `max`. Used
+            internally.
+        """
+        # HACK (somewhat): Single-sample-per-block channels get min/mean/max
+        # which is just the same as the value of the sample. Set the values,
+        # but don't set hasMinMeanMax.
+        if self._singleSample is True:# and not self.hasMinMeanMax:
+            block.minMeanMax = np.tile(block.payload, 3)
+            mmmArr = np_recfunctions.structured_to_unstructured(
+                    block._minMeanMax.view(self._npType))
+            block.min, block.mean, block.max = mmmArr
+            self.hasMinMeanMax = False
+        elif block.minMeanMax is not None:
+            mmmArr = np_recfunctions.structured_to_unstructured(
+                np.frombuffer(block.minMeanMax, self._npType))
+            block.min, block.mean, block.max = mmmArr
+            self.hasMinMeanMax = True
+        else:
+            # XXX: Attempt to calculate min/mean/max here instead of
+            #  in _computeMinMeanMax(). Causes issues with pressure for some
+            #  reason - it starts removing mean and won't plot.
+            vals = np_recfunctions.structured_to_unstructured(block.payload.view(self._npType))
+            block.min = vals.min(axis=0)
+            block.mean = vals.mean(axis=0)
+            block.max = vals.max(axis=0)
+            self.hasMinMeanMax = True
 
 
     @property
@@ -1547,6 +2077,501 @@ class EventArray(Transformable):
         )
 
 
+    def _getBlockTable(self):
+        """ Get the start time, end time, first event index, number of
+            samples, and sample period of every block, as arrays. The table is
+            cached, and extended if blocks have been added.
+
+            :return: A tuple of five arrays, each with one item per block.
+        """
+        if (self._parentList is not None
+                and self._parentList._data is self._data):
+            # SubChannels share their parent's blocks.
+            return self._parentList._getBlockTable()
+
+        numBlocks = len(self._data)
+        done = 0 if self._blockTable is None else len(self._blockTable[0])
+        if done == numBlocks:
+            return self._blockTable
+        elif done > numBlocks:
+            done = 0
+
+        blocks = self._data[done:numBlocks]
+        num = numBlocks - done
+        starts = np.fromiter((d.startTime for d in blocks), np.float64, num)
+        ends = np.fromiter((d.startTime if d.endTime is None else d.endTime
+                            for d in blocks), np.float64, num)
+        indices = np.fromiter((d.indexRange[0] for d in blocks), np.int64, num)
+        counts = np.fromiter((d.numSamples for d in blocks), np.int64, num)
+
+        # Same as the sample period used by `_inplaceTime()`
+        periods = ends - starts
+        multi = counts > 1
+        periods[multi] /= counts[multi] - 1
+
+        table = starts, ends, indices, counts, periods
+        if done:
+            table = tuple(np.concatenate((old[:done], new))
+                          for old, new in zip(self._blockTable, table))
+
+        self._blockTable = table
+        return self._blockTable
+
+
+    def _timesFromIndices(self, indices):
+        """ Get the times of events by index, computed from their blocks'
+            start times and sample periods. Only the requested times are
+            computed.
+
+            :param indices: An array of event indices.
+            :return: An array of event times.
+        """
+        starts, _ends, firsts, _counts, periods = self._getBlockTable()
+        indices = np.asarray(indices, dtype=np.int64)
+        blockIdx = np.searchsorted(firsts, indices, side='right') - 1
+        blockIdx = np.clip(blockIdx, 0, max(0, len(firsts) - 1))
+        return starts[blockIdx] + (indices - firsts[blockIdx]) * periods[blockIdx]
+
+
+    def _getEventIndicesBefore(self, times):
+        """ Vectorized version of `getEventIndexBefore()`: get the indices of
+            the events occurring on or immediately before each of the
+            specified times.
+
+            :param times: An array of times (in microseconds).
+            :return: An array of event indices, -1 for times occurring
+                before the first event.
+        """
+        starts, _ends, firsts, counts, periods = self._getBlockTable()
+        times = np.asarray(times, dtype=np.float64)
+
+        blockIdx = np.searchsorted(starts, times, side='right') - 1
+        before = blockIdx < 0
+        blockIdx[before] = 0
+
+        # Offset within each block. Times in a gap after a block resolve to
+        # the block's last event.
+        with np.errstate(divide='ignore', invalid='ignore'):
+            offsets = np.floor((times - starts[blockIdx]) / periods[blockIdx])
+        offsets[~np.isfinite(offsets)] = 0
+        offsets = np.clip(offsets, 0, counts[blockIdx] - 1).astype(np.int64)
+        indices = firsts[blockIdx] + offsets
+
+        # Correct any floating point rounding at sample boundaries
+        indices -= self._timesFromIndices(indices) > times
+        nextIdx = np.minimum(indices + 1, len(self) - 1)
+        indices += (nextIdx > indices) & (self._timesFromIndices(nextIdx) <= times)
+
+        indices[before] = -1
+        return indices
+
+
+    # Maximum number of samples processed at once when computing block sums
+    STATS_CHUNK_SIZE = 2**20
+
+    def _getBlockSums(self):
+        """ Get the cumulative sums of raw values and of squared raw values,
+            block by block, for each subchannel. Values are offset by the
+            first sample of each subchannel to reduce rounding error; for
+            integer data, the sums are exact. The sums are cached, and
+            extended as blocks are added.
+
+            :return: A tuple containing the per-subchannel offsets, and two
+                arrays of cumulative sums (subchannels x blocks+1).
+        """
+        if (self._parentList is not None
+                and self._parentList._data is self._data):
+            # SubChannels share their parent's blocks.
+            return self._parentList._getBlockSums()
+
+        _starts, _ends, firsts, counts, _periods = self._getBlockTable()
+        numBlocks = len(firsts)
+        names = self._npType.names
+
+        if self._blockSums is not None and self._blockSums[0] == numBlocks:
+            return self._blockSums[1:]
+
+        if self._blockSums is None:
+            first = self._accessCache(0, 1, 1)
+            shift = np.array([float(first[n][0]) for n in names])
+            sums = np.zeros((len(names), 1))
+            sumsq = np.zeros((len(names), 1))
+            done = 0
+        else:
+            done, shift, sums, sumsq = self._blockSums
+
+        if numBlocks > done:
+            startIdx = firsts[done]
+            endIdx = firsts[-1] + counts[-1]
+            rawData = self._accessCache(startIdx, endIdx, 1)
+            newSums = np.empty((len(names), numBlocks - done))
+            newSumsq = np.empty_like(newSums)
+
+            # Process in chunks of whole blocks, to limit memory use
+            b = done
+            while b < numBlocks:
+                last = max(b + 1, np.searchsorted(firsts, firsts[b] + self.STATS_CHUNK_SIZE))
+                last = min(last, numBlocks)
+                chunkStart = firsts[b] - startIdx
+                chunkEnd = firsts[last - 1] + counts[last - 1] - startIdx
+                offsets = firsts[b:last] - firsts[b]
+                for i, n in enumerate(names):
+                    vals = rawData[n][chunkStart:chunkEnd].astype(np.float64)
+                    vals -= shift[i]
+                    newSums[i, b - done:last - done] = np.add.reduceat(vals, offsets)
+                    vals *= vals
+                    newSumsq[i, b - done:last - done] = np.add.reduceat(vals, offsets)
+                b = last
+
+            sums = np.concatenate((sums, sums[:, -1:] + np.cumsum(newSums, axis=1)), axis=1)
+            sumsq = np.concatenate((sumsq, sumsq[:, -1:] + np.cumsum(newSumsq, axis=1)), axis=1)
+
+        self._blockSums = numBlocks, shift, sums, sumsq
+        return shift, sums, sumsq
+
+
+    def _getRangeSums(self, start, end):
+        """ Get the sums of the raw values and squared raw values for each
+            subchannel within a range of event indices. Complete blocks are
+            taken from the cumulative block sums; only the partial blocks at
+            either end of the range are read.
+
+            :param start: The first event index.
+            :param end: The last event index (exclusive).
+            :return: A tuple containing the per-subchannel offsets (see
+                `_getBlockSums()`), and the sums of the offset values and of
+                their squares.
+        """
+        if (self._parentList is not None
+                and self._parentList._data is self._data):
+            return self._parentList._getRangeSums(start, end)
+
+        _starts, _ends, firsts, counts, _periods = self._getBlockTable()
+        shift, sums, sumsq = self._getBlockSums()
+        names = self._npType.names
+
+        # Blocks completely within the range
+        firstBlock = np.searchsorted(firsts, start, side='left')
+        lastBlock = np.searchsorted(firsts + counts, end, side='right')
+
+        def _direct(a, b):
+            rawData = self._accessCache(a, b, 1)
+            s = np.empty(len(names))
+            s2 = np.empty(len(names))
+            for i, n in enumerate(names):
+                vals = rawData[n].astype(np.float64)
+                vals -= shift[i]
+                s[i] = vals.sum()
+                s2[i] = np.dot(vals, vals)
+            return s, s2
+
+        if firstBlock >= lastBlock:
+            return (shift,) + _direct(start, end)
+
+        total = sums[:, lastBlock] - sums[:, firstBlock]
+        totalSq = sumsq[:, lastBlock] - sumsq[:, firstBlock]
+
+        for a, b in ((start, firsts[firstBlock]),
+                     (firsts[lastBlock - 1] + counts[lastBlock - 1], end)):
+            if b > a:
+                s, s2 = _direct(a, b)
+                total += s
+                totalSq += s2
+
+        return shift, total, totalSq
+
+
+    def _getLinearXform(self, display=False):
+        """ Get the per-subchannel scale and offset equivalent to the
+            calibration transform, if the transform is linear (e.g. univariate
+            polynomials, or bivariates using the mean of the other channel).
+
+            :keyword display: If `True`, use the 'display' transform.
+            :return: A tuple of two arrays (scale and offset, one item per
+                subchannel), or `None` if the transform isn't linear.
+        """
+        if self.useAllTransforms:
+            xform = self._fullXform
+            if display:
+                xform = self._displayXform or xform
+        else:
+            xform = self._comboXform
+
+        def _isLinear(t):
+            if t is None:
+                return True
+            if isinstance(t, ComplexTransform):
+                return False
+            if isinstance(t, PolyPoly):
+                return all(_isLinear(p) for p in t.polys)
+            if isinstance(t, Bivariate):
+                if t._noY is False and not (t.useMean or self.noBivariates):
+                    return False
+                if isinstance(t, CombinedPoly):
+                    return (_isLinear(t.poly)
+                            and all(_isLinear(p) for p in t.subpolys.values()))
+            return True
+
+        if not _isLinear(xform):
+            return None
+
+        # Probe the transform with a few raw values
+        probe = np.array([0.0, 1.0, 2.0**15, 2.0**16])
+        if isinstance(self.parent, SubChannel):
+            out = np.empty((1, len(probe)))
+            result = xform.polys[self.subchannelId].inplace(probe, out=out[0], noBivariates=self.noBivariates)
+        else:
+            values = np.tile(probe, (len(self._npType), 1))
+            out = np.empty_like(values)
+            result = xform.inplace(values, out=out, noBivariates=self.noBivariates)
+
+        if result is None:
+            return None
+
+        offset = out[:, 0]
+        scale = (out[:, -1] - out[:, 0]) / probe[-1]
+        expected = np.outer(scale, probe) + offset[:, np.newaxis]
+        if not np.allclose(out, expected, rtol=1e-9, atol=1e-9):
+            return None
+
+        return scale, offset
+
+
+    def _getRangeStats(self, start, end, display=False):
+        """ Get the calibrated mean and variance of each subchannel within a
+            range of event indices, using the cumulative block sums.
+
+            :param start: The first event index.
+            :param end: The last event index (exclusive).
+            :keyword display: If `True`, use the 'display' transform.
+            :return: A tuple containing two arrays (mean and variance, one
+                item per subchannel), or `None` if the range is empty or the
+                calibration isn't linear.
+        """
+        if end <= start:
+            return None
+
+        coeffs = self._getLinearXform(display)
+        if coeffs is None:
+            return None
+        scale, offset = coeffs
+
+        shift, total, totalSq = self._getRangeSums(start, end)
+        n = float(end - start)
+        rawMean = total / n
+        rawVar = np.maximum(totalSq / n - rawMean * rawMean, 0)
+
+        mean = scale * (rawMean + shift) + offset
+        var = scale * scale * rawVar
+
+        if isinstance(self.parent, SubChannel):
+            return mean[self.subchannelId:self.subchannelId+1], var[self.subchannelId:self.subchannelId+1]
+        return mean, var
+
+
+    def _getRangeMeans(self, start, end, display=False):
+        """ Get the mean of each subchannel within a range of event indices,
+            shaped for subtracting from the results of `arraySlice()`. Used
+            for mean removal.
+
+            :return: An array of means, or `None` if they cannot be computed
+                from the cumulative block sums.
+        """
+        stats = self._getRangeStats(start, end, display)
+        if stats is None:
+            return None
+        return stats[0][:, np.newaxis]
+
+
+    def _getBlockExtrema(self):
+        """ Get the minimum and maximum raw value of each subchannel in every
+            block. Unlike the blocks' own `min` and `max`, these are always
+            available, even if the blocks' statistics haven't been computed.
+            The results are cached, and extended as blocks are added.
+
+            :return: A tuple containing two arrays of raw values (minimums
+                and maximums, subchannels x blocks).
+        """
+        if (self._parentList is not None
+                and self._parentList._data is self._data):
+            return self._parentList._getBlockExtrema()
+
+        _starts, _ends, firsts, counts, _periods = self._getBlockTable()
+        numBlocks = len(firsts)
+        names = self._npType.names
+
+        if self._blockExtrema is not None:
+            done, mins, maxs = self._blockExtrema
+            if done == numBlocks:
+                return mins, maxs
+        else:
+            done = 0
+            mins = maxs = np.empty((len(names), 0))
+
+        if numBlocks > done:
+            startIdx = firsts[done]
+            endIdx = firsts[-1] + counts[-1]
+            rawData = self._accessCache(startIdx, endIdx, 1)
+            offsets = firsts[done:] - startIdx
+            newMins = np.empty((len(names), numBlocks - done))
+            newMaxs = np.empty_like(newMins)
+            for i, n in enumerate(names):
+                newMins[i] = np.minimum.reduceat(rawData[n], offsets)
+                newMaxs[i] = np.maximum.reduceat(rawData[n], offsets)
+            mins = np.concatenate((mins, newMins), axis=1)
+            maxs = np.concatenate((maxs, newMaxs), axis=1)
+
+        self._blockExtrema = numBlocks, mins, maxs
+        return mins, maxs
+
+
+    def _getBlockBounds(self, startBlock=0, endBlock=None):
+        """ Get the minimum and maximum raw value of each subchannel in a
+            range of blocks, for quickly ruling blocks out without reading
+            their data. The blocks' own `min` and `max` (recorded in the
+            file, or computed when the block was appended) are used if all
+            the blocks have them; otherwise, the exact extrema are computed
+            by `_getBlockExtrema()`.
+
+            :keyword startBlock: The index of the first block.
+            :keyword endBlock: The index of the last block (exclusive).
+                Defaults to the end.
+            :return: A tuple containing two arrays of raw values (minimums
+                and maximums, subchannels x blocks).
+        """
+        if (self._parentList is not None
+                and self._parentList._data is self._data):
+            return self._parentList._getBlockBounds(startBlock, endBlock)
+
+        blocks = self._data[startBlock:endBlock]
+        if all(getattr(b, 'min', None) is not None
+               and getattr(b, 'max', None) is not None for b in blocks):
+            numSubchannels = len(self._npType.names)
+            mins = np.array([b.min for b in blocks], dtype=np.float64)
+            maxs = np.array([b.max for b in blocks], dtype=np.float64)
+            return (mins.reshape(-1, numSubchannels).T,
+                    maxs.reshape(-1, numSubchannels).T)
+
+        mins, maxs = self._getBlockExtrema()
+        return mins[:, startBlock:endBlock], maxs[:, startBlock:endBlock]
+
+
+    def _getExtremaTable(self, display=False, findMax=True):
+        """ Get a sparse table for range maximum (or minimum) queries over
+            the calibrated extrema of each block. Row `k` of the table holds,
+            for each block `i`, the index of the block with the most extreme
+            value in blocks `i` through `i + 2**k - 1`.
+
+            :keyword display: If `True`, use the 'display' transform.
+            :keyword findMax: If `True`, build the table for maximums,
+                otherwise minimums.
+            :return: A tuple containing the calibrated extreme value of each
+                block, and the table (a list of arrays of block indices), or
+                `None` if the calibration isn't linear.
+        """
+        coeffs = self._getLinearXform(display)
+        if coeffs is None:
+            return None
+        scale, offset = coeffs
+
+        mins, maxs = self._getBlockExtrema()
+        numBlocks = mins.shape[1]
+        key = (display, findMax)
+        cached = self._extremaTables.get(key)
+        if (cached is not None and cached[0] == numBlocks
+                and np.array_equal(cached[1], scale)
+                and np.array_equal(cached[2], offset)):
+            return cached[3:]
+
+        if isinstance(self.parent, SubChannel):
+            sl = slice(self.subchannelId, self.subchannelId+1)
+            mins, maxs = mins[sl], maxs[sl]
+
+        # A negative scale swaps a block's minimum and maximum
+        col = scale[:, np.newaxis]
+        lo = np.where(col < 0, maxs, mins) * col + offset[:, np.newaxis]
+        hi = np.where(col < 0, mins, maxs) * col + offset[:, np.newaxis]
+        if findMax:
+            values = hi.max(axis=0)
+            better = np.greater
+        else:
+            values = lo.min(axis=0)
+            better = np.less
+
+        table = [np.arange(numBlocks)]
+        width = 1
+        while width * 2 <= numBlocks:
+            prev = table[-1]
+            a = prev[:numBlocks - width * 2 + 1]
+            b = prev[width:numBlocks - width + 1]
+            table.append(np.where(better(values[b], values[a]), b, a))
+            width *= 2
+
+        self._extremaTables[key] = (numBlocks, scale, offset, values, table)
+        return values, table
+
+
+    def _getRangeExtremum(self, startTime=None, endTime=None, display=False,
+                          findMax=True):
+        """ Find the event with the most extreme value within a time range.
+            Complete blocks are searched using a sparse table of block
+            extrema; only the partial blocks at either end of the range and
+            the block containing the extreme value are read.
+
+            :keyword startTime: The starting time. Defaults to the start.
+            :keyword endTime: The ending time. Defaults to the end.
+            :keyword display: If `True`, use the 'display' transform.
+            :keyword findMax: If `True`, find the maximum, otherwise the
+                minimum.
+            :return: A tuple containing the event's index and the event, or
+                `None` if the range is empty.
+        """
+        start, end = self.getRangeIndices(startTime, endTime)
+        if end <= start:
+            return None
+
+        better = np.greater if findMax else np.less
+        pick = np.argmax if findMax else np.argmin
+        candidates = []
+
+        def _scan(a, b):
+            if b > a:
+                data = self.arraySlice(a, b, display=display)
+                vals = data[1:].max(axis=0) if findMax else data[1:].min(axis=0)
+                i = pick(vals)
+                candidates.append((vals[i], a + i, data[:, i]))
+
+        tables = None
+        if not (self.removeMean and self.allowMeanRemoval):
+            tables = self._getExtremaTable(display, findMax)
+
+        if tables is None:
+            _scan(start, end)
+        else:
+            values, table = tables
+            _starts, _ends, firsts, counts, _periods = self._getBlockTable()
+            firstBlock = np.searchsorted(firsts, start, side='left')
+            lastBlock = np.searchsorted(firsts + counts, end, side='right')
+            if firstBlock >= lastBlock:
+                _scan(start, end)
+            else:
+                # Scanned in order, so ties go to the first event (as with
+                # `argmax()`/`argmin()`).
+                _scan(start, firsts[firstBlock])
+                k = int(lastBlock - firstBlock).bit_length() - 1
+                a = table[k][firstBlock]
+                b = table[k][lastBlock - 2**k]
+                blockIdx = b if better(values[b], values[a]) else a
+                _scan(firsts[blockIdx], firsts[blockIdx] + counts[blockIdx])
+                _scan(firsts[lastBlock-1] + counts[lastBlock-1], end)
+
+        best = candidates[0]
+        for c in candidates[1:]:
+            if better(c[0], best[0]):
+                best = c
+        return best[1], best[2]
+
+
     def _getBlockRollingMean_old(self, blockIdx, force=False):
         """ Get the mean of a block and its neighbors within a given time span.
             Note: Values are taken pre-calibration, and all subchannels are
@@ -1692,7 +2717,9 @@ class EventArray(Transformable):
     def __eq__(self, other):
         if other is self:
             return True
-        elif not isinstance(other, self.__class__):
+        elif not isinstance(other, EventArray):
+            # Note: subclasses (e.g. `SingleSampleEventArray`) are an
+            # implementation detail, and don't affect equality.
             return False
         else:
             return self.parent == other.parent \
@@ -1772,20 +2799,25 @@ class EventArray(Transformable):
         else:
             xform = self._comboXform
 
-        rawData = self._accessCache(start, end, step)
+        rawData = self._accessColumns(slice(start, end, step))
 
         if isinstance(self.parent, SubChannel):
             out = np.empty((1, len(rawData)))
-        else:
-            out = np.empty((len(rawData.dtype), len(rawData)))
-
-        if isinstance(self.parent, SubChannel):
             xform.polys[self.subchannelId].inplace(rawData, out=out, noBivariates=self.noBivariates)
         else:
-            xform.inplace(np_recfunctions.structured_to_unstructured(rawData).T, out=out, noBivariates=self.noBivariates)
-
-        if self.removeMean:
-            out[1:] -= out[1:].mean(axis=1, keepdims=True)
+            out = np.empty(rawData.shape)
+            xform.inplace(rawData, out=out, noBivariates=self.noBivariates)
+
+        if self.removeMean and out.shape[1]:
+            if self._hasRollingMean():
+                means = self._getRollingStat(start, end, step,
+                                             self.rollingMeanSpan, 'mean',
+                                             display)
+            else:
+                means = self._getRangeMeans(start, end, display)
+                if means is None:
+                    means = out.mean(axis=1, keepdims=True)
+            out -= means
 
         if isinstance(subchannels, Iterable):
             return out[list(subchannels)]
@@ -1829,6 +2861,32 @@ class EventArray(Transformable):
             start = slice(start, end, step)
         start, end, step = start.indices(len(self))
 
+        out = self._calibratedSlice(start, end, step, display)
+
+        if self.removeMean and out.shape[1]:
+            if self._hasRollingMean():
+                means = self._getRollingStat(start, end, step,
+                                             self.rollingMeanSpan, 'mean',
+                                             display)
+            else:
+                means = self._getRangeMeans(start, end, display)
+                if means is None:
+                    means = out[1:].mean(axis=1, keepdims=True)
+            out[1:] -= means
+
+        return out
+
+
+    def _calibratedSlice(self, start, end, step, display=False):
+        """ Get the times and calibrated values of events within a range of
+            indices, without mean removal. Used internally.
+
+            :param start: The first index in the range.
+            :param end: The last index in the range (exclusive).
+            :param step: The step increment.
+            :keyword display: If `True`, use the 'display' transform.
+            :return: An array of times and values, like `arraySlice()`.
+        """
         if self.useAllTransforms:
             xform = self._fullXform
             if display:
@@ -1836,23 +2894,99 @@ class EventArray(Transformable):
         else:
             xform = self._comboXform
 
-        rawData = self._accessCache(start, end, step)
+        rawData = self._accessColumns(slice(start, end, step))
 
         if isinstance(self.parent, SubChannel):
             out = np.empty((2, len(rawData)))
         else:
-            out = np.empty((len(rawData.dtype) + 1, len(rawData)))
+            out = np.empty((rawData.shape[0] + 1, rawData.shape[1]))
 
         self._inplaceTime(start, end, step, out=out[0])
 
         if isinstance(self.parent, SubChannel):
             xform.polys[self.subchannelId].inplace(rawData, out=out[1], timestamp=out[0], noBivariates=self.noBivariates)
         else:
-            xform.inplace(np_recfunctions.structured_to_unstructured(rawData).T, out=out[1:], timestamp=out[0], noBivariates=self.noBivariates)
+            xform.inplace(rawData, out=out[1:], timestamp=out[0], noBivariates=self.noBivariates)
+
+        return out
+
+
+    def _hasRollingMean(self):
+        """ Does mean removal use a rolling mean (rather than the mean of
+            the entire requested range)?
+        """
+        span = self.rollingMeanSpan
+        return span is not None and span > 0
+
+
+    def _getRollingStat(self, start, end, step, span, stat, display=False):
+        """ Compute a rolling statistic for a range of events, using a
+            window of `span` microseconds centered on each event. The window
+            may extend beyond the range. Events are processed in chunks.
+
+            :param start: The first index in the range.
+            :param end: The last index in the range (exclusive).
+            :param step: The step increment.
+            :param span: The width of the window, in microseconds.
+            :param stat: The name of the statistic; see
+                `idelib.rolling.STATISTICS`.
+            :keyword display: If `True`, use the 'display' transform.
+            :return: An array of the statistic (subchannels x events).
+        """
+        indices = np.arange(start, end, step, dtype=np.int64)
+        numRows = 1 if isinstance(self.parent, SubChannel) else len(self._npType)
+        out = np.empty((numRows, len(indices)))
+        if not len(indices):
+            return out
+
+        times = self._timesFromIndices(indices)
+        half = span / 2.0
+        for c in range(0, len(indices), self.STATS_CHUNK_SIZE):
+            t = times[c:c + self.STATS_CHUNK_SIZE]
+            lo = self._getEventIndicesBefore(t - half) + 1
+            hi = self._getEventIndicesBefore(t + half) + 1
+            # The event itself is always in its window
+            lo = np.minimum(lo, indices[c:c + self.STATS_CHUNK_SIZE])
+            hi = np.maximum(hi, indices[c:c + self.STATS_CHUNK_SIZE] + 1)
+            first = lo.min()
+            values = self._calibratedSlice(first, hi.max(), 1, display)[1:]
+            out[:, c:c + len(t)] = rolling.windowStat(values, lo - first,
+                                                      hi - first, stat)
+        return out
+
+
+    def arrayRolling(self, start=None, end=None, step=1, span=1000000,
+                     stat='mean', display=False):
+        """ Create an array of a rolling (moving) statistic of events within
+            a range of indices, using a window of a given length of time
+            centered on each event. Mean removal is not applied.
+
+            :keyword start: The first index in the range, or a slice.
+            :keyword end: The last index in the range. Not used if `start` is
+                a slice.
+            :keyword step: The step increment. Not used if `start` is a slice.
+            :keyword span: The width of the window, in microseconds.
+            :keyword stat: The statistic to compute: ``'mean'``, ``'rms'``,
+                ``'std'``, ``'min'``, or ``'max'``.
+            :keyword display: If `True`, the `EventArray` transform (i.e. the
+                'display' transform) will be applied to the data.
+            :return: an array of event times and the statistic, like the
+                results of `arraySlice()`.
+        """
+        if stat not in rolling.STATISTICS:
+            raise ValueError("Unknown statistic %r; must be one of %s" %
+                             (stat, ', '.join(rolling.STATISTICS)))
+        if not span > 0:
+            raise ValueError("span must be greater than 0, got %r" % span)
 
-        if self.removeMean:
-            out[1:] -= out[1:].mean(axis=1, keepdims=True)
+        if not isinstance(start, slice):
+            start = slice(start, end, step)
+        start, end, step = start.indices(len(self))
 
+        stats = self._getRollingStat(start, end, step, span, stat, display)
+        out = np.empty((stats.shape[0] + 1, stats.shape[1]))
+        self._inplaceTime(start, end, step, out=out[0])
+        out[1:] = stats
         return out
 
 
@@ -2028,35 +3162,94 @@ class EventArray(Transformable):
                 the session.
         """
         if self.parent.singleSample:
-            startIdx = self._getBlockIndexWithTime(startTime)
+            if startTime is None:
+                startIdx = 0
+            else:
+                startIdx = self._getBlockIndexWithTime(startTime)
             if endTime is None:
                 endIdx = len(self)
             else:
                 endIdx = self._getBlockIndexWithTime(endTime, startIdx) + 1
             return startIdx, endIdx
             
-        if startTime is None or startTime <= self._data[0].startTime:
+        # The events on or before each time, computed from the block table.
+        # Times falling between blocks resolve to the event before them.
+        firstTime = self._data[0].startTime
+        times = np.array([firstTime if startTime is None else startTime,
+                          firstTime if endTime is None else endTime],
+                         dtype=np.float64)
+        before = self._getEventIndicesBefore(times)
+
+        if startTime is None or startTime <= firstTime:
             startIdx = 0
         else:
-            startBlockIdx = self._getBlockIndexWithTime(startTime)
-            startBlock = self._data[startBlockIdx]
-
-            if startTime < startBlock.endTime:
-                # Start time is within a block (the usual case)
-                startIdx = int((startBlock.indexRange[0] +
-                               ((startTime - startBlock.startTime) /
-                                self._getBlockSampleTime(startBlockIdx)) + 1))
-            else:
-                # Start time falls within a gap between blocks
-                startIdx = startBlock.indexRange[1]
+            startIdx = int(before[0]) + 1
 
         if endTime is None:
-            endIdx = self._data[-1].indexRange[1]
-        elif endTime <= self._data[0].startTime:
+            endIdx = len(self)
+        elif endTime <= firstTime:
             endIdx = 0
         else:
-            endIdx = self.getEventIndexBefore(endTime)+1
+            endIdx = int(before[1]) + 1
+
+            # As with `getEventIndexBefore()`, an end time between blocks
+            # (e.g. within a gap) includes the first event after it.
+            starts, ends, _firsts, _counts, _periods = self._getBlockTable()
+            blockIdx = np.searchsorted(starts, times[1], side='right') - 1
+            if times[1] > ends[blockIdx]:
+                endIdx += 1
+
         return max(0, startIdx), min(endIdx, len(self))
+
+
+    def _getSegmentBounds(self):
+        """ Get the index of the first event after each discontinuity (a
+            gap between blocks), as found when the data was imported.
+
+            :return: An array of event indices.
+        """
+        return np.array([self._data[i].indexRange[0] for i in self._gaps[:]],
+                        dtype=np.int64)
+
+
+    def getSegments(self, startTime=None, endTime=None, indices=False):
+        """ Get the contiguous segments of the data: the spans between
+            discontinuities, where the time between blocks exceeds the
+            sample period (by more than `GAP_TOLERANCE`). Discontinuities
+            are found as the data is imported. Analyses requiring contiguous
+            data (e.g. FFTs or filtering) can use this to split the data.
+
+            :keyword startTime: The first time (in microseconds by default),
+                `None` to start at the beginning of the session.
+            :keyword endTime: The second time, or `None` to use the end of
+                the session.
+            :keyword indices: If `True`, return event indices rather than
+                times.
+            :return: An array with one row per segment, containing the
+                times of the segment's first and last events. If `indices`
+                is `True`, the rows contain the index of the segment's first
+                event and the index after its last event.
+        """
+        if self._data:
+            start, end = self.getRangeIndices(startTime, endTime)
+        else:
+            start = end = 0
+
+        if end <= start:
+            segments = np.empty((0, 2), dtype=np.int64)
+        else:
+            bounds = self._getSegmentBounds()
+            bounds = bounds[(bounds > start) & (bounds < end)]
+            edges = np.concatenate(([start], bounds, [end]))
+            segments = np.column_stack((edges[:-1], edges[1:]))
+
+        if indices:
+            return segments
+
+        times = np.empty(segments.shape, dtype=np.float64)
+        times[:, 0] = self._timesFromIndices(segments[:, 0])
+        times[:, 1] = self._timesFromIndices(segments[:, 1] - 1)
+        return times
     
 
     def iterRange(self, startTime=None, endTime=None, step=1, display=False):
@@ -2148,23 +3341,18 @@ class EventArray(Transformable):
             t = block.startTime
             m = _getBlockRollingMean(block.blockIndex)
             
-            # HACK: Multithreaded loading can (very rarely) fail at start.
-            # The problem is almost instantly resolved, though. Find root cause.
-            tries = 0
+            # The mean can be unavailable if the data is still being imported.
+            # Wait for the next block, then try again.
             if removeMean and m is None:
-                sleep(0.01)
+                self.waitForData(len(self._data) + 1, self.WAIT_TIMEOUT)
                 m = _getBlockRollingMean(block.blockIndex)
-                tries += 1
-                if tries > 10 or not self.dataset.loading:
-                    break
             
             if m is not None:
+                # Transforms wait for their reference channel's data (if
+                # still loading); `None` means there is none.
                 mx = xform(t, m, session, noBivariates=self.noBivariates)
                 if mx is None:
-                    sleep(0.005)
-                    mx = xform(t, m, session, noBivariates=self.noBivariates)
-                    if mx is None:
-                        mx = t, m
+                    mx = t, m
                 m = np.array(mx[1])
                 
             result = []
@@ -2173,12 +3361,7 @@ class EventArray(Transformable):
             for val in (block.min, block.mean, block.max):
                 event=xform(t, val, session, noBivariates=self.noBivariates)
                 if event is None:
-                    # HACK: No bivariate data (yet), possibly still loading.
-                    # Retry once.
-                    sleep(0.005)
-                    event = xform(t, val, session, noBivariates=self.noBivariates)
-                    if event is None:
-                        event = t, val
+                    event = t, val
                 tx, valx = event
                 if removeMean and m is not None:
                     valx = valx - m
@@ -2358,7 +3541,7 @@ class EventArray(Transformable):
             endBlockIdx = len(self._data)
         else:
             if endTime < 0:
-                endTime += self._data[-1].endTime
+                endTime += self._lastTime
             endBlockIdx = self._getBlockIndexWithTime(endTime, start=startBlockIdx)
             endBlockIdx = min(len(self._data), max(startBlockIdx+1, endBlockIdx+1))
             
@@ -2376,15 +3559,10 @@ class EventArray(Transformable):
                 unit conversion) will be applied to the results.
             :return: The event with the maximum value.
         """
-        maxs = self.arrayMinMeanMax(startTime, endTime, times=False,
-                                    display=display, iterator=iterator)[2].max(axis=0)
-
-        blockIdx = maxs.argmax()  # TODO: is this bug-free? double-check
-        sampleIdxRange = self._data[blockIdx].indexRange
-        blockData = self.arraySlice(*sampleIdxRange, display=display)
-        subIdx = blockData[1:].max(axis=0).argmax()
-
-        return blockData[:, subIdx]
+        result = self._getRangeExtremum(startTime, endTime, display, True)
+        if result is None:
+            return None
+        return result[1]
 
 
     def getMin(self, startTime=None, endTime=None, display=False, iterator=iter):
@@ -2398,18 +3576,194 @@ class EventArray(Transformable):
                 unit conversion) will be applied to the results.
             :return: The event with the minimum value.
         """
-        if not self.hasMinMeanMax:
-            self._computeMinMeanMax()
+        result = self._getRangeExtremum(startTime, endTime, display, False)
+        if result is None:
+            return None
+        return result[1]
 
-        mins = self.arrayMinMeanMax(startTime, endTime, times=False,
-                                    display=display, iterator=iterator)[0].min(axis=0)
 
-        blockIdx = mins.argmin()  # TODO: is this bug-free? double-check
-        sampleIdxRange = self._data[blockIdx].indexRange
-        blockData = self.arraySlice(*sampleIdxRange, display=display)
-        subIdx = blockData[1:].min(axis=0).argmin()
+    def getMaxIndex(self, startTime=None, endTime=None, display=False):
+        """ Get the index of the event with the maximum value, optionally
+            within a specified time range. For Channels, the maximum among
+            all Subchannels.
+
+            :keyword startTime: The starting time. Defaults to the start.
+            :keyword endTime: The ending time. Defaults to the end.
+            :keyword display: If `True`, the final 'display' transform (e.g.
+                unit conversion) will be applied to the values.
+            :return: The index of the event with the maximum value, or
+                `None` if the range contains no events.
+        """
+        result = self._getRangeExtremum(startTime, endTime, display, True)
+        if result is None:
+            return None
+        return int(result[0])
 
-        return blockData[:, subIdx]
+
+    def getMinIndex(self, startTime=None, endTime=None, display=False):
+        """ Get the index of the event with the minimum value, optionally
+            within a specified time range. For Channels, the minimum among
+            all Subchannels.
+
+            :keyword startTime: The starting time. Defaults to the start.
+            :keyword endTime: The ending time. Defaults to the end.
+            :keyword display: If `True`, the final 'display' transform (e.g.
+                unit conversion) will be applied to the values.
+            :return: The index of the event with the minimum value, or
+                `None` if the range contains no events.
+        """
+        result = self._getRangeExtremum(startTime, endTime, display, False)
+        if result is None:
+            return None
+        return int(result[0])
+
+
+    def findEvents(self, threshold, axes=None, minGap=0, preTrigger=0,
+                   postTrigger=0, startTime=None, endTime=None, display=False):
+        """ Find intervals in which the magnitude of the data meets or
+            exceeds a threshold (e.g. shocks). Blocks whose calibrated
+            minimum and maximum (as recorded in the file, if present) show
+            that they cannot cross the threshold are skipped without being
+            read.
+
+            :param threshold: The threshold value. Samples with an absolute
+                value greater than or equal to this are detections.
+            :keyword axes: A list of subchannel IDs to check. Defaults to
+                all subchannels. Not used by SubChannels.
+            :keyword minGap: Detections separated by no more than this
+                amount of time (in microseconds) are merged into the same
+                event.
+            :keyword preTrigger: Time to include before the first detection
+                in each event.
+            :keyword postTrigger: Time to include after the last detection
+                in each event.
+            :keyword startTime: The first time (in microseconds by default),
+                `None` to start at the beginning of the session.
+            :keyword endTime: The second time, or `None` to use the end of
+                the session.
+            :keyword display: If `True`, the final 'display' transform (e.g.
+                unit conversion) will be applied to the values.
+            :return: An array of events, one row per event, containing the
+                event's start and end times.
+        """
+        threshold = abs(threshold)
+        start, end = self.getRangeIndices(startTime, endTime)
+        if end <= start:
+            return np.empty((0, 2))
+
+        isSubchannel = isinstance(self.parent, SubChannel)
+        if isSubchannel or axes is None:
+            rows = slice(1, None)
+        else:
+            rows = [a + 1 for a in axes]
+
+        _starts, _ends, firsts, counts, _periods = self._getBlockTable()
+        firstBlock = np.searchsorted(firsts + counts, start, side='right')
+        lastBlock = np.searchsorted(firsts, end, side='left')
+        candidates = np.ones(lastBlock - firstBlock, dtype=bool)
+
+        coeffs = None
+        if not (self.removeMean and self.allowMeanRemoval):
+            coeffs = self._getLinearXform(display)
+        if coeffs is not None:
+            scale, offset = coeffs
+            mins, maxs = self._getBlockBounds(firstBlock, lastBlock)
+            if isSubchannel:
+                sl = slice(self.subchannelId, self.subchannelId+1)
+                mins, maxs = mins[sl], maxs[sl]
+            elif axes is not None:
+                mins, maxs = mins[axes], maxs[axes]
+                scale, offset = scale[axes], offset[axes]
+            a = mins * scale[:, np.newaxis] + offset[:, np.newaxis]
+            b = maxs * scale[:, np.newaxis] + offset[:, np.newaxis]
+            peak = np.maximum(np.abs(a), np.abs(b)).max(axis=0)
+            candidates = peak >= threshold
+
+        # Read runs of consecutive candidate blocks, in limited chunks
+        padded = np.concatenate(([False], candidates, [False]))
+        edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+        detections = []
+        for runStart, runEnd in zip(edges[::2], edges[1::2]):
+            idx = max(start, firsts[firstBlock + runStart])
+            runEndIdx = min(end, firsts[firstBlock + runEnd - 1]
+                            + counts[firstBlock + runEnd - 1])
+            while idx < runEndIdx:
+                chunkEnd = min(runEndIdx, idx + self.STATS_CHUNK_SIZE)
+                data = self.arraySlice(idx, chunkEnd, display=display)
+                hits = (np.abs(data[rows]) >= threshold).any(axis=0)
+                detections.append(data[0, hits])
+                idx = chunkEnd
+
+        if not detections:
+            return np.empty((0, 2))
+        times = np.concatenate(detections)
+        if len(times) == 0:
+            return np.empty((0, 2))
+
+        # Merge detections into events
+        breaks = np.flatnonzero(np.diff(times) > minGap)
+        events = np.column_stack((times[np.concatenate(([0], breaks + 1))],
+                                  times[np.concatenate((breaks, [-1]))]))
+        events[:, 0] -= preTrigger
+        events[:, 1] += postTrigger
+
+        # Padding can make neighboring events overlap
+        if preTrigger or postTrigger:
+            overlap = events[1:, 0] <= events[:-1, 1]
+            if overlap.any():
+                keep = np.concatenate(([True], ~overlap))
+                ends = np.maximum.reduceat(events[:, 1], np.flatnonzero(keep))
+                events = events[keep]
+                events[:, 1] = ends
+
+        return events
+
+
+    def getPSD(self, startTime=None, endTime=None, **kwargs):
+        """ Compute the power spectral density of each subchannel using
+            Welch's method. Data is processed in batches, so any length of
+            data can be analyzed. See `idelib.spectral.welch()` for the
+            keyword arguments.
+
+            :keyword startTime: The first time (in microseconds by default),
+                `None` to start at the beginning of the session.
+            :keyword endTime: The second time, or `None` to use the end of
+                the session.
+            :return: A tuple containing an array of frequencies (Hz) and an
+                array of power spectral densities (subchannels x
+                frequencies).
+        """
+        return spectral.welch(self, startTime, endTime, **kwargs)
+
+
+    def getBandRMS(self, bands, startTime=None, endTime=None, **kwargs):
+        """ Compute the RMS of each subchannel within one or more frequency
+            bands. See `idelib.spectral.bandRMS()` for the keyword arguments.
+
+            :param bands: A list of frequency bands, each a tuple containing
+                the lower and upper frequencies (Hz, inclusive).
+            :keyword startTime: The first time (in microseconds by default),
+                `None` to start at the beginning of the session.
+            :keyword endTime: The second time, or `None` to use the end of
+                the session.
+            :return: An array of RMS values (subchannels x bands).
+        """
+        return spectral.bandRMS(self, bands, startTime, endTime, **kwargs)
+
+
+    def getSpectrogram(self, startTime=None, endTime=None, **kwargs):
+        """ Compute a spectrogram of each subchannel. See
+            `idelib.spectral.spectrogram()` for the keyword arguments.
+
+            :keyword startTime: The first time (in microseconds by default),
+                `None` to start at the beginning of the session.
+            :keyword endTime: The second time, or `None` to use the end of
+                the session.
+            :return: A tuple containing an array of times (microseconds), an
+                array of frequencies (Hz), and an array of power spectral
+                densities (subchannels x frequencies x times).
+        """
+        return spectral.spectrogram(self, startTime, endTime, **kwargs)
 
 
     def _getBlockSampleTime(self, blockIdx=0):
@@ -2515,16 +3869,100 @@ class EventArray(Transformable):
         return self._getBlockSampleRate(self._getBlockIndexWithIndex(idx))
     
 
+    def getValuesAt(self, times, method='linear', outOfRange=False,
+                    display=False):
+        """ Retrieve the values at a set of specific times. Only the events
+            needed are read and calibrated. Mean removal is not applied.
+
+            :param times: An array (or other sequence) of the times at which
+                to take the samples.
+            :keyword method: How to compute values that fall between events:
+                ``'linear'`` interpolates between the events before and after
+                each time, ``'nearest'`` uses the closest event, and
+                ``'previous'`` uses the event at or immediately before it.
+            :keyword outOfRange: If `False`, times before the first sample
+                or after the last will raise an `IndexError`. If `True`, the
+                first or last value, respectively, is used.
+            :keyword display: If `True`, the `EventArray` transform (i.e. the
+                'display' transform) will be applied to the data.
+            :return: An array of times and values, like those returned by
+                `arraySlice()`. The times are the requested ones.
+        """
+        if method not in ('linear', 'nearest', 'previous'):
+            raise ValueError("Unknown method for getValuesAt(): %r" % method)
+
+        times = np.asarray(times, dtype=np.float64).reshape(-1)
+        length = len(self)
+        if length == 0:
+            raise IndexError("EventArray has no events")
+
+        idx = self._getEventIndicesBefore(times)
+        if not outOfRange and len(times):
+            first, last = self._timesFromIndices([0, length - 1])
+            if times.min() < first:
+                raise IndexError("Specified time occurs before first event (%d)" % first)
+            if times.max() > last:
+                raise IndexError("Specified time occurs after last event (%d)" % last)
+
+        # Indices of the events before and after each time
+        idx0 = np.clip(idx, 0, length - 1)
+        idx1 = np.clip(idx + 1, 0, length - 1)
+        t0 = self._timesFromIndices(idx0)
+        t1 = self._timesFromIndices(idx1)
+
+        if method == 'previous':
+            idx1 = idx0
+        elif method == 'nearest':
+            useNext = np.abs(t1 - times) < np.abs(times - t0)
+            idx0 = np.where(useNext, idx1, idx0)
+            idx1 = idx0
+
+        # Read and calibrate each required event once
+        needed, inverse = np.unique(np.concatenate((idx0, idx1)),
+                                    return_inverse=True)
+        rawData = self._accessColumns(needed)
+
+        if self.useAllTransforms:
+            xform = self._fullXform
+            if display:
+                xform = self._displayXform or xform
+        else:
+            xform = self._comboXform
+
+        neededTimes = self._timesFromIndices(needed)
+        if isinstance(self.parent, SubChannel):
+            values = np.empty((1, len(needed)))
+            xform.polys[self.subchannelId].inplace(rawData, out=values[0], timestamp=neededTimes, noBivariates=self.noBivariates)
+        else:
+            values = np.empty((rawData.shape[0], len(needed)))
+            xform.inplace(rawData, out=values, timestamp=neededTimes, noBivariates=self.noBivariates)
+
+        v0 = values[:, inverse[:len(times)]]
+        v1 = values[:, inverse[len(times):]]
+
+        out = np.empty((len(values) + 1, len(times)))
+        out[0] = times
+        if method == 'linear':
+            span = t1 - t0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                weight = np.where(span > 0, (times - t0) / span, 0.0)
+            weight = np.clip(weight, 0.0, 1.0)
+            out[1:] = v0 + weight * (v1 - v0)
+        else:
+            out[1:] = v0
+
+        return out
+
+
     def getValueAt(self, at, outOfRange=False, display=False):
         """ Retrieve the value at a specific time, interpolating between
-            existing events.
+            existing events. See also `getValuesAt()`.
 
             :param at: The time at which to take the sample.
             :keyword outOfRange: If `False`, times before the first sample
                 or after the last will raise an `IndexError`. If `True`, the
                 first or last time, respectively, is returned.
         """
-        # TODO: Optimize. This creates a bottleneck in the calibration.
         startIdx = self.getEventIndexBefore(at)
         if startIdx < 0:
             first = self.__getitem__(0, display=display)
@@ -2540,17 +3978,8 @@ class EventArray(Transformable):
             if outOfRange:
                 return last
             raise IndexError("Specified time occurs after last event (%d)" % last[0])
-        
-        startEvt = self.__getitem__(startIdx, display=display)
-        endEvt = self.__getitem__(startIdx+1, display=display)
-        relAt = at - startEvt[0]
-        endTime = endEvt[0] - startEvt[0] + 0.0
-        percent = relAt/endTime
-        
-        return (at,) + tuple(
-            v1 + (percent * (v2-v1))
-            for v1, v2 in zip(startEvt[1:], endEvt[1:])
-        )
+
+        return tuple(self.getValuesAt([at], display=display)[:, 0])
 
 
     def getMean(self, startTime=None, endTime=None, display=False, iterator=iter):
@@ -2562,7 +3991,7 @@ class EventArray(Transformable):
             :keyword endTime: The ending time. Defaults to the end.
             :keyword display: If `True`, the final 'display' transform (e.g.
                 unit conversion) will be applied to the results.
-            :return: The event with the minimum value.
+            :return: The mean value.
         """
         if not self.hasMinMeanMax:
             self._computeMinMeanMax()
@@ -2571,19 +4000,93 @@ class EventArray(Transformable):
             if self._mean is not None:
                 return self._mean
 
-        means = self.arrayMinMeanMax(startTime, endTime, times=False,
-                                     display=display, iterator=iterator)
-
-        if means is None:
+        if not self._data:
             return None
 
-        mean = np.mean(np.average(means[1], weights=[d.numSamples for d in self._data], axis=-1))
+        stats = self._getRangeStats(*self.getRangeIndices(startTime, endTime),
+                                    display=display)
+        if stats is not None:
+            mean = np.mean(stats[0])
+        else:
+            # Calibration not linear; use the (calibrated) block means.
+            means = self.arrayMinMeanMax(startTime, endTime, times=False,
+                                         display=display, iterator=iterator)
+
+            if means is None:
+                return None
+
+            startBlock, endBlock = self._getBlockRange(startTime, endTime)
+            weights = self._getBlockTable()[3][startBlock:endBlock]
+            mean = np.mean(np.average(means[1], weights=weights, axis=-1))
 
         if startTime is None and endTime is None:
             self._mean = mean
 
         return mean
-    
+
+
+    def getRMS(self, startTime=None, endTime=None, display=False):
+        """ Get the root mean square of all events, optionally within a
+            specified time range.
+
+            :keyword startTime: The starting time. Defaults to the start.
+            :keyword endTime: The ending time. Defaults to the end.
+            :keyword display: If `True`, the final 'display' transform (e.g.
+                unit conversion) will be applied to the results.
+            :return: The RMS value. For Channels, an array with the RMS of
+                each Subchannel.
+        """
+        return self._getRangeStatistic(startTime, endTime, display, 'rms')
+
+
+    def getStd(self, startTime=None, endTime=None, display=False):
+        """ Get the standard deviation of all events, optionally within a
+            specified time range. This is also the RMS with the mean (DC
+            offset) removed.
+
+            :keyword startTime: The starting time. Defaults to the start.
+            :keyword endTime: The ending time. Defaults to the end.
+            :keyword display: If `True`, the final 'display' transform (e.g.
+                unit conversion) will be applied to the results.
+            :return: The standard deviation. For Channels, an array with the
+                standard deviation of each Subchannel.
+        """
+        return self._getRangeStatistic(startTime, endTime, display, 'std')
+
+
+    def _getRangeStatistic(self, startTime, endTime, display, stat):
+        """ Compute the RMS or standard deviation of a time range. Used
+            internally by `getRMS()` and `getStd()`.
+        """
+        if not self._data:
+            return None
+
+        start, end = self.getRangeIndices(startTime, endTime)
+        if end <= start:
+            return None
+
+        stats = self._getRangeStats(start, end, display)
+        if stats is not None:
+            mean, var = stats
+            if stat == 'rms':
+                result = np.sqrt(var + mean * mean)
+            else:
+                result = np.sqrt(var)
+        else:
+            # Calibration not linear; compute from the calibrated values.
+            # A copy is used, so other threads don't see `removeMean` change.
+            _self = self.copy()
+            _self.removeMean = False
+            vals = _self.arrayValues(start, end, display=display)
+            if stat == 'rms':
+                result = np.sqrt(np.mean(vals * vals, axis=-1))
+            else:
+                result = np.std(vals, axis=-1)
+
+        if isinstance(self.parent, SubChannel):
+            return result[0]
+        return result
+
 
     def getMeanNear(self, t, outOfRange=False):
         """ Retrieve the mean value near a given time.
@@ -2705,8 +4208,8 @@ class EventArray(Transformable):
                 the names of each column.
             :keyword removeMean: Overrides the EventArray's mean removal for the
                 export.
-            :keyword meanSpan: The span of the mean removal for the export. 
-                -1 removes the total mean.
+            :keyword meanSpan: The span of the mean removal for the export,
+                in microseconds. -1 removes the total mean.
             :keyword display: If `True`, export using the EventArray's 'display'
                 transform (e.g. unit conversion).
             :return: Tuple: The number of rows exported and the elapsed time.
@@ -2789,13 +4292,178 @@ class EventArray(Transformable):
 
     def fillCache(self):
         with self.dataset._channelDataLock:
-            self._cacheArray = np.concatenate([d.payload for d in self._data])
-            self._cacheBytes = self._cacheArray.view(np.uint8)
+            self._fillCache()
 
-            idx = 0
+    def _fillCache(self):
+        """ Combine the blocks' decoded data into one contiguous array.
+            Blocks whose data has been released (see `dropCache()`) are
+            decoded again, from the file. The caller must hold the data
+            lock. Used internally.
+        """
+        payloads = [d._payload if d._payload is not None else self._decodePayload(d)
+                    for d in self._data]
+        self._cachePayloads(payloads)
+
+    def _cachePayloads(self, payloads):
+        """ Combine the blocks' decoded data into the contiguous cache
+            array, making each block's data a view of it. The caller must
+            hold the data lock. Used internally.
+
+            :param payloads: The decoded data of each block.
+        """
+        self._cacheArray = np.concatenate(payloads)
+        self._cacheBytes = self._cacheArray.view(np.uint8)
+
+        idx = 0
+        for d, payload in zip(self._data, payloads):
+            d._payload = self._cacheArray[idx:idx + len(payload)]
+            idx += len(payload)
+
+        if self.dataset.columnarCache:
+            self._columns = self._buildColumns(self._cacheArray)
+        else:
+            self._columns = None
+
+    def dropCache(self):
+        """ Release this session's decoded sample data, freeing memory. The
+            data is transparently decoded again (from the file) when next
+            accessed, so the file must remain open. Block summaries (e.g.
+            min/mean/max) and time indices are kept. SubChannel sessions
+            share their parent channel's data, so dropping either drops
+            both.
+
+            :return: `True` if the data was released, `False` if it could
+                not be (i.e. the data is still being imported).
+        """
+        if self._parentList is not None and self._parentList._data is self._data:
+            return self._parentList.dropCache()
+
+        with self._channelDataLock:
+            if self.dataset.loading:
+                return False
             for d in self._data:
-                d._payload = self._cacheArray[idx:idx + len(d._payload)]
-                idx += len(d._payload)
+                d._payload = None
+            self._cacheArray = None
+            self._cacheBytes = None
+            self._columns = None
+        return True
+
+    @property
+    def isCached(self):
+        """ Is this session's decoded data in memory (i.e. it hasn't been
+            released by `dropCache()`)?
+        """
+        if self._parentList is not None and self._parentList._data is self._data:
+            return self._parentList.isCached
+        return self.dataset.loading or self._cacheArray is not None
+
+    def memoryUsage(self, _seen=None):
+        """ Estimate the memory used by this session, in bytes, by
+            category. Memory shared with another session (e.g. a
+            SubChannel's parent) is not included.
+
+            :return: A dictionary containing ``'cache'`` (the contiguous
+                decoded data), ``'columns'`` (the columnar cache, if any),
+                ``'payloads'`` (decoded block data not in the cache, e.g.
+                while importing), ``'minMeanMax'`` (the block summaries),
+                ``'index'`` (time/index lookup tables and cached
+                statistics), ``'blocks'`` (the block objects), ``'elements'``
+                (the blocks' EBML elements), and ``'total'``.
+        """
+        seen = set() if _seen is None else _seen
+        usage = dict.fromkeys(('cache', 'columns', 'payloads', 'minMeanMax',
+                               'index', 'blocks', 'elements'), 0)
+        shared = (self._parentList is not None
+                  and self._parentList._data is self._data)
+
+        if not shared:
+            usage['cache'] = _arrayBytes(self._cacheArray, seen)
+            usage['columns'] = _arrayBytes(self._columns, seen)
+            usage['index'] = (_arrayBytes([self._blockTable,
+                                           self._blockTimesArray,
+                                           self._blockIndicesArray], seen)
+                              + _listBytes(self._blockTimes, seen)
+                              + _listBytes(self._blockIndices, seen)
+                              + _listBytes(self._gaps, seen))
+            for d in self._data:
+                usage['payloads'] += _arrayBytes(d._payload, seen)
+                usage['minMeanMax'] += _arrayBytes(
+                    [getattr(d, 'min', None), getattr(d, 'mean', None),
+                     getattr(d, 'max', None), getattr(d, '_minMeanMax', None)],
+                    seen)
+                usage['blocks'] += (sys.getsizeof(d)
+                                    + sys.getsizeof(getattr(d, '__dict__', None)))
+                for el in (d.element, getattr(d, '_payloadEl', None),
+                           getattr(d, '_minMeanMaxEl', None)):
+                    if el is not None and id(el) not in seen:
+                        seen.add(id(el))
+                        usage['elements'] += sys.getsizeof(el)
+                        value = getattr(el, '_value', None)
+                        if isinstance(value, (bytes, bytearray)):
+                            usage['elements'] += len(value)
+
+        usage['index'] += _arrayBytes([self._blockSums, self._blockExtrema,
+                                       list(self._extremaTables.values()),
+                                       self._mean], seen)
+        usage['total'] = sum(usage.values())
+        return usage
+
+    @staticmethod
+    def _buildColumns(rawData):
+        """ Decode structured raw data into one contiguous, read-only array
+            per subchannel, in native byte order. If all subchannels have the
+            same type, the columns are the rows of a single 2D array.
+
+            :param rawData: A structured array of raw sample data.
+            :return: A 2D array, a list of 1D arrays (if the subchannels'
+                types differ), or `None` if the data isn't structured.
+        """
+        names = rawData.dtype.names
+        if not names:
+            return None
+
+        dtypes = [rawData.dtype[n].newbyteorder('=') for n in names]
+        if all(dt == dtypes[0] for dt in dtypes):
+            columns = np.empty((len(names), len(rawData)), dtype=dtypes[0])
+            for i, n in enumerate(names):
+                columns[i] = rawData[n]
+            columns.setflags(write=False)
+            return columns
+
+        columns = []
+        for n, dt in zip(names, dtypes):
+            col = rawData[n].astype(dt)
+            col.setflags(write=False)
+            columns.append(col)
+        return columns
+
+    def _accessColumns(self, key):
+        """ Access raw data as one row per subchannel (rather than as a
+            structured array), e.g. for transforms. Uses the columnar cache
+            if the dataset has one; otherwise, the data is converted.
+
+            :param key: A `slice` or an array of event indices.
+            :return: For SubChannels, a 1D array. For Channels, a 2D array
+                (subchannels x events).
+        """
+        if isinstance(self.parent, SubChannel):
+            if isinstance(key, slice):
+                return self._accessCache(key.start, key.stop, key.step)
+            return self._accessCache(None, None, 1)[key]
+
+        columns = self._columns
+        if columns is not None and not self.dataset.loading:
+            if self.dataset.stats is not None:
+                self.dataset.stats.cacheHits += 1
+            if isinstance(columns, np.ndarray):
+                return columns[:, key]
+            return np.stack([c[key] for c in columns])
+
+        if isinstance(key, slice):
+            rawData = self._accessCache(key.start, key.stop, key.step)
+        else:
+            rawData = self._accessCache(None, None, 1)[key]
+        return np_recfunctions.structured_to_unstructured(rawData).T
 
     def _accessCache(self, start, end, step):
         """ Access cached data in a thread-safe way.  If data has not fully
@@ -2805,69 +4473,646 @@ class EventArray(Transformable):
 
         if isinstance(self.parent, SubChannel):
             schId = self.subchannelId
-            ch = self.parent.parent
-            rawData = ch.getSession(self.session.sessionId)._accessCache(start, end, step)
+            parentList = self.parent.parent.getSession(self.session.sessionId)
+            columns = parentList._columns
+            if columns is not None and not self.dataset.loading:
+                # Columnar cache: a view, without the structured record's
+                # stride
+                if self.dataset.stats is not None:
+                    self.dataset.stats.cacheHits += 1
+                return columns[schId][start:end:step]
+            rawData = parentList._accessCache(start, end, step)
             schKey = rawData.dtype.names[schId]
             return rawData[schKey]
 
         with self.dataset._channelDataLock:
+            stats = self.dataset.stats
             if self.dataset.loading:
+                if stats is not None:
+                    stats.cacheMisses += 1
                 return np.concatenate([d.payload for d in self._data])[start:end:step]
-            else:
-                return self._cacheArray[start:end:step]
+            elif self._cacheArray is None:
+                # Released by `dropCache()`; decode it again.
+                if stats is not None:
+                    stats.cacheMisses += 1
+                self._fillCache()
+            elif stats is not None:
+                stats.cacheHits += 1
+            return self._cacheArray[start:end:step]
 
     def _inplaceTime(self, start, end, step, out=None):
         """ Generate a series of timestamps between `start` and `end`,
             inserted into an existing array (if provided). If `out`
-            is `None`, a new array is created.
+            is `None`, a new array is created. Times are computed from each
+            event's block, so they are correct across discontinuities.
         """
+        r = range(len(self))[start:end:step]
+        times = self._timesFromIndices(np.arange(r.start, r.stop, r.step,
+                                                 dtype=np.int64))
         if out is None:
-            out = np.empty((int(np.ceil((end - start)/step)),))
+            return times
 
-        if self._singleSample:
-            out[:] = [d.startTime for d in self._data[start:end:step]]
-            return out
+        out[:] = times[:out.shape[0]]
+        return out
+
+    def _inplaceTimeFromIndices(self, indices, out=None):
+        """ Generate the timestamps of a set of events, by index, inserted
+            into an existing array (if provided). If `out` is `None`, a new
+            array is created. Times are computed from each event's block, so
+            they are correct across discontinuities. `indices` may be a view
+            of `out`.
+        """
+        times = self._timesFromIndices(indices)
+        if out is None:
+            return times
+
+        out[:] = times
+        return out
+
+
+#===============================================================================
+#
+#===============================================================================
+
+
+class _SingleSampleData(object):
+    """ The events of a `SingleSampleEventArray`: their times and raw values,
+        kept in arrays instead of a list of data blocks. The arrays have room
+        to grow, and are reallocated (doubling in size) as events are added.
+        A channel's session shares it with its SubChannels' sessions.
+    """
+
+    # The initial number of events for which space is allocated.
+    MIN_SIZE = 64
+
+    def __init__(self, dtype):
+        """ Constructor.
+
+            :param dtype: The type of the raw values (one per event).
+        """
+        self._times = np.empty(0, dtype=np.float64)
+        self._values = np.empty(0, dtype=dtype)
+        self._length = 0
+
+
+    def __getstate__(self):
+        # The unused space isn't pickled.
+        return {'_times': self.times, '_values': self.values,
+                '_length': self._length}
+
+
+    def __len__(self):
+        return self._length
+
+
+    def __eq__(self, other):
+        if other is self:
+            return True
+        elif not isinstance(other, _SingleSampleData):
+            return False
+        return (self._values.dtype == other._values.dtype
+                and np.array_equal(self.times, other.times)
+                and np.array_equal(self.values, other.values))
+
+
+    @property
+    def times(self):
+        """ The time of each event, as an array. """
+        # The length is read first: when the arrays are reallocated, the new
+        # ones are in place before the length is changed.
+        n = self._length
+        return self._times[:n]
+
+
+    @property
+    def values(self):
+        """ The raw value of each event, as a (structured) array. """
+        n = self._length
+        return self._values[:n]
+
+
+    def append(self, t, value):
+        """ Add an event. The caller must hold the data lock.
+
+            :param t: The event's time.
+            :param value: The event's raw value (a single sample).
+        """
+        n = self._length
+        times, values = self._times, self._values
+        if n == len(times):
+            size = max(self.MIN_SIZE, n * 2)
+            times = np.empty(size, dtype=times.dtype)
+            times[:n] = self._times[:n]
+            values = np.empty(size, dtype=values.dtype)
+            values[:n] = self._values[:n]
+
+        times[n] = t
+        values[n] = value
+        self._times, self._values = times, values
+        self._length = n + 1
+
+
+    def trim(self):
+        """ Release the arrays' unused space, e.g. once all the data has
+            been imported. The caller must hold the data lock.
+        """
+        n = self._length
+        if len(self._times) > n:
+            self._times = self._times[:n].copy()
+            self._values = self._values[:n].copy()
+
+
+class SingleSampleEventArray(EventArray):
+    """ An `EventArray` for channels with only one sample per data block,
+        typically slow environmental sensors (e.g. pressure/temperature).
+        The data blocks aren't kept: each block's time and value are added
+        to arrays (see `_SingleSampleData`) as it is appended, so time
+        lookups are binary searches, and each block's min, mean, and max are
+        simply its value. `Channel.getSession()` creates these for channels
+        with the `singleSample` hint.
+
+        Note: `_blockTimes` and `_blockIndices` aren't used.
+    """
+
+    def __init__(self, parentChannel, session=None, parentList=None):
+        """ Constructor. This should almost always be done indirectly via
+            the `getSession()` method of `Channel` and `SubChannel` objects.
+        """
+        super(SingleSampleEventArray, self).__init__(parentChannel, session,
+                                                     parentList)
+        if parentList is None:
+            self._data = _SingleSampleData(self._npType)
+        else:
+            self._data = parentList._data
+
+        # Blocks' min/mean/max are their values, not recorded statistics.
+        self.hasMinMeanMax = False
+
+        # The median of all events' values: (number of events, median)
+        self._median = None
+
+
+    def _getPackedBlocks(self):
+        """ Get the session's data for pickling. There are no blocks to
+            read from the file again; the times and values are pickled.
+            Used internally.
+        """
+        return self._data
+
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._dataReady = Condition()
+
+        if self.dataset._isRestored():
+            self._restore()
+        else:
+            self.dataset.__dict__.setdefault('_unpickled', []).append(self)
+
+
+    def _restore(self):
+        """ Finish unpickling, once the `Dataset` has been restored. Used
+            internally.
+        """
+        self._channelDataLock = self.dataset._channelDataLock
+
+
+    def _addBlock(self, block):
+        """ Add a block's sample to the session's events; the block itself
+            isn't kept. As with `Channel.parseBlock()`, only the first sample
+            of a block is used. Called by `_appendBlock()`, which holds the
+            data lock. Used internally.
+        """
+        payload = self._decodePayload(block)
+        if self._data and self._isGapBefore(block):
+            self._gaps.append(len(self._data))
+        self._data.append(block.startTime, payload[0])
+        self._length += 1
+
+
+    def _isGapBefore(self, block):
+        """ Is there a discontinuity between the last event and a newly
+            appended block? See `EventArray._isGapBefore()`. Used
+            internally.
+        """
+        times = self._data.times
+        if self.parent.sampleRate:
+            period = 1e6 / self.parent.sampleRate
+        else:
+            period = self._estimatePeriod(times[-self.GAP_INTERVALS - 1:])
+
+        if period <= 0:
+            return False
+        return block.startTime - times[-1] > period * (1 + self.GAP_TOLERANCE)
+
+
+    def _getTimes(self):
+        """ Get the time of every event, as an array.
+        """
+        return self._data.times
+
+
+    def _getRawColumns(self, start, end):
+        """ Get the raw values of every subchannel (even for a SubChannel's
+            session) in a range of events, as one row per subchannel. Used
+            internally.
+        """
+        source = self._parentList if isinstance(self.parent, SubChannel) else self
+        return source._accessColumns(slice(start, end))
+
+
+    @property
+    def _firstTime(self):
+        times = self._getTimes()
+        return times[0] if len(times) else None
+
+    @property
+    def _lastTime(self):
+        times = self._getTimes()
+        return times[-1] if len(times) else None
 
-        vals = np.empty((self._data[-1].indexRange[-1],))
 
-        for d in self._data:
-            arrayStart = d.startTime
-            arrayEnd = d.endTime
-            startIdx, endIdx = d.indexRange
-            if d.numSamples > 1:
-                samplePeriod = (arrayEnd - arrayStart)/(d.numSamples - 1)
+    def __len__(self):
+        """ x.__len__() <==> len(x)
+        """
+        return len(self._data)
+
+
+    def _getBlockIndexWithIndex(self, idx, start=0, stop=None):
+        """ Get the index of the block (i.e. the event) with the given event
+            index.
+
+            :param idx: The event index to find.
+            :keyword start: The first block index to search.
+            :keyword stop: The last block index to search.
+        """
+        stop = len(self) if stop is None else stop
+        return max(max(start, 1) - 1, min(idx, stop - 1))
+
+
+    def _getBlockIndexWithTime(self, t, start=0, stop=None):
+        """ Get the index of the event (i.e. block) occurring on or
+            immediately before a time.
+
+            :param t: The time to find.
+            :keyword start: The first index to search.
+            :keyword stop: The last index to search.
+        """
+        times = self._getTimes()
+        idxOffset = max(start, 1)
+        return idxOffset-1 + np.searchsorted(times[idxOffset:stop], t,
+                                             side='right')
+
+
+    def _getBlockTable(self):
+        """ Get the block table (see `EventArray._getBlockTable()`). Each
+            event is a block starting and ending at the event's time.
+
+            :return: A tuple of five arrays, each with one item per event.
+        """
+        if (self._parentList is not None
+                and self._parentList._data is self._data):
+            return self._parentList._getBlockTable()
+
+        times = self._getTimes()
+        numBlocks = len(times)
+        if self._blockTable is None or len(self._blockTable[0]) != numBlocks:
+            self._blockTable = (times, times,
+                                np.arange(numBlocks, dtype=np.int64),
+                                np.ones(numBlocks, dtype=np.int64),
+                                np.zeros(numBlocks))
+        return self._blockTable
+
+
+    def _timesFromIndices(self, indices):
+        """ Get the times of events by index.
+
+            :param indices: An array of event indices.
+            :return: An array of event times.
+        """
+        times = self._getTimes()
+        indices = np.clip(np.asarray(indices, dtype=np.int64), 0,
+                          max(0, len(times) - 1))
+        return times[indices]
+
+
+    def _getEventIndicesBefore(self, times):
+        """ Vectorized version of `getEventIndexBefore()`.
+
+            :param times: An array of times (in microseconds).
+            :return: An array of event indices, -1 for times occurring
+                before the first event.
+        """
+        return np.searchsorted(self._getTimes(), np.asarray(times,
+                               dtype=np.float64), side='right') - 1
+
+
+    def _getBlockBounds(self, startBlock=0, endBlock=None):
+        """ Get the minimum and maximum raw value of each subchannel in a
+            range of blocks, which are the blocks' values. See
+            `EventArray._getBlockBounds()`.
+        """
+        mins, maxs = self._getBlockExtrema()
+        return mins[:, startBlock:endBlock], maxs[:, startBlock:endBlock]
+
+
+    def _getBlockRollingMean_old(self, blockIdx, force=False):
+        """ Get the median value of an event and its neighbors within the
+            rolling mean span (or of all the events, if the span is -1).
+            Note: Values are taken pre-calibration, and all subchannels are
+            returned.
+
+            :param blockIdx: The index of the event (i.e. block).
+            :return: An array containing the median values of each
+                subchannel.
+        """
+        span = self.rollingMeanSpan
+        numEvents = len(self)
+        if not numEvents:
+            return None
+
+        if span == -1:
+            if self._median is None or self._median[0] != numEvents:
+                self._median = (numEvents, np.median(
+                    self._getRawColumns(0, numEvents), axis=1))
+            return self._median[1]
+
+        t = self._getTimes()[blockIdx]
+        firstBlock = self._getBlockIndexWithTime(t - (span/2), stop=blockIdx)
+        lastBlock = self._getBlockIndexWithTime(t + (span/2), start=blockIdx)
+        lastBlock = max(lastBlock+1, firstBlock+1)
+        return np.median(self._getRawColumns(firstBlock, lastBlock), axis=1)
+
+
+    def iterMinMeanMax(self, startTime=None, endTime=None, padding=0,
+                       times=True, display=False):
+        """ Get the minimum, mean, and maximum values for blocks within a
+            specified interval. For single-sample blocks, these are all the
+            block's value.
+
+            :keyword startTime: The first time (in microseconds by default),
+                `None` to start at the beginning of the session.
+            :keyword endTime: The second time, or `None` to use the end of
+                the session.
+            :keyword times: If `True` (default), the results include the
+                block's starting time.
+            :keyword display: If `True`, the final 'display' transform (e.g.
+                unit conversion) will be applied to the results.
+            :return: An iterator producing sets of three events (min, mean,
+                and max, respectively).
+        """
+        warnings.warn(DeprecationWarning('iter methods should be expected to be '
+                                         'removed in future versions of idelib'))
+
+        startBlockIdx, endBlockIdx = self._getBlockRange(startTime, endTime)
+        session = self.session
+        removeMean = self.removeMean and self.allowMeanRemoval
+
+        if self.useAllTransforms:
+            xform = self._fullXform
+            if display:
+                xform = self._displayXform or xform
+        else:
+            xform = self._comboXform
+
+        eventTimes = self._getTimes()
+        values = self._getRawColumns(startBlockIdx, endBlockIdx)
+        for i, blockIdx in enumerate(range(startBlockIdx, endBlockIdx)):
+            t = eventTimes[blockIdx]
+            event = xform(t, values[:, i], session, noBivariates=self.noBivariates)
+            if event is None:
+                event = t, values[:, i]
+            tx, valx = event
+
+            if removeMean:
+                m = self._getBlockRollingMean(blockIdx)
+                mx = xform(t, m, session, noBivariates=self.noBivariates)
+                valx = valx - np.array(m if mx is None else mx[1])
+
+            if self.hasSubchannels:
+                result = tuple(valx)
+            else:
+                result = (valx[self.subchannelId],)
+
+            if times:
+                yield ((tx,) + result,) * 3
             else:
-                samplePeriod = arrayEnd - arrayStart
+                yield (result,) * 3
+
+
+    def arrayMinMeanMax(self, startTime=None, endTime=None, padding=0,
+                        times=True, display=False, iterator=iter):
+        """ Get the minimum, mean, and maximum values for blocks within a
+            specified interval. For single-sample blocks, these are all the
+            block's value.
+
+            :keyword startTime: The first time (in microseconds by default),
+                `None` to start at the beginning of the session.
+            :keyword endTime: The second time, or `None` to use the end of
+                the session.
+            :keyword times: If `True` (default), the results include the
+                block's starting time.
+            :keyword display: If `True`, the final 'display' transform (e.g.
+                unit conversion) will be applied to the results.
+            :return: A structured array of data block statistics (min, mean,
+                and max, respectively).
+        """
+        if not len(self):
+            return None
+
+        startBlock, endBlock = self._getBlockRange(startTime, endTime)
+        if endBlock <= startBlock:
+            logger.warning('Channel contains no data')
+            return None
 
-            # out = samplePeriod*(step*out + start) + arrayStart
-            # out = out*(samplePeriod*step) + (samplePeriod*start + arrayStart)
-            vals[startIdx:endIdx] = np.arange(d.numSamples)
-            vals[startIdx:endIdx] *= samplePeriod
-            vals[startIdx:endIdx] += arrayStart
+        if self.useAllTransforms:
+            xform = self._fullXform
+            if display:
+                xform = self._displayXform or xform
+        else:
+            xform = self._comboXform
 
-        if out.shape == vals[start:end:step].shape:
-            out[:] = vals[start:end:step]
+        values = np.array(self._accessColumns(slice(startBlock, endBlock)),
+                          dtype=np.float64, ndmin=2)
+        if isinstance(self.parent, SubChannel):
+            xform = xform.polys[self.subchannelId]
+            xform.inplace(values[0], out=values[0], noBivariates=self.noBivariates)
         else:
-            out[:] = vals[start:end:step][:out.shape[0]]
+            xform.inplace(values, out=values, noBivariates=self.noBivariates)
 
+        out = np.empty((3, len(values) + int(times), values.shape[1]))
+        if times:
+            out[:, 0] = self._getTimes()[startBlock:endBlock]
+        out[:, int(times):] = values
         return out
 
-    def _inplaceTimeFromIndices(self, indices, out=None):
-        if out is None:
-            out = indices.astype(np.float64)
 
-        out[:] = indices
+    def getEventIndexBefore(self, t):
+        """ Get the index of an event occurring on or immediately before the
+            specified time.
 
-        arrayStart = float(self._data[0].startTime)
-        arrayEnd = float(self._data[-1].endTime)
-        nSamples = len(self)
-        if nSamples > 1:
-            samplePeriod = (arrayEnd - arrayStart) / (nSamples - 1)
+            :param t: The time (in microseconds)
+            :return: The index of the event preceding the given time, -1 if
+                the time occurs before the first event.
+        """
+        times = self._getTimes()
+        if len(times) and t >= times[-1]:
+            # Same as `EventArray.getEventIndexBefore()`
+            return len(times)
+        return int(np.searchsorted(times, t, side='right')) - 1
+
+
+    def getEventIndexNear(self, t):
+        """ The the event occurring closest to a specific time.
+
+            :param t: The time (in microseconds)
+            :return:
+        """
+        times = self._getTimes()
+        if t <= times[0]:
+            return 0
+        if t >= times[-1]:
+            # Same as `EventArray.getEventIndexNear()`
+            return len(times)
+
+        idx = self.getEventIndexBefore(t)
+        return idx + abs(times[idx:idx+2] - t).argmin()
+
+
+    def _getSegmentBounds(self):
+        """ Get the index of the first event after each discontinuity (a
+            gap between events), as found when the data was imported.
+
+            :return: An array of event indices.
+        """
+        return np.array(self._gaps[:], dtype=np.int64)
+
+
+    def _getBlockSampleTime(self, blockIdx=0):
+        """ Get the time between an event and the next (or, for the last
+            event, the previous).
+
+            :keyword blockIdx: The index of the event (i.e. block).
+            :return: The time between samples (microseconds), or -1 if
+                there are fewer than two events.
+        """
+        times = self._getTimes()
+        if len(times) < 2:
+            return -1
+        if blockIdx < 0:
+            blockIdx += len(times)
+        blockIdx = min(blockIdx, len(times) - 2)
+        return times[blockIdx+1] - times[blockIdx]
+
+
+    def _getBlockSampleRate(self, blockIdx=0):
+        """ Get the sample rate, computed from the time between an event and
+            the next (see `_getBlockSampleTime()`).
+
+            :keyword blockIdx: The index of the event (i.e. block).
+            :return: The sample rate, as samples per second (float)
+        """
+        sampTime = self._getBlockSampleTime(blockIdx)
+        if sampTime > 0:
+            return 1000000.0 / sampTime
+        return 0
+
+
+    def _computeMinMeanMax(self):
+        """ Single-sample blocks' min, mean, and max are their values; there
+            is nothing to compute.
+        """
+        pass
+
+
+    def _fillCache(self):
+        """ Release the events' arrays' unused space, and use the values as
+            the cache. The caller must hold the data lock. Used internally.
+        """
+        self._data.trim()
+        self._blockTable = None
+        self._cacheArray = self._data.values
+        self._cacheBytes = self._cacheArray.view(np.uint8)
+        if self.dataset.columnarCache:
+            self._columns = self._buildColumns(self._cacheArray)
         else:
-            samplePeriod = arrayEnd - arrayStart
+            self._columns = None
+
+
+    def dropCache(self):
+        """ Release this session's data. A single-sample session's data is
+            only kept in memory (there are no blocks from which to decode it
+            again), so it is not released.
+
+            :return: `False`
+        """
+        return False
+
+
+    @property
+    def isCached(self):
+        """ Is this session's decoded data in memory? Always `True` for
+            single-sample sessions (see `dropCache()`).
+        """
+        return True
+
+
+    def memoryUsage(self, _seen=None):
+        """ Estimate the memory used by this session, in bytes, by
+            category. See `EventArray.memoryUsage()`. The values are the
+            ``'cache'``, and the times are part of the ``'index'``; there
+            are no blocks.
+        """
+        seen = set() if _seen is None else _seen
+        usage = dict.fromkeys(('cache', 'columns', 'payloads', 'minMeanMax',
+                               'index', 'blocks', 'elements'), 0)
+
+        if self._parentList is None or self._parentList._data is not self._data:
+            usage['cache'] = _arrayBytes(self._data.values, seen)
+            usage['columns'] = _arrayBytes(self._columns, seen)
+            usage['index'] = (_arrayBytes([self._data.times, self._blockTable], seen)
+                              + _listBytes(self._gaps, seen))
+
+        usage['index'] += _arrayBytes([self._blockSums, self._blockExtrema,
+                                       list(self._extremaTables.values()),
+                                       self._mean, self._median], seen)
+        usage['total'] = sum(usage.values())
+        return usage
+
+
+    def _accessCache(self, start, end, step):
+        """ Access the events' raw values in a thread-safe way. SubChannels'
+            sessions get them from their parent channel's session.
+        """
+        if isinstance(self.parent, SubChannel):
+            return super(SingleSampleEventArray, self)._accessCache(start, end, step)
+
+        with self.dataset._channelDataLock:
+            if self.dataset.stats is not None:
+                self.dataset.stats.cacheHits += 1
+            return self._data.values[start:end:step]
 
-        out *= samplePeriod
-        out += arrayStart
+
+    def _inplaceTime(self, start, end, step, out=None):
+        """ Get the times of the events between `start` and `end`,
+            inserted into an existing array (if provided). If `out`
+            is `None`, a new array is created.
+        """
+        times = self._getTimes()[start:end:step]
+        if out is None:
+            return times.copy()
+        out[:] = times[:out.shape[0]]
+        return out
+
+
+    def _inplaceTimeFromIndices(self, indices, out=None):
+        """ Get the times of the events at a set of indices, inserted into an
+            existing array (if provided).
+        """
+        times = self._getTimes()[indices]
+        if out is None:
+            return times
+        out[:] = times
         return out
 
 
@@ -3003,6 +5248,7 @@ class WarningRange(object):
         self.attributes = attributes
         
         self._sessions = {}
+        self._intervals = {}
         try:
             self.source = dataset.channels[channelId][subchannelId]
         except (KeyError, IndexError):
@@ -3014,14 +5260,33 @@ class WarningRange(object):
                            "subchannel: %s.%s" % (wid, channelId, subchannelId))
             self.source = None
         
+        self._buildValid()
+        self._displayName = None
+
+
+    def _buildValid(self):
+        """ Create the function that checks if a value is within range.
+            Used internally.
+        """
+        low, high = self.low, self.high
         if low is None:
             self.valid = lambda x: x < high
         elif high is None:
             self.valid = lambda x: x > low
         else:
             self.valid = lambda x: x > low and x < high
-        
-        self._displayName = None
+
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('valid', None)
+        state['_intervals'] = {}
+        return state
+
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._buildValid()
         
         
     def __eq__(self, other):
@@ -3050,11 +5315,83 @@ class WarningRange(object):
             self._sessions[sessionId] = s
             return s
         
-    
+
+    def _isValid(self, values):
+        """ Vectorized version of `valid()`: get a mask of values that are
+            within the acceptable range.
+        """
+        result = np.ones(np.shape(values), dtype=bool)
+        if self.high is not None:
+            result &= values < self.high
+        if self.low is not None:
+            result &= values > self.low
+        return result
+
+
+    def _getIntervalIndex(self, sessionId=None):
+        """ Get the event times of a session's source, plus the sorted
+            indices of the events starting and ending each out-of-range
+            period. The results are computed once, and only recomputed if the
+            source has grown (i.e. while it is still being imported) or its
+            transforms have changed (e.g. by `updateTransforms()`).
+
+            :return: A tuple of three arrays: event times, the indices of the
+                first invalid events in each period, and the indices of the
+                first valid events following them (the source's length if
+                the period is still open at its end).
+        """
+        source = self.getSessionSource(sessionId)
+        xform = source._fullXform if source.useAllTransforms else source._comboXform
+        key = (len(source), xform, getattr(xform, '_source', None))
+
+        cached = self._intervals.get(sessionId)
+        if cached is not None and cached[0] == key:
+            return cached[1:]
+
+        data = source.arraySlice()
+        times = data[0]
+        invalid = ~self._isValid(data[1])
+
+        # Run-length encode the mask: each change of state (padded with
+        # valid events at both ends) is the start or end of a period.
+        changes = np.flatnonzero(np.diff(np.concatenate(([False], invalid, [False]))))
+        starts = changes[::2]
+        ends = changes[1::2]
+
+        self._intervals[sessionId] = (key, times, starts, ends)
+        return times, starts, ends
+
+
+    def getIntervals(self, sessionId=None):
+        """ Get all the invalid periods in a session, as computed for use by
+            `getRange()`.
+
+            :return: A 2D array of invalid periods' start and end times. The
+                end time is that of the first valid event after the period,
+                or -1 if the period continues to the end of the session.
+        """
+        if self.source is None:
+            return np.zeros((0, 2))
+
+        times, starts, ends = self._getIntervalIndex(sessionId)
+        result = np.empty((len(starts), 2), dtype=np.float64)
+        result[:, 0] = times[starts]
+        result[:, 1] = times[np.minimum(ends, len(times) - 1)]
+        result[ends >= len(times), 1] = -1
+        return result
+
+
     def getRange(self, start=None, end=None, sessionId=None, iterator=iter):
         """ Retrieve the invalid periods within a given range of events.
-            
-            :return: A list of invalid periods' [start, end] times.
+
+            :keyword start: The start of the range, `None` to use the start
+                of the session.
+            :keyword end: The end of the range, `None` to use the end of the
+                session.
+            :keyword sessionId: The session to check; `None` for the last.
+            :keyword iterator: Unused; retained for compatibility.
+            :return: A list of invalid periods' [start, end] times. The end
+                time of a period continuing past the end of the range is -1.
         """
         if self.source is None:
             return []
@@ -3070,27 +5407,32 @@ class WarningRange(object):
         v = self.getValueAt(start, source=source)
         if v is None:
             return result
-        
-        outOfRange =  v[-1] is not True
 
-        if outOfRange:
-            result = [[start, start]]
-        
-        for event in iterator(source.iterRange(start, end)):
-            t = event[0]
-            if self.valid(event[1:]):
-                if outOfRange:
-                    result[-1][1] = t
-                    outOfRange = False
-            else:
-                if not outOfRange:
-                    result.append([t, t])
-                    outOfRange = True
-        
-        # Close out any open invalid range
-        if outOfRange:
-            result[-1][1] = -1  # end
-        
+        times, starts, ends = self._getIntervalIndex(sessionId)
+        i0, i1 = source.getRangeIndices(start, end)
+
+        # The periods overlapping the range, from the interval index. The
+        # state at `start` is determined by interpolation, not by the event
+        # before it, so the first period is handled separately.
+        first = np.searchsorted(ends, i0, side='right')
+        last = np.searchsorted(starts, i1, side='left')
+        periods = list(zip(starts[first:last], ends[first:last]))
+
+        if periods and periods[0][0] <= i0:
+            # A period already in progress at the first event in the range
+            startIdx, endIdx = periods.pop(0)
+            result.append([times[i0] if v[-1] else start, endIdx])
+        elif not v[-1]:
+            # Out of range at the start, but valid at the first event
+            result.append([start, i0])
+
+        result.extend([times[a], b] for a, b in periods)
+
+        # Convert end indices to times; -1 for periods continuing past the
+        # end of the range.
+        for r in result:
+            r[1] = times[r[1]] if r[1] < i1 else -1
+
         return result
     
     
@@ -0,0 +1,529 @@
+"""
+Derived (virtual) channels: channels whose data is computed from other
+channels' data by a vectorized function, e.g. the resultant magnitude of
+acceleration, tilt angles, or the difference between two sensors::
+
+    accel = doc.channels[8]
+    resultant = doc.addDerivedChannel(
+        [accel], lambda xyz: np.sqrt((xyz ** 2).sum(axis=0)),
+        name="Resultant Acceleration", units=('Acceleration', 'g'))
+    resultant[0].getSession().arrayMinMeanMax()
+
+A derived channel's sessions are `EventArray` objects, and can be used
+like those of any other channel. The function is given the calibrated
+values of each source (a 1D array for a `SubChannel`, a 2D array of
+subchannels x events for a `Channel`), and returns one row of values for
+each of the derived channel's subchannels.
+
+Values are computed lazily, a chunk of blocks at a time, only for the
+blocks that are accessed. Computed values are kept and combined into a
+contiguous cache like decoded sample data (see `EventArray.dropCache()`).
+The derived channel has the same events as its first source. Sources with
+different event times (e.g. other sensors) are interpolated at those times.
+
+Derived values are not updated when a source's transforms change; call the
+derived channel's (or the `Dataset`'s) `updateTransforms()` to recompute
+them.
+"""
+
+from threading import Condition, Lock
+
+import numpy as np
+
+from .dataset import Channel, EventArray, SingleSampleEventArray, SubChannel
+from .parsers import BaseDataBlock
+
+__all__ = ['DerivedChannel', 'DerivedEventArray']
+
+# ==============================================================================
+#
+# ==============================================================================
+
+
+class DerivedParser(object):
+    """ A stand-in for a channel data parser, describing the data produced
+        by a `DerivedChannel`: one 64-bit float per subchannel.
+    """
+    format = None
+
+    def __init__(self, numSubchannels):
+        self.types = (float,) * numSubchannels
+        self.ranges = ((-1.0, 1.0),) * numSubchannels
+        self.dtype = np.dtype([(str(i), np.float64) for i in range(numSubchannels)])
+
+
+    def __eq__(self, other):
+        return isinstance(other, DerivedParser) and self.dtype == other.dtype
+
+
+class DerivedBlock(BaseDataBlock):
+    """ The derived counterpart of a source data block: same times and
+        event indices, with the derived values computed on demand.
+    """
+
+    def __init__(self, blockIndex, startTime, endTime, firstIndex, numSamples):
+        super(DerivedBlock, self).__init__(None)
+        self.blockIndex = blockIndex
+        self.startTime = startTime
+        self.endTime = endTime
+        self.numSamples = numSamples
+        self.indexRange = (firstIndex, firstIndex + numSamples)
+        self._payload = None
+
+
+    def __repr__(self):
+        return "<%s %d>" % (self.__class__.__name__, self.blockIndex)
+
+
+    @property
+    def payload(self):
+        return self._payload
+
+
+# ==============================================================================
+#
+# ==============================================================================
+
+
+class DerivedChannel(Channel):
+    """ A channel whose data is computed from other channels' data. Create
+        with `Dataset.addDerivedChannel()`.
+
+        :ivar sources: The `Channel` and/or `SubChannel` objects providing
+            the function's arguments. The derived channel has the same
+            events as the first.
+        :ivar function: The vectorized function computing the derived data.
+    """
+
+    def __init__(self, dataset, channelId, sources, function, name=None,
+                 names=None, units=None):
+        """ Constructor. This should generally be done indirectly via
+            `Dataset.addDerivedChannel()`.
+
+            :param dataset: The parent `Dataset`.
+            :param channelId: The channel's ID, unique within the dataset.
+            :param sources: A list of `Channel` and/or `SubChannel` objects,
+                the data of which are the function's arguments.
+            :param function: A vectorized function, taking one array of
+                calibrated values per source (1D for a `SubChannel`, 2D for
+                a `Channel`) and returning an array of values (1D), or one
+                row of values per subchannel (2D).
+            :keyword name: A custom name for this channel.
+            :keyword names: Names for each of the channel's subchannels.
+            :keyword units: A tuple containing the 'axis name' and unit
+                symbol (e.g. ``('Acceleration', 'g')``), or a list of them
+                (one per subchannel).
+        """
+        sources = list(sources)
+        if not sources:
+            raise ValueError("Derived channel requires at least one source")
+        for source in sources:
+            if not isinstance(source, Channel):
+                raise TypeError("Derived channel sources must be Channels "
+                                "or SubChannels, not %r" % source)
+            if source.dataset is not dataset:
+                raise ValueError("Derived channel source %r is from another "
+                                 "Dataset" % source)
+
+        self.sources = sources
+        self.function = function
+
+        numSubchannels = self._getNumSubchannels()
+        if names is not None and len(names) != numSubchannels:
+            raise ValueError("Derived channel function produces %d "
+                             "subchannels, but %d names were given" %
+                             (numSubchannels, len(names)))
+        if units is None or isinstance(units[0], str):
+            units = [units or ('', '')] * numSubchannels
+
+        if name is None:
+            name = "Derived:%02d" % channelId
+
+        super(DerivedChannel, self).__init__(
+            dataset, channelId, parser=DerivedParser(numSubchannels),
+            name=name, units=units[0], sampleRate=sources[0].sampleRate)
+
+        self.allowMeanRemoval = all(s.allowMeanRemoval for s in sources)
+
+        for i in range(numSubchannels):
+            if names is None and numSubchannels == 1:
+                subName = self.name
+            else:
+                subName = None if names is None else names[i]
+            self.addSubChannel(i, name=subName, units=units[i])
+
+
+    def _getNumSubchannels(self):
+        """ Determine the number of subchannels produced by the function,
+            by calling it with placeholder data.
+        """
+        args = []
+        for source in self.sources:
+            if isinstance(source, SubChannel):
+                args.append(np.zeros(2))
+            else:
+                args.append(np.zeros((len(source.subchannels), 2)))
+
+        with np.errstate(all='ignore'):
+            result = np.asarray(self.function(*args), dtype=np.float64)
+
+        if result.ndim < 2:
+            return 1
+        return result.shape[0]
+
+
+    def getSession(self, sessionId=None):
+        """ Retrieve derived data for a Session.
+
+            :keyword sessionId: The ID of the session to retrieve.
+            :return: The derived data.
+            :rtype: `DerivedEventArray`
+        """
+        self._updateXformIds()
+        if sessionId is None:
+            session = self.dataset.lastSession
+            sessionId = session.sessionId
+        if sessionId is None or not self.dataset.hasSession(sessionId):
+            raise KeyError("Dataset has no Session id=%r" % sessionId)
+
+        if sessionId in self.sessions:
+            return self.sessions[sessionId]
+
+        reference = self.sources[0].getSession(sessionId)
+        self.singleSample = reference._singleSample
+        if isinstance(reference, SingleSampleEventArray):
+            cls = DerivedSingleSampleEventArray
+        else:
+            cls = DerivedEventArray
+        session = self.dataset.sessions[sessionId]
+        return self.sessions.setdefault(sessionId, cls(self, session))
+
+
+    def updateTransforms(self):
+        """ Recompute cached transform functions, and discard the derived
+            data (the sources' transforms may have changed).
+        """
+        super(DerivedChannel, self).updateTransforms()
+        for ea in self.sessions.values():
+            ea._reset()
+
+
+# ==============================================================================
+#
+# ==============================================================================
+
+
+class DerivedEventArray(EventArray):
+    """ The data of a `DerivedChannel` (or one of its subchannels) in a
+        session. Its blocks correspond to those of the first source; their
+        values are computed when first accessed.
+    """
+
+    def __init__(self, parentChannel, session=None, parentList=None):
+        """ Constructor. This should almost always be done indirectly via
+            the `getSession()` method of `DerivedChannel` and its
+            `SubChannel` objects.
+        """
+        # The session that computes and caches the data, shared by the
+        # subchannels' sessions (and copies).
+        self._root = self if parentList is None else parentList._root
+
+        super(DerivedEventArray, self).__init__(parentChannel, session, parentList)
+
+        if self._root is self:
+            sessionId = None if session is None else session.sessionId
+            self._sources = [s.getSession(sessionId) for s in parentChannel.sources]
+            self._reference = self._sources[0]
+            self._blockTimes = self._reference._blockTimes
+            self._blockIndices = self._reference._blockIndices
+            self._gaps = self._reference._gaps
+            self._syncLock = Lock()
+            self._numComputed = 0
+        else:
+            self._reference = self._root._reference
+
+        # Blocks become available as the first source's do.
+        self._dataReady = self._reference._dataReady
+
+
+    def __getstate__(self):
+        # Computed data isn't pickled; it is computed again when accessed.
+        state = self.__dict__.copy()
+        state.update(_blocks=[], _cacheArray=None, _cacheBytes=None,
+                     _columns=None, _channelDataLock=None, _dataReady=None,
+                     _blockTable=None,
+                     _blockSums=None, _blockExtrema=None, _extremaTables={},
+                     _numComputed=0)
+        state.pop('_syncLock', None)
+        return state
+
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._dataReady = Condition()
+        if self._root is self:
+            self._syncLock = Lock()
+
+
+    @property
+    def _data(self):
+        """ The session's blocks, one for each of the first source's. """
+        blocks = self._blocks
+        if len(blocks) < len(self._reference._data):
+            # Made from the source's block table, since the source doesn't
+            # necessarily keep its blocks (see `SingleSampleEventArray`).
+            table = self._reference._getBlockTable()[:4]
+            with self._root._syncLock:
+                first = len(blocks)
+                rows = zip(*(a[first:].tolist() for a in table))
+                blocks.extend(DerivedBlock(first + i, *row)
+                              for i, row in enumerate(rows))
+        return blocks
+
+
+    @_data.setter
+    def _data(self, blocks):
+        self._blocks = blocks
+
+
+    def _reset(self):
+        """ Discard the computed data and statistics. Used internally.
+        """
+        if self._root is self:
+            with self.dataset._channelDataLock:
+                for d in self._blocks:
+                    d._payload = d.min = d.mean = d.max = None
+                    d._rollingMean = None
+                self._cacheArray = self._cacheBytes = self._columns = None
+                self._numComputed = 0
+        self._blockSums = self._blockExtrema = self._mean = None
+        self._extremaTables = {}
+
+
+    def _computeValues(self, start, end):
+        """ Compute the derived values of a range of events.
+
+            :param start: The first event index.
+            :param end: The last event index (exclusive).
+            :return: A 2D array of values (subchannels x events).
+        """
+        times = None
+        args = []
+        for source in self._sources:
+            if source._blockTimes is self._reference._blockTimes:
+                values = source._calibratedSlice(start, end, 1)[1:]
+            else:
+                # Different events (e.g. another sensor): interpolate.
+                if times is None:
+                    times = self._reference._timesFromIndices(
+                        np.arange(start, end, dtype=np.int64))
+                values = source.getValuesAt(times, outOfRange=True)[1:]
+            args.append(values[0] if isinstance(source.parent, SubChannel) else values)
+
+        result = np.asarray(self.parent.function(*args), dtype=np.float64)
+        shape = (len(self._npType), end - start)
+        if result.ndim < 2:
+            result = result.reshape(1, -1)
+        if result.shape != shape:
+            result = np.broadcast_to(result, shape)
+        return result
+
+
+    def _compute(self, startBlock, endBlock):
+        """ Get the data of a range of blocks, computing it for those that
+            haven't been computed. Consecutive blocks are computed together,
+            in chunks of up to `STATS_CHUNK_SIZE` events. Used internally.
+
+            :param startBlock: The index of the first block.
+            :param endBlock: The index of the last block (exclusive).
+            :return: A list of each block's data (structured arrays).
+        """
+        blocks = self._data[startBlock:endBlock]
+        _starts, _ends, firsts, counts, _periods = self._getBlockTable()
+        firsts = firsts[startBlock:endBlock]
+        counts = counts[startBlock:endBlock]
+        names = self._npType.names
+
+        payloads = [d._payload for d in blocks]
+        i = 0
+        while i < len(blocks):
+            if payloads[i] is not None:
+                i += 1
+                continue
+
+            j = i + 1
+            limit = firsts[i] + self.STATS_CHUNK_SIZE
+            while (j < len(blocks) and payloads[j] is None
+                   and firsts[j] + counts[j] <= limit):
+                j += 1
+
+            start = firsts[i]
+            values = self._computeValues(start, firsts[j-1] + counts[j-1])
+            data = np.empty(values.shape[1], dtype=self._npType)
+            for n, row in zip(names, values):
+                data[n] = row
+
+            offsets = firsts[i:j] - start
+            mins = np.minimum.reduceat(values, offsets, axis=1)
+            maxs = np.maximum.reduceat(values, offsets, axis=1)
+            means = np.add.reduceat(values, offsets, axis=1) / counts[i:j]
+
+            with self.dataset._channelDataLock:
+                for k in range(i, j):
+                    d = blocks[k]
+                    payloads[k] = data[firsts[k] - start:firsts[k] - start + counts[k]]
+                    if d._payload is None:
+                        self._numComputed += 1
+                    d._payload = payloads[k]
+                    d.min, d.mean, d.max = mins[:, k-i], means[:, k-i], maxs[:, k-i]
+            i = j
+
+        return payloads
+
+
+    def _computeStats(self, startBlock=0, endBlock=None):
+        """ Compute the min/mean/max of blocks that don't have them. Used
+            internally.
+        """
+        root = self._root
+        blocks = root._data
+        endBlock = len(blocks) if endBlock is None else endBlock
+        missing = [i for i in range(startBlock, endBlock) if blocks[i].mean is None]
+        if missing:
+            root._compute(missing[0], missing[-1] + 1)
+
+
+    def _accessCache(self, start, end, step):
+        """ Access the derived data, computing it if it hasn't been. Once
+            all of the data has been computed, it is combined into one
+            contiguous cache (like decoded data; see `dropCache()`).
+        """
+        if isinstance(self.parent, SubChannel):
+            # Gets the data from the parent channel's session.
+            return super(DerivedEventArray, self)._accessCache(start, end, step)
+        elif self._root is not self:
+            return self._root._accessCache(start, end, step)
+
+        stats = self.dataset.stats
+        cache = self._cacheArray
+        if cache is not None:
+            if stats is not None:
+                stats.cacheHits += 1
+            return cache[start:end:step]
+
+        if stats is not None:
+            stats.cacheMisses += 1
+
+        indices = range(len(self))[start:end:step]
+        if not indices:
+            return np.empty(0, dtype=self._npType)
+
+        # The blocks containing the requested events
+        _starts, _ends, firsts, _counts, _periods = self._getBlockTable()
+        first = min(indices[0], indices[-1])
+        last = max(indices[0], indices[-1])
+        startBlock = int(np.searchsorted(firsts, first, side='right')) - 1
+        endBlock = int(np.searchsorted(firsts, last, side='right'))
+        payloads = self._compute(startBlock, endBlock)
+
+        if self._numComputed >= len(self._blocks) and not self.dataset.loading:
+            self.fillCache()
+
+        data = np.concatenate(payloads)
+        return data[indices.start - firsts[startBlock]::indices.step][:len(indices)]
+
+
+    def fillCache(self):
+        """ Compute all of the derived data, and combine it into one
+            contiguous cache.
+        """
+        if self._root is not self:
+            return self._root.fillCache()
+
+        # Computing takes the data lock (as does reading the sources).
+        payloads = self._compute(0, len(self._data))
+        with self.dataset._channelDataLock:
+            if payloads:
+                self._cachePayloads(payloads)
+
+
+    def dropCache(self):
+        """ Release this session's derived data, freeing memory. The data
+            is computed again when next accessed. Block summaries (e.g.
+            min/mean/max) are kept. SubChannel sessions share their parent
+            channel's data, so dropping either drops both.
+
+            :return: `True` (derived data can always be released).
+        """
+        if self._root is not self:
+            return self._root.dropCache()
+
+        with self.dataset._channelDataLock:
+            for d in self._blocks:
+                d._payload = None
+            self._cacheArray = None
+            self._cacheBytes = None
+            self._columns = None
+            self._numComputed = 0
+        return True
+
+
+    @property
+    def isCached(self):
+        """ Has all of this session's derived data been computed and cached
+            (and not released by `dropCache()`)?
+        """
+        return self._root._cacheArray is not None
+
+
+    def arrayMinMeanMax(self, startTime=None, endTime=None, padding=0,
+                        times=True, display=False, iterator=iter):
+        if self._data:
+            self._computeStats(*self._getBlockRange(startTime, endTime))
+        return super(DerivedEventArray, self).arrayMinMeanMax(
+            startTime, endTime, padding, times, display, iterator)
+
+    arrayMinMeanMax.__doc__ = EventArray.arrayMinMeanMax.__doc__
+
+
+    def iterMinMeanMax(self, startTime=None, endTime=None, padding=0,
+                       times=True, display=False):
+        if self._data:
+            self._computeStats(*self._getBlockRange(startTime, endTime))
+        return super(DerivedEventArray, self).iterMinMeanMax(
+            startTime, endTime, padding, times, display)
+
+    iterMinMeanMax.__doc__ = EventArray.iterMinMeanMax.__doc__
+
+
+    def _getBlockRollingMean_old(self, blockIdx, force=False):
+        # Rolling means use the means of (potentially) every block.
+        self._computeStats()
+        return super(DerivedEventArray, self)._getBlockRollingMean_old(blockIdx, force)
+
+
+class DerivedSingleSampleEventArray(DerivedEventArray, SingleSampleEventArray):
+    """ A `DerivedEventArray` for derived channels whose first source has
+        only one sample per data block. Its events' times are the source's;
+        the derived values are kept in blocks, like other derived data.
+    """
+
+    def __init__(self, parentChannel, session=None, parentList=None):
+        super(DerivedSingleSampleEventArray, self).__init__(parentChannel,
+                                                            session, parentList)
+        if parentList is None:
+            self._data = []
+
+
+    def _getTimes(self):
+        """ Get the time of every event, as an array.
+        """
+        return self._reference._getTimes()
+
+
+    def _reset(self):
+        super(DerivedSingleSampleEventArray, self)._reset()
+        self._median = None
+
+
+    memoryUsage = EventArray.memoryUsage
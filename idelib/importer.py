@@ -4,17 +4,15 @@
 
 from collections import Counter
 from datetime import datetime
+from functools import lru_cache
 import os.path
 import sys
+import threading
 from time import time as time_time
 from time import sleep
 import warnings
 
 import struct
-try:
-    import tqdm.auto
-except ModuleNotFoundError:
-    tqdm = None
 
 from . import transforms
 from .dataset import Dataset
@@ -29,7 +27,6 @@ from . import parsers
 
 import logging
 logger = logging.getLogger('idelib')
-logging.basicConfig(format="%(asctime)s %(levelname)s: %(message)s")
 
 
 #===============================================================================
@@ -163,6 +160,24 @@ def createDefaultSensors(doc, defaults=None):
 ELEMENT_PARSER_TYPES = parsers.getElementHandlers()
 
 
+@lru_cache(maxsize=None)
+def _getElementTable(parserTypes):
+    """ Get the names of the elements handled by each element parser type.
+        The results are cached for the life of the process, since the same
+        parser types are used for every file.
+
+        :param parserTypes: A tuple of `parsers.ElementHandler` classes.
+        :return: A tuple of (parser type, element names) tuples.
+    """
+    table = []
+    for t in parserTypes:
+        if isinstance(t.elementName, str):
+            table.append((t, (t.elementName,)))
+        else:
+            table.append((t, tuple(t.elementName)))
+    return tuple(table)
+
+
 def instantiateParsers(doc, parserTypes=None):
     """ Create a dictionary of element parser objects keyed by the name of the
         element they handle. Handlers that handle multiple elements have
@@ -170,13 +185,10 @@ def instantiateParsers(doc, parserTypes=None):
     """
     parserTypes = parserTypes or ELEMENT_PARSER_TYPES
     elementParsers = {}
-    for t in parserTypes:
+    for t, names in _getElementTable(tuple(parserTypes)):
         p = t(doc)
-        if isinstance(t.elementName, str):
-            elementParsers[t.elementName] = p
-        else:
-            for name in t.elementName:
-                elementParsers[name] = p
+        for name in names:
+            elementParsers[name] = p
     return elementParsers
 
 
@@ -242,48 +254,56 @@ class SimpleUpdater(object):
             sys.stdout.flush()
 
 
-if tqdm is not None:
-    class TQDMUpdater:
+class TQDMUpdater:
+    """ A progress updater that displays a `tqdm` progress bar. `tqdm` is
+        imported when the first `TQDMUpdater` is created, since it can be
+        slow to import (e.g. `tqdm.auto` may import IPython). If `tqdm` is
+        not installed, `nullUpdater` is returned instead.
+    """
 
-        paused = False
-        cancelled = False
+    paused = False
+    cancelled = False
 
-        _size = 100
+    _size = 100
 
-        def __init__(self, fileLength=None):
-            self.fileLength = fileLength
-            pbarKwargs = {
-                # 'ncols': 150,
-                'unit_scale': 1,
-                }
-            if fileLength is None:
-                self.pbar = tqdm.auto.tqdm(total=self._size, unit='%', **pbarKwargs)
-            else:
-                self.pbar = tqdm.auto.tqdm(total=fileLength, unit='B', **pbarKwargs)
-            self._lastUpdate = 0
+    def __new__(cls, fileLength=None):
+        try:
+            import tqdm.auto  # noqa: F401
+        except ModuleNotFoundError:
+            warnings.warn('TQDM was not imported properly')
+            return nullUpdater
+        return super().__new__(cls)
 
-        def __call__(self, percent=0, done=False, **kwargs):
-            if done:
-                self.pbar.update(self.pbar.total - self.pbar.n)
-                return
+    def __init__(self, fileLength=None):
+        import tqdm.auto
 
-            if self.fileLength is None:
-                self.pbar.update(int(percent*self._size) - self._lastUpdate)
-                self._lastUpdate = int(percent*self._size)
-            else:
-                filepos = kwargs.get('filepos', 1)
-                self.pbar.update(filepos - self._lastUpdate)
-                self._lastUpdate = kwargs.get('filepos')
+        self.fileLength = fileLength
+        pbarKwargs = {
+            # 'ncols': 150,
+            'unit_scale': 1,
+            }
+        if fileLength is None:
+            self.pbar = tqdm.auto.tqdm(total=self._size, unit='%', **pbarKwargs)
+        else:
+            self.pbar = tqdm.auto.tqdm(total=fileLength, unit='B', **pbarKwargs)
+        self._lastUpdate = 0
 
-        def __del__(self):
-            self.pbar.close()
+    def __call__(self, percent=0, done=False, **kwargs):
+        if done:
+            self.pbar.update(self.pbar.total - self.pbar.n)
+            return
 
+        if self.fileLength is None:
+            self.pbar.update(int(percent*self._size) - self._lastUpdate)
+            self._lastUpdate = int(percent*self._size)
+        else:
+            filepos = kwargs.get('filepos', 1)
+            self.pbar.update(filepos - self._lastUpdate)
+            self._lastUpdate = kwargs.get('filepos')
+
+    def __del__(self):
+        self.pbar.close()
 
-else:
-    def TQDMUpdater():
-        warnings.warn('TQDM was not imported properly')
-        return nullUpdater()
-    
 
 #===============================================================================
 #
@@ -317,7 +337,7 @@ def _getSize(stream):
 
 def importFile(filename='', startTime=None, endTime=None, channels=None,
                updater=None, parserTypes=None, defaults=None, name=None,
-               quiet=False, **kwargs):
+               quiet=False, columnar=False, **kwargs):
     """ Create a new Dataset object and import the data from a MIDE file. 
         Primarily for testing purposes. The GUI does the file creation and 
         data loading in two discrete steps, as it will need a reference to 
@@ -339,7 +359,7 @@ def importFile(filename='', startTime=None, endTime=None, channels=None,
     doc = openFile(stream, updater=updater, name=name, parserTypes=parserTypes,
                    defaults=defaults, quiet=quiet)
     readData(doc, startTime=startTime, endTime=endTime, channels=channels,
-             updater=updater, parserTypes=parserTypes)
+             updater=updater, parserTypes=parserTypes, columnar=columnar)
     return doc
 
 
@@ -417,6 +437,124 @@ def openFile(stream, updater=None, parserTypes=None, defaults=None, name=None,
     return doc
 
 
+class _TimeFilter(object):
+    """ The per-channel bookkeeping used to select the `ChannelDataBlock`
+        elements within an interval. Used by `filterTime()`, and by
+        `util.splitTime()` to filter several intervals in one pass.
+    """
+
+    def __init__(self, startTime=0, endTime=None, channels=None):
+        """ Constructor.
+
+            :param startTime: The start of the extraction range, relative to
+                the recording's start.
+            :param endTime: The end of the extraction range, relative to the
+                recording's end.
+            :param channels: A list of channel IDs to process. If `None` (the
+                default), all channels are processed.
+        """
+        if startTime == endTime and startTime is not None:
+            raise ValueError('startTime and endTime must differ')
+
+        self.startTime, self.endTime = sorted((startTime or 0,
+                                               endTime or float('infinity')))
+        self.channels = channels
+
+        # Dictionaries (and similar) for tracking progress of each
+        # ChannelDataBlock element handled. All keyed by channel ID.
+        self.lastBlocks = {}  # Previous element w/ its start and end times
+        self.channelsWritten = Counter()  # Number of elements extracted per channel
+        self.finished = {}  # Channels that have completed extraction
+
+
+    def filterBlock(self, el, chId, blockStart, blockEnd):
+        """ Determine which blocks to extract upon reaching a new
+            `ChannelDataBlock`.
+
+            :param el: The `ChannelDataBlock` element.
+            :param chId: The block's channel ID.
+            :param blockStart: The block's start time (microseconds).
+            :param blockEnd: The block's end time (microseconds).
+            :return: A list of elements to extract: empty, the current
+                block, or the channel's previous block and the current one.
+        """
+        if self.finished.setdefault(chId, False):
+            return []
+
+        if self.channels and chId not in self.channels:
+            return []
+
+        writeCurrent = True
+        writePrev = False  # write previous block, if current one starts late
+
+        if blockEnd < self.startTime:
+            # Entirely before extraction interval. Yield nothing.
+            writeCurrent = False
+        elif blockStart <= self.startTime:
+            # Block overlaps start of interval. Yield block.
+            # Mark channel finished if block also includes end of interval.
+            writePrev = False
+            self.finished[chId] = blockEnd >= self.endTime
+        elif blockEnd <= self.endTime:
+            # Block within interval. Write block (w/ prev. if needed).
+            writePrev = self.channelsWritten[chId] == 0
+        else:
+            # Block overlaps end of interval. Yield block (w/ prev. if needed).
+            # Mark channel finished.
+            self.finished[chId] = True
+            writePrev = self.channelsWritten[chId] == 0
+
+        result = []
+        if writePrev:
+            # Yield the previous block, which is before the extraction interval.
+            # This is to ensure that initial data is not left out.
+            prev = self.lastBlocks.get(chId, None)
+            if prev:
+                self.channelsWritten[chId] += 1
+                result.append(prev[0])
+
+        self.lastBlocks[chId] = (el, blockStart, blockEnd)
+
+        if writeCurrent:
+            self.channelsWritten[chId] += 1
+            result.append(el)
+
+        return result
+
+
+def _getBlockTimes(el, timeScalars):
+    """ Get the channel ID, start time and end time of a `ChannelDataBlock`
+        element, for use with `_TimeFilter`. Problems are logged.
+
+        :param el: The `ChannelDataBlock` element.
+        :param timeScalars: A dictionary of channel time scalars.
+        :return: The channel ID and the block's start and end times, or
+            `None` if the block is missing any of them.
+    """
+    # Get ChannelIDRef, StartTimeCodeAbs, and EndTimeCodeAbs;
+    # usually the 1st three, in order, but don't assume!
+    chId = blockStart = blockEnd = None
+    for subEl in el:
+        if subEl.name == "ChannelIDRef":
+            chId = subEl.value
+        elif subEl.name == "StartTimeCodeAbs":
+            blockStart = subEl.value
+        elif subEl.name == "EndTimeCodeAbs":
+            blockEnd = subEl.value
+
+    blockEnd = blockEnd or blockStart
+    if chId is None:
+        logger.warning("Extractor: {} missing <ChannelIDRef> subelement, skipping.".format(el))
+        return None
+    if blockStart is None:
+        logger.warning("Extractor: {} missing <StartTimeCodeAbs> subelement, skipping.".format(el))
+        return None
+
+    # TODO: Modulus correction, if still needed.
+    scalar = timeScalars.get(chId, 1)
+    return chId, blockStart * scalar, blockEnd * scalar
+
+
 def filterTime(doc, startTime=0, endTime=None, channels=None):
     """ Efficiently read data within a certain interval from an IDE file.
         Note that due to the way data is stored in an IDE, the exported
@@ -434,90 +572,22 @@ def filterTime(doc, startTime=0, endTime=None, channels=None):
             `ChannelDataBlock`s outside of the specified time range, or
             `None`.
     """
-    if startTime == endTime and startTime is not None:
-        raise ValueError('startTime and endTime must differ')
-
-    startTime, endTime = sorted((startTime or 0,
-                                 endTime or float('infinity')))
-
-    # Dictionaries (and similar) for tracking progress of each ChannelDataBlock
-    # element handled. All keyed by channel ID (ChannelIDRef).
-    lastBlocks = {}  # Previous element w/ its start and end times
-    channelsWritten = Counter()  # Number of elements extracted per channel
-    finished = {}  # Channels that have completed extraction
+    timeFilter = _TimeFilter(startTime, endTime, channels)
 
     try:
         timeScalars = doc._parsers['ChannelDataBlock'].timeScalars
 
         for el in doc.ebmldoc:
             if el.name == 'ChannelDataBlock':
-                # Get ChannelIDRef, StartTimeCodeAbs, and EndTimeCodeAbs;
-                # usually the 1st three, in order, but don't assume!
-                chId = blockStart = blockEnd = None
-                for subEl in el:
-                    if subEl.name == "ChannelIDRef":
-                        chId = subEl.value
-                    elif subEl.name == "StartTimeCodeAbs":
-                        blockStart = subEl.value
-                    elif subEl.name == "EndTimeCodeAbs":
-                        blockEnd = subEl.value
-
-                blockEnd = blockEnd or blockStart
-                if chId is None:
-                    logger.warning("Extractor: {} missing <ChannelIDRef> subelement, skipping.".format(el))
-                    continue
-                if blockStart is None:
-                    logger.warning("Extractor: {} missing <StartTimeCodeAbs> subelement, skipping.".format(el))
+                blockTimes = _getBlockTimes(el, timeScalars)
+                if blockTimes is None:
                     continue
 
-                if finished.setdefault(chId, False):
-                    yield None
-                    continue
-
-                if channels and chId not in channels:
-                    yield None
-                    continue
-
-                # TODO: Modulus correction, if still needed.
-                scalar = timeScalars.get(chId, 1)
-                blockStart *= scalar
-                blockEnd *= scalar
-
-                writeCurrent = True
-                writePrev = False  # write previous block, if current one starts late
-
-                if blockEnd < startTime:
-                    # Entirely before extraction interval. Yield nothing.
-                    writeCurrent = False
-                elif blockStart <= startTime:
-                    # Block overlaps start of interval. Yield block.
-                    # Mark channel finished if block also includes end of interval.
-                    writePrev = False
-                    finished[chId] = blockEnd >= endTime
-                elif blockEnd <= endTime:
-                    # Block within interval. Write block (w/ prev. if needed).
-                    writePrev = channelsWritten[chId] == 0
-                else:
-                    # Block overlaps end of interval. Yield block (w/ prev. if needed).
-                    # Mark channel finished.
-                    finished[chId] = True
-                    writePrev = channelsWritten[chId] == 0
-
-                if writePrev:
-                    # Yield the previous block, which is before the extraction interval.
-                    # This is to ensure that initial data is not left out.
-                    prev = lastBlocks.get(chId, None)
-                    if prev:
-                        channelsWritten[chId] += 1
-                        yield prev[0]
-
-                lastBlocks[chId] = (el, blockStart, blockEnd)
-
-                if writeCurrent:
-                    channelsWritten[chId] += 1
-                    yield el
-                else:
+                elements = timeFilter.filterBlock(el, *blockTimes)
+                if not elements:
                     yield None
+                for blockEl in elements:
+                    yield blockEl
 
             else:
                 # FUTURE: Omit `<Sync>` elements outside the interval and
@@ -532,7 +602,7 @@ def filterTime(doc, startTime=0, endTime=None, channels=None):
 
 def readData(doc, source=None, startTime=None, endTime=None, channels=None,
              updater=None, total=None, bytesRead=0, samplesRead=0,
-             parserTypes=None, **kwargs):
+             parserTypes=None, columnar=None, streaming=None, **kwargs):
     """ Import the data from a file into a Dataset.
     
         :param doc: The Dataset document into which to import the data.
@@ -559,6 +629,17 @@ def readData(doc, source=None, startTime=None, endTime=None, channels=None,
         :param samplesRead: The total number of samples imported. Mainly for
             merging multiple recordings.
         :param parserTypes: A collection of `parsers.ElementHandler` classes.
+        :param columnar: If `True`, also cache each subchannel's data as a
+            separate contiguous array after loading (see
+            `Dataset.columnarCache`). `None` leaves the Dataset's setting
+            unchanged.
+        :param streaming: If `True`, data blocks are added to their channels
+            as they are read, so the data can be accessed during the import.
+            If `False`, some processing (e.g. the timestamp correction of
+            legacy `SimpleChannelDataBlock` elements) is done in bulk after
+            all the elements have been read. If `None` (the default), the
+            import streams if it can be observed while running: if an
+            `updater` is given, or if it isn't run in the main thread.
         :return: The total number of samples read.
     """
     kwargs.pop('sessionId', None)  # Unused; for Classic compatibility.
@@ -572,6 +653,9 @@ def readData(doc, source=None, startTime=None, endTime=None, channels=None,
             stacklevel=2,
         )
 
+    if columnar is not None:
+        doc.columnarCache = columnar
+
     parserTypes = parserTypes or ELEMENT_PARSER_TYPES
     if doc._parsers is None:
         # Possibly redundant; is `doc._parsers` ever `None` at this point?
@@ -579,6 +663,17 @@ def readData(doc, source=None, startTime=None, endTime=None, channels=None,
     
     elementParsers = doc._parsers
 
+    thread = threading.current_thread()
+    if streaming is None:
+        streaming = updater is not None or thread is not threading.main_thread()
+    doc._importThread = thread
+
+    # Handlers can be keyed by more than one element name
+    handlers = set(elementParsers.values())
+    for handler in handlers:
+        if hasattr(handler, 'deferTimestamps'):
+            handler.deferTimestamps = not streaming
+
     elementCount = 0
     numSamples = 0  # Number of samples imported from this file
 
@@ -599,6 +694,10 @@ def readData(doc, source=None, startTime=None, endTime=None, channels=None,
         else:
             iterator = iter(source.ebmldoc)
 
+        stats = doc.stats
+        if stats is not None:
+            iterator = stats.timeIterator('ebml', iterator)
+
         for n, el in enumerate(iterator):
             # Progress display stuff -------------------------------------
             if updater:
@@ -617,6 +716,10 @@ def readData(doc, source=None, startTime=None, endTime=None, channels=None,
 
             el_name = el.name
 
+            if stats is not None:
+                stats.elements[el_name] += 1
+                stats.bytesRead += el.payloadOffset + el.size - el.offset
+
             if el_name not in elementParsers:
                 # Unknown block type; probably okay to skip.
                 logger.info("unknown block {!r} (ID 0x{:02x}) @{}".format(
@@ -632,7 +735,11 @@ def readData(doc, source=None, startTime=None, endTime=None, channels=None,
 
                 # "Header" elements were loaded by `openFile()`; don't duplicate.
                 if not parser.isHeader or el_name == "Attribute":
-                    added = parser.parse(el, timeOffset=timeOffset)
+                    if stats is not None:
+                        with stats.timer('parse'):
+                            added = parser.parse(el, timeOffset=timeOffset)
+                    else:
+                        added = parser.parse(el, timeOffset=timeOffset)
                     if isinstance(added, int):
                         numSamples += added
                     
@@ -656,9 +763,29 @@ def readData(doc, source=None, startTime=None, endTime=None, channels=None,
         # (typically the last)
         doc.fileDamaged = True
 
+    stats = doc.stats
+    if stats is not None:
+        stats.push('parse')
+
+    for handler in handlers:
+        if stats is not None:
+            with stats.timer('finish'):
+                handler.finish()
+        else:
+            handler.finish()
+        if hasattr(handler, 'deferTimestamps'):
+            handler.deferTimestamps = False
+
+    if stats is not None:
+        stats.push('finish')
+
     doc.fillCaches()
+    doc._importThread = None
     doc.loading = False
 
+    if stats is not None:
+        stats.push('import')
+
     if updater:
         updater(done=True)
 
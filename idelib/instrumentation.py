@@ -0,0 +1,207 @@
+"""
+Optional instrumentation of importing and reading data: counts of elements,
+bytes and blocks, the time spent in each phase of an import, data cache
+hits and misses, lock wait time, and calibration (transform) time.
+
+Instrumentation is off by default, and costs close to nothing when off:
+instrumented code only checks whether its `Dataset` has a `stats` object.
+To use it, call `Dataset.enableStats()`, preferably before reading the
+data::
+
+    doc = importer.openFile(filename)
+    stats = doc.enableStats(hook=print)
+    importer.readData(doc)
+    print(stats.asDict())
+"""
+
+from collections import Counter
+import threading
+from time import perf_counter
+
+__all__ = ['Stats', 'TimedLock']
+
+# ==============================================================================
+#
+# ==============================================================================
+
+
+class _Timer(object):
+    """ Context manager that adds the time spent within it to one of a
+        `Stats` object's timers. Nested uses of the same timer (e.g. a
+        transform calling another transform) are only counted once.
+    """
+    __slots__ = ('stats', 'name', 't0')
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+        self.t0 = None
+
+    def __enter__(self):
+        depth = self.stats._local.__dict__
+        if depth.get(self.name, 0) == 0:
+            self.t0 = perf_counter()
+        depth[self.name] = depth.get(self.name, 0) + 1
+        return self
+
+    def __exit__(self, *args):
+        depth = self.stats._local.__dict__
+        depth[self.name] -= 1
+        if self.t0 is not None:
+            self.stats.addTime(self.name, perf_counter() - self.t0)
+        return False
+
+
+class Stats(object):
+    """ Counters and timers for a `Dataset`. Created by
+        `Dataset.enableStats()`.
+
+        :ivar elements: A `Counter` of EBML elements read, by element name.
+        :ivar bytesRead: The number of bytes of EBML elements read.
+        :ivar blocksAppended: The number of data blocks added to sessions.
+        :ivar cacheHits: The number of data reads served from a session's
+            data cache (or columnar cache).
+        :ivar cacheMisses: The number of data reads that required the data
+            to be gathered from the blocks (i.e. while still importing).
+        :ivar lockWaits: The number of times the data lock was acquired.
+        :ivar times: A dictionary of cumulative times (in seconds), keyed by
+            name. Import phases: ``'ebml'`` (reading EBML elements), ``'parse'``
+            (handling elements, including ``'append'``), ``'append'``
+            (adding blocks to sessions), ``'finish'`` (deferred processing
+            at the end of an import), and ``'fillCaches'``. Also
+            ``'lockWait'`` (waiting to acquire the data lock) and
+            ``'calibration'`` (applying transforms).
+        :ivar hook: A function called with the name of an event (e.g. the
+            end of an import phase) and this `Stats` object, or `None`.
+    """
+
+    def __init__(self, hook=None):
+        """ Constructor.
+
+            :keyword hook: A function called with the name of an event (e.g.
+                the end of an import phase) and this `Stats` object.
+        """
+        self.hook = hook
+        self._local = threading.local()
+        self.reset()
+
+
+    def reset(self):
+        """ Set all counters and timers to zero.
+        """
+        self.elements = Counter()
+        self.bytesRead = 0
+        self.blocksAppended = 0
+        self.cacheHits = 0
+        self.cacheMisses = 0
+        self.lockWaits = 0
+        self.times = {}
+
+
+    def __repr__(self):
+        return "<%s: %d elements, %d blocks, %.3f s>" % (
+            self.__class__.__name__, sum(self.elements.values()),
+            self.blocksAppended, sum(self.times.get(k, 0) for k in
+                                     ('ebml', 'parse', 'finish', 'fillCaches')))
+
+
+    def timer(self, name):
+        """ Get a context manager that adds the time spent within it to a
+            timer.
+
+            :param name: The name of the timer (a key in `times`).
+        """
+        return _Timer(self, name)
+
+
+    def addTime(self, name, seconds):
+        """ Add to a timer.
+
+            :param name: The name of the timer (a key in `times`).
+            :param seconds: The time to add.
+        """
+        self.times[name] = self.times.get(name, 0.0) + seconds
+
+
+    def timeIterator(self, name, iterator):
+        """ Wrap an iterator, adding the time spent getting each item to a
+            timer.
+
+            :param name: The name of the timer (a key in `times`).
+            :param iterator: The iterator to wrap.
+        """
+        iterator = iter(iterator)
+        while True:
+            t0 = perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.addTime(name, perf_counter() - t0)
+                return
+            self.addTime(name, perf_counter() - t0)
+            yield item
+
+
+    def push(self, event):
+        """ Send the stats to the hook (if any).
+
+            :param event: The name of the event causing the push.
+        """
+        if self.hook is not None:
+            self.hook(event, self)
+
+
+    def asDict(self):
+        """ Get the counters and timers as a dictionary (e.g. for logging or
+            serializing as JSON).
+        """
+        return {'elements': dict(self.elements),
+                'bytesRead': self.bytesRead,
+                'blocksAppended': self.blocksAppended,
+                'cacheHits': self.cacheHits,
+                'cacheMisses': self.cacheMisses,
+                'lockWaits': self.lockWaits,
+                'times': dict(self.times)}
+
+
+class TimedLock(object):
+    """ A wrapper for a `threading.Lock` that records the time spent waiting
+        to acquire it. Used in place of a `Dataset`'s data lock while
+        instrumentation is enabled; it wraps the same lock, so it can be
+        swapped in while the lock is in use.
+    """
+
+    def __init__(self, lock, stats):
+        """ Constructor.
+
+            :param lock: The lock to wrap.
+            :param stats: The `Stats` in which to record the wait time.
+        """
+        self.lock = lock
+        self.stats = stats
+
+
+    def acquire(self, blocking=True, timeout=-1):
+        t0 = perf_counter()
+        result = self.lock.acquire(blocking, timeout)
+        self.stats.addTime('lockWait', perf_counter() - t0)
+        self.stats.lockWaits += 1
+        return result
+
+
+    def release(self):
+        self.lock.release()
+
+
+    def locked(self):
+        return self.lock.locked()
+
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+
+    def __exit__(self, *args):
+        self.release()
+        return False
@@ -19,7 +19,6 @@ from .dataset import __DEBUG__
 
 import logging
 logger = logging.getLogger('idelib')
-logging.basicConfig(format="%(asctime)s %(levelname)s: %(message)s")
 
 if __DEBUG__:
     logger.setLevel(logging.INFO)
@@ -11,7 +11,12 @@ objects; they must provide `size` and `format` attributes (the latter should be
 `None`), and they must implement the method `unpack_from()`. They may also 
 include optional `types` and `ranges` attributes, which are used to provide
 'hints' about the data. These are automatically computed if not defined
-explicitly.
+explicitly. Parsers may also implement `unpack_array()`, which decodes an
+entire buffer of samples at once into a structured `numpy` array (described
+by the parser's `dtype` attribute); if present, it is used instead of
+calling `unpack_from()` for each sample. Packed integer formats with
+arbitrary bit widths (e.g. 24 or 12 bits) don't need a named parser; they
+can be specified in a channel's format string (see `PackedParser`).
 
 Element handlers are called by the importer as it iterates through the 'root'
 elements of an EBML file. Generally, handlers are instantiated only once, just
@@ -38,6 +43,7 @@ Created on Sep 26, 2013
 
 from collections.abc import Sequence
 import math
+import re
 import struct
 import sys
 import warnings
@@ -56,7 +62,6 @@ else:
 
 import logging
 logger = logging.getLogger('idelib')
-logging.basicConfig(format="%(asctime)s %(levelname)s: %(message)s")
 
 #===============================================================================
 # 
@@ -73,6 +78,13 @@ def dataParser(cls):
         `format` and `size`, and implementing `unpack_from()`. They should
         also provide a `ranges` tuple, and (optionally) a `NAME` attribute,
         which is how it will be referenced in a channel's `ChannelParser`.
+
+        Parsers may also implement `unpack_array(data)`, which decodes all
+        the samples in a buffer at once, returning a structured `numpy`
+        array with one field per subchannel (named '0', '1', etc.). Parsers
+        that do must also provide the array's type as a `dtype` attribute.
+        When available, `unpack_array()` is used when importing and parsing
+        data blocks.
     """
     global DATA_PARSERS
     DATA_PARSERS[getattr(cls, 'NAME', cls.__name__)] = cls
@@ -308,6 +320,8 @@ class ParsingError(IOError):
 #    also provide a `ranges` tuple, and (optionally) a `NAME` attribute,
 #    which is how it will be referenced in a channel's `ChannelParser`.
 #    `NAME` will default to the name of the class if not provided.
+#    Parsers can optionally implement `unpack_array()` and provide a `dtype`
+#    for decoding entire blocks at once (see `dataParser()`).
 #    Every `dataset.Document` will have its own instances of the parsers it
 #    uses.
 #===============================================================================
@@ -331,6 +345,10 @@ class NMEAParser:
         self.size = self.parser.size
         self.ranges = (-128, 127)
 
+    def __reduce__(self):
+        # `struct.Struct` objects can't be pickled; create a new parser.
+        return self.__class__, ()
+
     def unpack_from(self, data, offset=0):
         """ Special-case parsing of an NMEA data block.
         """
@@ -361,6 +379,8 @@ class MPL3115PressureTempParser(object):
         :cvar format: For compatibility with `struct.Struct`. Always `None`
         :cvar ranges: A tuple containing the absolute min and max values.
         :cvar types: A tuple containing the types of data parsed.
+        :cvar dtype: The `numpy` type of the array produced by
+            `unpack_array()`.
     """
     NAME = "MPL3115"
 
@@ -377,6 +397,9 @@ class MPL3115PressureTempParser(object):
     # The types of data parsed from each channel, returned via 
     # `getParserTypes()`. If this doesn't exist, the types are computed. 
     types = (float, float)
+
+    # The structured array type produced by `unpack_array()`.
+    dtype = np.dtype([('0', np.float64), ('1', np.float64)])
     
     # This is weirdly formed data. Using two parsers over the same data is
     # cheaper than using one plus extra bit manipulation.
@@ -392,6 +415,30 @@ class MPL3115PressureTempParser(object):
         fractemp = (fractemp >> 4) * 0.0625
 
         return (rawpressure + fracpressure, rawtemp + fractemp)
+
+
+    def unpack_array(self, data):
+        """ Special-case parsing of all the samples in a buffer at once.
+            Any incomplete sample at the end of the buffer is ignored.
+
+            :param data: A `bytes`-like object containing the raw samples.
+            :return: A structured array of (pressure, temperature).
+        """
+        raw = np.frombuffer(data, dtype=np.uint8)
+        raw = raw[:len(raw) - len(raw) % self.size].reshape(-1, self.size)
+        ints = raw.astype(np.int32)
+        out = np.empty(len(raw), dtype=self.dtype)
+
+        # Pressure: the signed whole-number value is bits [23..6], the
+        # fraction bits [5..4].
+        whole = ((raw[:, 0].view(np.int8).astype(np.int32) << 10)
+                 | (ints[:, 1] << 2) | (ints[:, 2] >> 6))
+        out['0'] = whole + ((ints[:, 2] >> 4) & 0b11) * 0.25
+
+        # Temperature: signed whole number in the first byte, the fraction
+        # in the top 4 bits of the second.
+        out['1'] = raw[:, 3].view(np.int8) + (ints[:, 4] >> 4) * 0.0625
+        return out
             
 
 @dataParser
@@ -406,20 +453,226 @@ class AccelerometerParser(object):
         :cvar size: The size (in bytes) of one parsed sample.
         :cvar format: The `struct.Struct` parsing format string used to parse.
         :cvar ranges: A tuple containing the absolute min and max values.
+        :cvar dtype: The `numpy` type of the array produced by
+            `unpack_array()`.
     """
     NAME = "LegacyAccelerometer"
 
+    dtype = np.dtype([('0', np.int32), ('1', np.int32), ('2', np.int32)])
+
     def __init__(self, formatting="<HHH"):
         self.parser = struct.Struct(formatting)
         self.format = self.parser.format
         self.size = self.parser.size
         self.ranges = ((-32768, 32767),) * 3
 
+        # The type of the raw (unconverted) data, for `unpack_array()`
+        endian = {'<': '<', '>': '>', '!': '>'}.get(self.format[0], '=')
+        self._rawDtype = np.dtype(
+            [(str(i), endian + ChannelDataBlock.TO_NP_TYPESTR[c])
+             for i, c in enumerate(self.format.lstrip('@=<>!'))])
+
+    def __reduce__(self):
+        # `struct.Struct` objects can't be pickled; create a new parser.
+        return self.__class__, (self.format,)
+
     def unpack_from(self, data, offset=0):
         # This parser converts to signed ints to avoid some problems with the
         # inverted 'z' axis.
         z, y, x = self.parser.unpack_from(data, offset)
         return 32768-z, y-32768, x-32768
+
+
+    def unpack_array(self, data):
+        """ Parse all the samples in a buffer at once. Any incomplete
+            sample at the end of the buffer is ignored.
+
+            :param data: A `bytes`-like object containing the raw samples.
+            :return: A structured array of (z, y, x).
+        """
+        raw = np.frombuffer(data, dtype=self._rawDtype,
+                            count=len(data) // self.size)
+        out = np.empty(len(raw), dtype=self.dtype)
+        np.subtract(32768, raw['0'], out=out['0'], dtype=np.int32)
+        np.subtract(raw['1'], 32768, out=out['1'], dtype=np.int32)
+        np.subtract(raw['2'], 32768, out=out['2'], dtype=np.int32)
+        return out
+
+
+class PackedParser(object):
+    """ Parser for samples of packed integers with arbitrary bit widths
+        (e.g. 24 or 12 bits), which `struct` can't handle. Created from a
+        channel's format string, in which each field is a type character
+        followed by its width in bits: `i` (signed), `u` or `I` (unsigned),
+        or `x` (padding bits, skipped). Fields may have a repeat count, as
+        in `struct` formats, and the string may start with a byte order
+        character (`<`, `>`, `!`, `=` or `@`; the default is native).
+        For example, `'<i24i24i24'` (or `'<3i24'`) is three little-endian
+        24-bit signed integers, and `'>u12u12'` is two big-endian 12-bit
+        unsigned integers in 3 bytes.
+
+        Fields are packed without regard to byte boundaries. In
+        little-endian samples, the first field occupies the least
+        significant bits of the sample; in big-endian samples, the first
+        field occupies the most significant bits. If the total number of
+        bits isn't a multiple of 8, the sample is padded to a whole number
+        of bytes (at the end of a little-endian sample's last byte, or the
+        least significant bits of a big-endian sample).
+
+        Values are decoded as 32-bit integers, so fields can be no wider
+        than 32 bits.
+
+        :ivar packedFormat: The format string used to create the parser.
+        :ivar size: The size (in bytes) of one parsed sample.
+        :ivar format: For compatibility with `struct.Struct`. Always `None`.
+        :ivar ranges: A tuple containing the absolute min and max values of
+            each field.
+        :ivar types: A tuple containing the types of data parsed.
+        :ivar dtype: The `numpy` type of the array produced by
+            `unpack_array()`.
+    """
+    # Regular expressions for validating a packed format string, and for
+    # separating its fields.
+    FORMAT_RE = re.compile(r'[<>!=@]?(?:\d*[iIux]\d+)+')
+    FIELD_RE = re.compile(r'(\d*)([iIux])(\d+)')
+
+    format = None
+
+    def __init__(self, formatting):
+        if isinstance(formatting, (bytes, bytearray)):
+            formatting = formatting.decode()
+        if not self.isPacked(formatting):
+            raise ValueError("Invalid packed format: %r" % formatting)
+
+        self.packedFormat = formatting
+        self.littleEndian = {'<': True, '>': False, '!': False}.get(
+            formatting[0], sys.byteorder == 'little')
+
+        # Each field is (bit offset, width, signed); padding isn't kept.
+        self._fields = []
+        offset = 0
+        for count, fieldType, bits in self.FIELD_RE.findall(formatting):
+            bits = int(bits)
+            if not 0 < bits <= 32:
+                raise ValueError("Packed field width must be 1 to 32 bits, "
+                                 "got %d in %r" % (bits, formatting))
+            for _ in range(int(count or 1)):
+                if fieldType != 'x':
+                    self._fields.append((offset, bits, fieldType == 'i'))
+                offset += bits
+
+        self.size = (offset + 7) // 8
+        self.dtype = np.dtype([(str(i), '=i4' if signed else '=u4')
+                               for i, (_, _, signed) in enumerate(self._fields)])
+        self.types = (int,) * len(self._fields)
+        self.ranges = tuple((-2**(bits-1), 2**(bits-1)-1) if signed
+                            else (0, 2**bits-1)
+                            for _, bits, signed in self._fields)
+
+
+    def __repr__(self):
+        return "<%s %r>" % (self.__class__.__name__, self.packedFormat)
+
+
+    def __eq__(self, other):
+        return (isinstance(other, PackedParser)
+                and other.packedFormat == self.packedFormat)
+
+
+    def __hash__(self):
+        return hash(self.packedFormat)
+
+
+    @classmethod
+    def isPacked(cls, formatting):
+        """ Is a format string a packed format (i.e. one that should be
+            parsed by a `PackedParser`, rather than a `struct.Struct`)?
+        """
+        if isinstance(formatting, (bytes, bytearray)):
+            formatting = formatting.decode()
+        return bool(cls.FORMAT_RE.fullmatch(formatting))
+
+
+    def _fieldShift(self, offset, bits):
+        """ Get the range of bytes containing a field, and the right shift
+            to apply to those bytes (combined as an integer) to get it.
+        """
+        first = offset // 8
+        last = (offset + bits - 1) // 8
+        if self.littleEndian:
+            return first, last, offset % 8
+        return first, last, 8 * (last + 1) - (offset + bits)
+
+
+    def unpack_from(self, data, offset=0):
+        """ Parse one sample.
+
+            :param data: A `bytes`-like object containing the raw samples.
+            :keyword offset: The offset (in bytes) of the sample.
+            :return: A tuple of values.
+        """
+        sample = bytes(data[offset:offset + self.size])
+        if len(sample) < self.size:
+            raise struct.error("unpack_from requires a buffer of at least %d "
+                               "bytes" % (offset + self.size))
+
+        result = []
+        for fieldOffset, bits, signed in self._fields:
+            first, last, shift = self._fieldShift(fieldOffset, bits)
+            v = int.from_bytes(sample[first:last + 1],
+                               'little' if self.littleEndian else 'big')
+            v = (v >> shift) & ((1 << bits) - 1)
+            if signed and v >> (bits - 1):
+                v -= 1 << bits
+            result.append(v)
+        return tuple(result)
+
+
+    def unpack_array(self, data):
+        """ Parse all the samples in a buffer at once. Any incomplete
+            sample at the end of the buffer is ignored.
+
+            :param data: A `bytes`-like object containing the raw samples.
+            :return: A structured array of values.
+        """
+        raw = np.frombuffer(data, dtype=np.uint8)
+        raw = raw[:len(raw) - len(raw) % self.size].reshape(-1, self.size)
+        out = np.empty(len(raw), dtype=self.dtype)
+
+        for name, (fieldOffset, bits, signed) in zip(out.dtype.names,
+                                                      self._fields):
+            first, last, shift = self._fieldShift(fieldOffset, bits)
+
+            # Gather the bytes containing the field into one integer
+            v = np.zeros(len(raw), dtype=np.int64)
+            for i in range(first, last + 1):
+                byteShift = 8 * (i - first if self.littleEndian else last - i)
+                v |= raw[:, i].astype(np.int64) << byteShift
+
+            v >>= shift
+            v &= (1 << bits) - 1
+            if signed:
+                # Sign extension
+                signBit = 1 << (bits - 1)
+                v ^= signBit
+                v -= signBit
+            out[name] = v
+
+        return out
+
+
+def getFormatParser(formatting):
+    """ Get a parser for sample data described by a format string: a
+        `PackedParser` for packed formats with arbitrary bit widths (e.g.
+        `'<i24i24i24'`), otherwise a `struct.Struct`.
+
+        :param formatting: A format string, e.g. from a channel's
+            `ChannelFormat` element.
+        :return: A `struct.Struct`-like parser.
+    """
+    if PackedParser.isPacked(formatting):
+        return PackedParser(formatting)
+    return struct.Struct(formatting)
     
 
 ################################################################################
@@ -494,6 +747,13 @@ class ElementHandler(object):
             issubclass(self.product, BaseDataBlock)
 
 
+    def finish(self):
+        """ Complete any deferred processing. Called by the importer after
+            all elements have been parsed.
+        """
+        pass
+
+
 ################################################################################
 #===============================================================================
 #--- Data parsers and handlers
@@ -511,7 +771,7 @@ class BaseDataBlock(object):
     maxTimestamp = 2**24 
     timeScalar = 1000000.0 / 2**15
     
-    def __init__(self, element, maxTimestamp=maxTimestamp, timeScalar=timeScalar):
+    def __init__(self, element, maxTimestamp=None, timeScalar=None):
         self.element = element
         
         # This stuff will vary based on parser:
@@ -534,8 +794,11 @@ class BaseDataBlock(object):
         self._rollingMeanSpan = 5000000
         self._rollingMeanLen = None  # length of set at last rolling mean
         
-        self.maxTimestamp = maxTimestamp
-        self.timeScalar = timeScalar
+        # Use the class' values (which subclasses may override) by default
+        if maxTimestamp is not None:
+            self.maxTimestamp = maxTimestamp
+        if timeScalar is not None:
+            self.timeScalar = timeScalar
         
 
     def __repr__(self):
@@ -568,6 +831,16 @@ class BaseDataBlock(object):
         return self.element.value
 
 
+    def getRawPayload(self):
+        """ Get the block's raw sample data, excluding any header
+            information. The data is read from the file; the element
+            doesn't keep a copy.
+        """
+        data = self.element.value
+        self.element.gc()
+        return data
+
+
 #===============================================================================
 # SimpleChannelDataBlock-related handlers
 #===============================================================================
@@ -589,6 +862,7 @@ class SimpleChannelDataBlock(BaseDataBlock):
         self.element = element
         self.startTime, self.channel = self.getHeader()
         self.payloadSize = element.size - self.headerSize
+        self._payload = None
    
     
     def __len__(self):
@@ -602,7 +876,7 @@ class SimpleChannelDataBlock(BaseDataBlock):
         """ Extract the block's header info. In SimpleChannelDataBlocks,
             this is part of the payload.
         """
-        return self.headerParser.unpack_from(self.payload)
+        return self.headerParser.unpack_from(self.element.value)
     
 
     @property
@@ -610,6 +884,31 @@ class SimpleChannelDataBlock(BaseDataBlock):
         return self.getHeader()[0]
 
 
+    @property
+    def payload(self):
+        if self._payload is None:
+            self._payload = np.frombuffer(self.getRawPayload(), dtype=np.uint8)
+        return self._payload
+
+
+    def getRawPayload(self):
+        """ Get the block's raw sample data, excluding the header. The data
+            is read from the file; the element doesn't keep a copy.
+        """
+        data = self.element.value[self.headerSize:]
+        self.element.gc()
+        return data
+
+
+    def _unpackArray(self, parser):
+        """ Decode all of the block's samples using a parser's
+            `unpack_array()`, reusing the data decoded on import (if any).
+        """
+        if self._payload is not None and self._payload.dtype == parser.dtype:
+            return self._payload
+        return parser.unpack_array(self.getRawPayload())
+
+
     def parseWith(self, parser, start=None, end=None, step=1, subchannel=None):
         """ Parse an element's payload. Use this instead of directly using
             `parser.parse()` for consistency's sake.
@@ -620,11 +919,26 @@ class SimpleChannelDataBlock(BaseDataBlock):
             :keyword step: The number of samples to skip, if the start and end
                 cover more than one sample.
             :keyword subchannel: The subchannel to get, if specified.
+            :return: If the parser implements `unpack_array()`, a structured
+                array of samples (or an array of one subchannel's values).
+                Otherwise, an iterator of tuples (or of single values).
+        """
+        if hasattr(parser, 'unpack_array'):
+            values = self._unpackArray(parser)[start:end:step]
+            if subchannel is not None:
+                return values[values.dtype.names[subchannel]]
+            return values
+        return self._iterParseWith(parser, start, end, step, subchannel)
+
+
+    def _iterParseWith(self, parser, start, end, step, subchannel):
+        """ Parse an element's payload one sample at a time. Used
+            internally; see `parseWith()`.
         """
         # SimpleChannelDataBlock payloads contain header info; skip it.
-        data = self.payload
+        data = self.element.value
         start, end, step = slice(start, end, step).indices(
-            (self.payloadSize-self.headerSize) // parser.size
+            self.payloadSize // parser.size
         )
 
         start = self.headerSize + (start*parser.size)
@@ -646,9 +960,26 @@ class SimpleChannelDataBlock(BaseDataBlock):
             :param parser: The DataParser to use
             :param indices: A list of indices into the block's data. 
             :keyword subchannel: The subchannel to get, if specified.
+            :return: If the parser implements `unpack_array()`, a structured
+                array of samples (or an array of one subchannel's values).
+                Otherwise, an iterator of tuples (or of single values).
+        """
+        if hasattr(parser, 'unpack_array'):
+            values = self._unpackArray(parser)
+            indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+            values = values[indices[indices < len(values)]]
+            if subchannel is not None:
+                return values[values.dtype.names[subchannel]]
+            return values
+        return self._iterParseByIndexWith(parser, indices, subchannel)
+
+
+    def _iterParseByIndexWith(self, parser, indices, subchannel):
+        """ Parse specific samples out of an element's payload one at a time.
+            Used internally; see `parseByIndexWith()`.
         """
         # SimpleChannelDataBlock payloads contain header info; skip it.
-        data = self.payload
+        data = self.element.value
         parser_unpack_from = parser.unpack_from
         parser_size = parser.size
         for i in indices:
@@ -666,9 +997,18 @@ class SimpleChannelDataBlockParser(ElementHandler):
     """ 'Factory' for SimpleChannelDataBlock elements. Instantiated once
         per session (or maybe channel, depending). It handles the modulus
         correction of the block's short timestamps.
+
+        If `deferTimestamps` is `True`, `SimpleChannelDataBlock` elements
+        aren't added to their channels as they are parsed. Instead, their
+        timestamps are collected and corrected for each channel in a single
+        pass by `finish()`, which then adds the blocks. The importer does
+        this unless streaming (i.e. unless the data will be accessed while
+        it is being imported).
         
         :cvar elementName: The name of the element handled by this parser
         :cvar product: The class of object generated by the parser
+        :ivar deferTimestamps: If `True`, defer the timestamp correction of
+            `SimpleChannelDataBlock` elements until `finish()` is called.
     """
     product = SimpleChannelDataBlock
     elementName = product.__name__
@@ -686,6 +1026,11 @@ class SimpleChannelDataBlockParser(ElementHandler):
         self.timeScalars = {}
         self.timeModulus = {}
 
+        # Blocks awaiting timestamp correction, keyed by channel. Each item
+        # is a tuple: the block, its session ID, and its time offset.
+        self.deferTimestamps = False
+        self._deferred = {}
+
 
     def fixOverflow(self, block, timestamp):
         """ Return an adjusted, scaled time from a low-resolution timestamp.
@@ -693,7 +1038,7 @@ class SimpleChannelDataBlockParser(ElementHandler):
         # TODO: Identify blocks with non-modulo timestamps and just return the
         #    unmodified timestamp. Will be slightly more efficient.
         
-        channel = block.getHeader()[1]
+        channel = block.channel
         modulus = self.timeModulus.setdefault(channel, block.maxTimestamp)
         offset = self.timestampOffset.setdefault(channel, 0)
         
@@ -710,6 +1055,43 @@ class SimpleChannelDataBlockParser(ElementHandler):
         self.lastStamp[channel] = timestamp
         timestamp += self.timestampOffset[channel]
         return timestamp * self.timeScalars.setdefault(channel, self.timeScalar)
+
+
+    def fixOverflows(self, channel, timestamps):
+        """ Return adjusted, scaled times from a channel's low-resolution
+            timestamps, all at once. Vectorized equivalent of calling
+            `fixOverflow()` on each timestamp in order.
+
+            :param channel: The ID of the channel of the timestamps.
+            :param timestamps: An array of raw timestamps.
+            :return: An array of times.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        modulus = self.timeModulus.setdefault(channel, self.product.maxTimestamp)
+        offset = self.timestampOffset.setdefault(channel, 0)
+        scalar = self.timeScalars.setdefault(channel, self.timeScalar)
+        if len(timestamps) == 0:
+            return np.empty(0)
+
+        # Timestamps greater than the modulus are (probably) not modulo, as
+        # in split files; they reset the offset. Otherwise, a timestamp
+        # less than the previous one is (probably) a modulo rollover.
+        resets = timestamps > modulus
+        stamps = np.where(resets, timestamps % modulus, timestamps)
+        previous = np.concatenate(([self.lastStamp.get(channel, 0)], stamps[:-1]))
+        rollovers = np.cumsum(~resets & (stamps < previous))
+
+        # The offset of each timestamp: that of the last reset (or the
+        # initial offset) plus the modulus for each rollover since.
+        lastReset = np.maximum.accumulate(
+            np.where(resets, np.arange(len(stamps)), -1))
+        hasReset = lastReset >= 0
+        offsets = np.where(hasReset, (timestamps - stamps)[lastReset], offset)
+        offsets += modulus * (rollovers - np.where(hasReset, rollovers[lastReset], 0))
+
+        self.timestampOffset[channel] = int(offsets[-1])
+        self.lastStamp[channel] = int(stamps[-1])
+        return (stamps + offsets) * scalar
     
    
     def parse(self, element, sessionId=None, timeOffset=0):
@@ -731,11 +1113,25 @@ class SimpleChannelDataBlockParser(ElementHandler):
             # TODO: Actually handle, instead of ignoring?
             logger.warning("XXX: bad attribute in element %s" % element)
             return 0
-            
+
+        if self.deferTimestamps and isinstance(block, SimpleChannelDataBlock):
+            # Correct the timestamps and add the block later; see `finish()`
+            if channel not in self.doc.channels:
+                return 0
+            self._deferred.setdefault(channel, []).append((block, sessionId,
+                                                           timeOffset))
+            try:
+                ch = self.doc.channels[channel]
+                return block.getNumSamples(ch.parser) * len(ch.children)
+            except ZeroDivisionError:
+                return 0
         
         block.startTime = timeOffset + int(self.fixOverflow(block, timestamp))
         if block.endTime is not None:
             block.endTime = timeOffset + int(self.fixOverflow(block, block.endTime))
+        else:
+            # No end timestamp (always the case for SimpleChannelDataBlocks)
+            block.endTime = block.startTime
 
         if channel not in self.doc.channels:
             # Unknown channel; could be debugging info, so that might be okay.
@@ -744,12 +1140,45 @@ class SimpleChannelDataBlockParser(ElementHandler):
 
         try:
             ch = self.doc.channels[channel]
-            ch.getSession(sessionId).append(block)
+            self._getSession(ch, sessionId, block).append(block)
             return block.getNumSamples(ch.parser) * len(ch.children)
         except ZeroDivisionError:
             return 0
 
 
+    @staticmethod
+    def _getSession(channel, sessionId, block):
+        """ Get a channel's session for adding a block. If the channel has
+            no `singleSample` hint, it is set from the block before the
+            session is created, so the session is of the appropriate type.
+        """
+        if channel.singleSample is None:
+            channel.singleSample = block.getNumSamples(channel.parser) == 1
+            for subchannel in channel.subchannels:
+                if subchannel is not None and subchannel.singleSample is None:
+                    subchannel.singleSample = channel.singleSample
+        return channel.getSession(sessionId)
+
+
+    def finish(self):
+        """ Correct the timestamps of all deferred blocks, one channel at a
+            time, and add the blocks to their channels.
+        """
+        deferred, self._deferred = self._deferred, {}
+        for channel, items in deferred.items():
+            timestamps = np.fromiter((block.startTime for block, _, _ in items),
+                                     dtype=np.int64, count=len(items))
+            times = self.fixOverflows(channel, timestamps)
+
+            ch = self.doc.channels[channel]
+            for (block, sessionId, timeOffset), t in zip(items, times.tolist()):
+                block.startTime = block.endTime = timeOffset + int(t)
+                try:
+                    self._getSession(ch, sessionId, block).append(block)
+                except ZeroDivisionError:
+                    pass
+
+
 #===============================================================================
 # ChannelDataBlock: Element wrapper and handler
 #===============================================================================
@@ -824,6 +1253,16 @@ class ChannelDataBlock(BaseDataBlock):
             self._payloadEl.gc()
         return self._payload
 
+
+    def getRawPayload(self):
+        """ Get the block's raw sample data (the contents of its
+            `ChannelDataPayload`). The data is read from the file; the
+            element doesn't keep a copy.
+        """
+        data = self._payloadEl.value
+        self._payloadEl.gc()
+        return data
+
     # Define standard mapping from struct to numpy typestring
     #   (conversions taken from struct & numpy docs:)
     #   https://docs.python.org/3/library/struct.html#format-characters
@@ -885,6 +1324,166 @@ class ChannelDataBlockParser(SimpleChannelDataBlockParser):
     timeScalar = 1e6 / 2**15
 
 
+#===============================================================================
+#--- Data block serialization (for pickling `EventArray` objects)
+#===============================================================================
+
+def _compactInts(values):
+    """ Create an array of integers using the smallest type that can hold
+        them. Used internally.
+    """
+    arr = np.array(values, dtype=np.int64)
+    if arr.size:
+        arr = arr.astype(np.result_type(np.min_scalar_type(arr.min()),
+                                        np.min_scalar_type(arr.max())))
+    return arr
+
+
+def _packColumn(values):
+    """ Pack the values of one data block attribute (one per block) into
+        a compact form for pickling. Used internally.
+    """
+    first = values[0]
+    if not isinstance(first, np.ndarray):
+        # Only immutable values can be shared by all the unpacked blocks
+        if (isinstance(first, (type(None), bool, int, float, str, tuple))
+                and all(type(v) is type(first) and v == first for v in values)):
+            return 'same', first
+        if type(first) is int and all(type(v) is int for v in values):
+            return 'scalar', _compactInts(values)
+        if type(first) is float and all(type(v) is float for v in values):
+            return 'scalar', np.array(values)
+        if (isinstance(first, tuple) and first
+                and all(type(v) is tuple and len(v) == len(first)
+                        and all(type(x) is int for x in v) for v in values)):
+            return 'tuple', _compactInts(values)
+    elif all(isinstance(v, np.ndarray) and v.shape == first.shape
+             and v.dtype == first.dtype for v in values):
+        return 'array', np.stack(values)
+    return 'list', list(values)
+
+
+def _unpackColumn(column, count):
+    """ Unpack a column packed by `_packColumn()`. Used internally.
+    """
+    kind, data = column
+    if kind == 'same':
+        return [data] * count
+    elif kind == 'scalar':
+        return data.tolist()
+    elif kind == 'tuple':
+        return list(map(tuple, data.tolist()))
+    elif kind == 'array':
+        return list(data)
+    return data
+
+
+def packBlocks(blocks, streams):
+    """ Pack a list of data blocks into a compact, picklable table. The
+        blocks' EBML elements are stored by file offset, and their decoded
+        data isn't included; it is read from the file again when needed.
+
+        :param blocks: A list of data blocks (`BaseDataBlock` subclass
+            instances), typically an `EventArray`'s.
+        :param streams: A list of the file streams that may contain the
+            blocks' elements. Elements are stored with an index into this
+            list.
+        :return: A dictionary.
+    """
+    if not blocks:
+        return {'count': 0}
+
+    streamIdx = {id(s): i for i, s in enumerate(streams)}
+    classes = [b.__class__ for b in blocks]
+    if all(c is classes[0] for c in classes):
+        classes = classes[0]
+
+    elementNames = {}
+    elements = {}
+    for attr in ('element', '_payloadEl', '_minMeanMaxEl'):
+        els = [b.__dict__.get(attr) for b in blocks]
+        names = set(type(el).name for el in els if el is not None)
+        if not names:
+            continue
+        if len(names) > 1:
+            raise TypeError("Cannot pickle blocks with mixed %s types" % attr)
+        elementNames[attr] = names.pop()
+        elements[attr] = _compactInts(
+            [(-1, 0, 0, 0) if el is None else
+             (streamIdx[id(el.stream)], el.offset, el.size, el.payloadOffset)
+             for el in els])
+
+    keys = []
+    for b in blocks:
+        keys.extend(k for k in b.__dict__ if k not in keys)
+
+    columns = {}
+    sparse = {}
+    for k in keys:
+        if k in elements or k == '_payload':
+            continue
+        values = [b.__dict__.get(k, columns) for b in blocks]
+        if any(v is columns for v in values):
+            sparse[k] = {i: v for i, v in enumerate(values) if v is not columns}
+        else:
+            columns[k] = _packColumn(values)
+
+    return {'count': len(blocks), 'classes': classes, 'columns': columns,
+            'sparse': sparse, 'elementNames': elementNames,
+            'elements': elements}
+
+
+def unpackBlocks(packed, schema):
+    """ Recreate the data blocks packed by `packBlocks()`. The blocks'
+        elements have no stream; they must be bound to the file with
+        `bindBlocks()` before the blocks' data can be read.
+
+        :param packed: A dictionary created by `packBlocks()`.
+        :param schema: The EBML schema (for creating elements).
+        :return: A list of data blocks.
+    """
+    count = packed['count']
+    if not count:
+        return []
+
+    classes = packed['classes']
+    if isinstance(classes, type):
+        classes = [classes] * count
+    blocks = [cls.__new__(cls) for cls in classes]
+    dicts = [b.__dict__ for b in blocks]
+
+    for k, column in packed['columns'].items():
+        for d, v in zip(dicts, _unpackColumn(column, count)):
+            d[k] = v
+    for k, values in packed['sparse'].items():
+        for i, v in values.items():
+            dicts[i][k] = v
+
+    for attr, refs in packed['elements'].items():
+        elementType = schema[packed['elementNames'][attr]]
+        for d, (idx, offset, size, payloadOffset) in zip(dicts, refs.tolist()):
+            d[attr] = None if idx < 0 else elementType(None, offset, size,
+                                                       payloadOffset)
+    for d in dicts:
+        d['_payload'] = None
+
+    return blocks
+
+
+def bindBlocks(blocks, packed, streams):
+    """ Attach unpickled data blocks' elements to their file streams.
+
+        :param blocks: A list of blocks created by `unpackBlocks()`.
+        :param packed: The dictionary from which the blocks were unpacked.
+        :param streams: The file streams, in the same order as those given
+            to `packBlocks()`.
+    """
+    for attr, refs in packed.get('elements', {}).items():
+        for b, idx in zip(blocks, refs[:, 0].tolist()):
+            if idx >= 0:
+                b.__dict__[attr].stream = streams[idx]
+
+
 ################################################################################
 #===============================================================================
 #--- RecordingProperties element and sub-element parsers
@@ -1096,9 +1695,8 @@ class ChannelParser(ElementHandler):
         # No named parser, or the named parser was unknown
         if 'parser' not in data:
             if 'format' in data:
-                # build struct instead.
-                # future: Handle special (non-standard) format characters (TBD)
-                data['parser'] = struct.Struct(data.pop('format'))
+                # build struct (or packed format parser) instead.
+                data['parser'] = getFormatParser(data.pop('format'))
             else:
                 warnings.warn('Missing format definition for channel {}'.format(channelId))
                 data['parser'] = struct.Struct('b')
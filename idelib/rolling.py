@@ -0,0 +1,151 @@
+"""
+Vectorized rolling (moving) window statistics: mean, RMS, standard
+deviation, minimum, and maximum. Windows are defined by time, so they may
+contain different numbers of samples (e.g. at discontinuities). Sums are
+computed from cumulative sums; minimums and maximums from a sparse table
+of power-of-two ranges, so no statistic requires looping over samples in
+Python.
+
+These are used by `EventArray` for rolling mean removal (see
+`EventArray.rollingMeanSpan`) and by `EventArray.arrayRolling()`.
+"""
+
+import numpy as np
+
+__all__ = ['STATISTICS', 'getWindowBounds', 'windowStat', 'rollingStat']
+
+# ==============================================================================
+#
+# ==============================================================================
+
+#: The names of the supported statistics.
+STATISTICS = ('mean', 'rms', 'std', 'min', 'max')
+
+
+# ==============================================================================
+#
+# ==============================================================================
+
+def getWindowBounds(times, span, at=None):
+    """ Get the index ranges of the windows centered on a set of times.
+        Each window contains the samples with times greater than
+        ``t - span/2`` and less than or equal to ``t + span/2``.
+
+        :param times: A sorted array of sample times.
+        :param span: The width of the windows, in the same units as `times`.
+        :keyword at: The times at the centers of the windows. Defaults to
+            `times`.
+        :return: Two arrays: the first index in each window, and the last
+            index (exclusive).
+    """
+    if at is None:
+        at = times
+    half = span / 2.0
+    lo = np.searchsorted(times, at - half, side='right')
+    hi = np.searchsorted(times, at + half, side='right')
+    return lo, hi
+
+
+def _windowSums(values, lo, hi):
+    """ Get the sums of each row of values and of their squares within a
+        set of index ranges, using cumulative sums. The values are offset by
+        the first value in each row to reduce rounding error.
+
+        :return: The offsets, the sums of the offset values, and the sums of
+            their squares.
+    """
+    shift = values[:, :1]
+    shifted = values - shift
+    cumsum = np.zeros((values.shape[0], values.shape[1] + 1))
+    np.cumsum(shifted, axis=1, out=cumsum[:, 1:])
+    sums = cumsum[:, hi] - cumsum[:, lo]
+    shifted *= shifted
+    np.cumsum(shifted, axis=1, out=cumsum[:, 1:])
+    return shift, sums, cumsum[:, hi] - cumsum[:, lo]
+
+
+def _windowExtrema(values, lo, hi, func):
+    """ Get the minimum or maximum of each row of values within a set of
+        index ranges. A sparse table of the extrema of power-of-two length
+        ranges is built, up to the size needed for the longest window; each
+        window is covered by two (overlapping) ranges of the same length.
+
+        :param func: The reduction function, `np.minimum` or `np.maximum`.
+    """
+    lengths = hi - lo
+    levels = np.floor(np.log2(np.maximum(lengths, 1))).astype(np.int64)
+    out = np.empty((values.shape[0], len(lo)))
+
+    table = values
+    for k in range(int(levels.max()) + 1):
+        if k > 0:
+            width = 2 ** (k - 1)
+            table = func(table[:, :-width], table[:, width:])
+        use = np.flatnonzero(levels == k)
+        if len(use):
+            out[:, use] = func(table[:, lo[use]],
+                               table[:, hi[use] - 2**k])
+    return out
+
+
+def windowStat(values, lo, hi, stat='mean'):
+    """ Compute a statistic of each row of values within a set of index
+        ranges.
+
+        :param values: A 2D array of values (e.g. subchannels x samples).
+        :param lo: An array of the first index of each range.
+        :param hi: An array of the last index of each range (exclusive).
+            All ranges must contain at least one value.
+        :keyword stat: The statistic to compute: ``'mean'``, ``'rms'``,
+            ``'std'``, ``'min'``, or ``'max'``.
+        :return: A 2D array, one column per range.
+    """
+    if stat not in STATISTICS:
+        raise ValueError("Unknown statistic %r; must be one of %s" %
+                         (stat, ', '.join(STATISTICS)))
+
+    values = np.asarray(values, dtype=np.float64)
+    lo = np.asarray(lo, dtype=np.int64)
+    hi = np.asarray(hi, dtype=np.int64)
+    if len(lo) == 0:
+        return np.empty((values.shape[0], 0))
+    if (hi <= lo).any():
+        raise ValueError("Windows must contain at least one value")
+
+    if stat == 'min':
+        return _windowExtrema(values, lo, hi, np.minimum)
+    elif stat == 'max':
+        return _windowExtrema(values, lo, hi, np.maximum)
+
+    counts = hi - lo
+    shift, sums, sumsSq = _windowSums(values, lo, hi)
+    mean = sums / counts
+    if stat == 'mean':
+        return mean + shift
+    elif stat == 'std':
+        return np.sqrt(np.maximum(sumsSq / counts - mean * mean, 0))
+
+    # RMS of the unshifted values
+    meanSq = sumsSq / counts + 2 * shift * mean + shift * shift
+    return np.sqrt(np.maximum(meanSq, 0))
+
+
+def rollingStat(times, values, span, stat='mean'):
+    """ Compute a rolling (moving) statistic, using a window of a given
+        length of time centered on each sample.
+
+        :param times: A sorted array of sample times.
+        :param values: An array of values, either 1D or 2D (e.g.
+            subchannels x samples).
+        :param span: The width of the window, in the same units as `times`.
+        :keyword stat: The statistic to compute: ``'mean'``, ``'rms'``,
+            ``'std'``, ``'min'``, or ``'max'``.
+        :return: An array of the same shape as `values`.
+    """
+    if not span > 0:
+        raise ValueError("span must be greater than 0, got %r" % span)
+    values = np.asarray(values, dtype=np.float64)
+    lo, hi = getWindowBounds(np.asarray(times), span)
+    if values.ndim == 1:
+        return windowStat(values[np.newaxis], lo, hi, stat)[0]
+    return windowStat(values, lo, hi, stat)
@@ -0,0 +1,472 @@
+"""
+Sharing loaded data with other processes (e.g. `ProcessPoolExecutor`
+workers) without pickling or copying it. A channel's sample values and
+block table are placed in `multiprocessing.shared_memory` blocks, described
+by a small picklable `SharedDataset`. Workers attach to it and get
+read-only, `EventArray`-like views of the data::
+
+    with doc.exportShared() as shared:
+        with ProcessPoolExecutor() as pool:
+            results = pool.map(analyze, [(shared, chId) for chId in shared.channels])
+
+    def analyze(args):
+        shared, chId = args
+        with shared.attach() as view:
+            return view.channels[chId].arrayValues().std(axis=1)
+
+The values are those of `EventArray.arrayValues()` (i.e. with transforms
+applied), computed once by the exporting process. Event times are computed
+from the block table, like those of an `EventArray`, so they aren't stored.
+The exporting process owns the shared memory, and must keep the
+`SharedDataset` open until the workers are done with it.
+"""
+
+from multiprocessing import shared_memory
+import sys
+
+import numpy as np
+
+from .dataset import EventArray
+
+__all__ = ['SharedDataset', 'SharedDatasetView', 'SharedEventArray',
+           'exportShared']
+
+# ==============================================================================
+#
+# ==============================================================================
+
+# The names of the block table columns (see `EventArray._getBlockTable()`)
+BLOCK_TABLE = ('starts', 'ends', 'firsts', 'counts', 'periods')
+
+
+def _createMemory(array):
+    """ Copy an array into a new shared memory block.
+
+        :return: The `SharedMemory` and a description of the array (the
+            memory block's name, the array's shape and dtype).
+    """
+    array = np.ascontiguousarray(array)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    np.ndarray(array.shape, array.dtype, buffer=shm.buf)[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def _getTracker():
+    """ Get the process ID of the resource tracker used by this process to
+        clean up shared memory, or `None` if unknown (e.g. it was started by
+        a parent process, or the platform has no resource tracker).
+    """
+    if sys.platform == 'win32':
+        return None
+    from multiprocessing import resource_tracker
+    return resource_tracker._resource_tracker._pid
+
+
+def _attachMemory(name, tracker=None):
+    """ Attach to an existing shared memory block. Processes not started by
+        `multiprocessing` have their own resource tracker, which would
+        destroy the memory (or warn about it) when the process exits; the
+        block isn't registered with it.
+
+        :param name: The name of the shared memory block.
+        :keyword tracker: The process ID of the resource tracker of the
+            process that created the memory (see `_getTracker()`).
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)
+
+    shm = shared_memory.SharedMemory(name)
+    current = _getTracker()
+    if current is not None and current != tracker:
+        # A different tracker. Child processes share their parent's (and
+        # registering the memory again has no effect).
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+# ==============================================================================
+#
+# ==============================================================================
+
+class SharedDataset(object):
+    """ A picklable description of data placed in shared memory by
+        `exportShared()`. The exporting process owns the shared memory; it
+        is released by `close()` (or leaving a ``with`` block). Other
+        processes use `attach()` to access the data.
+
+        :ivar name: The name of the `Dataset`.
+        :ivar channels: A dictionary of channel descriptions, keyed by
+            channel ID. Each is a dictionary containing the channel's
+            ``'name'``, ``'subchannels'`` (names), ``'units'``,
+            ``'singleSample'``, ``'sampleRate'``, ``'length'``,
+            ``'segments'`` (the index of the first event after each
+            discontinuity), and ``'arrays'`` (the shared memory block names,
+            shapes and dtypes).
+    """
+
+    def __init__(self, name, channels, memory):
+        """ Constructor. Instances should be created by `exportShared()`.
+        """
+        self.name = name
+        self.channels = channels
+        self._memory = memory
+        self._tracker = _getTracker()
+
+
+    def __repr__(self):
+        return "<%s %r: %d channels>" % (self.__class__.__name__, self.name,
+                                         len(self.channels))
+
+
+    def __getstate__(self):
+        # Only the description is sent to other processes.
+        state = self.__dict__.copy()
+        state['_memory'] = None
+        return state
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
+
+
+    @property
+    def nbytes(self):
+        """ The total size of the shared data, in bytes. """
+        total = 0
+        for info in self.channels.values():
+            for _name, shape, dtype in info['arrays'].values():
+                total += int(np.prod(shape)) * np.dtype(dtype).itemsize
+        return total
+
+
+    def attach(self):
+        """ Attach to the shared data.
+
+            :return: A `SharedDatasetView`.
+        """
+        return SharedDatasetView(self)
+
+
+    def close(self):
+        """ Release the shared memory. Only effective in the process that
+            created it; views attached in other processes become invalid.
+        """
+        if not self._memory:
+            return
+        for shm in self._memory:
+            shm.close()
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._memory = None
+
+
+class SharedDatasetView(object):
+    """ Read-only access to data shared by another process. Created by
+        `SharedDataset.attach()`.
+
+        :ivar name: The name of the original `Dataset`.
+        :ivar channels: A dictionary of `SharedEventArray` objects, keyed by
+            channel ID.
+    """
+
+    def __init__(self, shared):
+        """ Constructor.
+
+            :param shared: The `SharedDataset` to attach.
+        """
+        self.name = shared.name
+        self.channels = {}
+        self._memory = []
+        for chId, info in shared.channels.items():
+            arrays = {}
+            for key, (name, shape, dtype) in info['arrays'].items():
+                shm = _attachMemory(name, shared._tracker)
+                self._memory.append(shm)
+                arr = np.ndarray(shape, dtype, buffer=shm.buf)
+                arr.setflags(write=False)
+                arrays[key] = arr
+            self.channels[chId] = SharedEventArray(chId, info, arrays)
+
+
+    def __repr__(self):
+        return "<%s %r: %d channels>" % (self.__class__.__name__, self.name,
+                                         len(self.channels))
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
+
+
+    def close(self):
+        """ Detach from the shared data. Memory still referenced by arrays
+            obtained from the view stays mapped until they are deleted.
+        """
+        self.channels = {}
+        for shm in self._memory:
+            try:
+                shm.close()
+            except BufferError:
+                # Views of the memory still exist; it is closed (and the
+                # mapping released) when they are garbage collected.
+                pass
+        self._memory = []
+
+
+class SharedEventArray(object):
+    """ A read-only, `EventArray`-like view of a channel's shared data.
+        Supports the `EventArray` methods used for analysis: `arraySlice()`,
+        `arrayValues()`, `arrayRange()`, `getRangeIndices()`,
+        `getSegments()`, `getSampleRate()`, and `getInterval()`.
+
+        :ivar channelId: The ID of the original channel.
+        :ivar name: The name of the original channel.
+        :ivar subchannelNames: The names of the channel's subchannels.
+        :ivar units: The subchannels' units, as (label, units) tuples.
+        :ivar singleSample: `True` if each of the channel's blocks holds a
+            single event.
+    """
+
+    def __init__(self, channelId, info, arrays):
+        """ Constructor. Instances should be created by attaching to a
+            `SharedDataset`.
+        """
+        self.channelId = channelId
+        self.name = info['name']
+        self.subchannelNames = info['subchannels']
+        self.units = info['units']
+        self.singleSample = info['singleSample']
+        self._sampleRate = info['sampleRate']
+        self._length = info['length']
+        self._segmentBounds = np.array(info['segments'], dtype=np.int64)
+        self._values = arrays['values']
+        self._blockTable = tuple(arrays[k] for k in BLOCK_TABLE)
+
+
+    def __repr__(self):
+        return "<%s %r: %d events>" % (self.__class__.__name__, self.name,
+                                       len(self))
+
+
+    def __len__(self):
+        return self._length
+
+
+    def __getitem__(self, idx):
+        """ Get an event (its time and values) by index. """
+        if isinstance(idx, slice):
+            return self.arraySlice(idx).T
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("%s index out of range" % self.__class__.__name__)
+        return np.append(self._timesFromIndices([idx]), self._values[:, idx])
+
+
+    def _getBlockTable(self):
+        return self._blockTable
+
+
+    def _getSegmentBounds(self):
+        return self._segmentBounds
+
+
+    # Event times are computed from the block table, as in `EventArray`.
+    _timesFromIndices = EventArray._timesFromIndices
+    _getEventIndicesBefore = EventArray._getEventIndicesBefore
+
+
+    def getSampleRate(self, idx=None):
+        """ Get the channel's sample rate (samples per second). """
+        return self._sampleRate
+
+
+    def getInterval(self):
+        """ Get the first and last event times. """
+        if not len(self):
+            return None
+        starts, ends, _firsts, _counts, _periods = self._blockTable
+        return float(starts[0]), float(ends[-1])
+
+
+    def getRangeIndices(self, startTime, endTime):
+        """ Get the first and last event indices that fall within the
+            specified interval. See `EventArray.getRangeIndices()`.
+
+            :keyword startTime: The first time (in microseconds by default),
+                `None` to start at the beginning.
+            :keyword endTime: The second time, or `None` to use the end.
+        """
+        if not len(self):
+            return 0, 0
+
+        starts, ends, _firsts, _counts, _periods = self._blockTable
+        if self.singleSample:
+            # One event per block: find the events on or before the times
+            def _before(t):
+                return max(0, int(np.searchsorted(starts, t, side='right')) - 1)
+            startIdx = 0 if startTime is None else _before(startTime)
+            endIdx = len(self) if endTime is None else _before(endTime) + 1
+            return startIdx, endIdx
+
+        firstTime = starts[0]
+        times = np.array([firstTime if startTime is None else startTime,
+                          firstTime if endTime is None else endTime],
+                         dtype=np.float64)
+        before = self._getEventIndicesBefore(times)
+
+        if startTime is None or startTime <= firstTime:
+            startIdx = 0
+        else:
+            startIdx = int(before[0]) + 1
+
+        if endTime is None:
+            endIdx = len(self)
+        elif endTime <= firstTime:
+            endIdx = 0
+        else:
+            endIdx = int(before[1]) + 1
+            blockIdx = np.searchsorted(starts, times[1], side='right') - 1
+            if times[1] > ends[blockIdx]:
+                endIdx += 1
+
+        return max(0, startIdx), min(endIdx, len(self))
+
+
+    def getSegments(self, startTime=None, endTime=None, indices=False):
+        """ Get the contiguous segments of the data: the spans between
+            discontinuities. See `EventArray.getSegments()`.
+        """
+        start, end = self.getRangeIndices(startTime, endTime)
+        if end <= start:
+            segments = np.empty((0, 2), dtype=np.int64)
+        else:
+            bounds = self._segmentBounds
+            bounds = bounds[(bounds > start) & (bounds < end)]
+            edges = np.concatenate(([start], bounds, [end]))
+            segments = np.column_stack((edges[:-1], edges[1:]))
+
+        if indices:
+            return segments
+
+        times = np.empty(segments.shape, dtype=np.float64)
+        times[:, 0] = self._timesFromIndices(segments[:, 0])
+        times[:, 1] = self._timesFromIndices(segments[:, 1] - 1)
+        return times
+
+
+    def arrayValues(self, start=None, end=None, step=1, subchannels=None):
+        """ Get the values of a range of events, by index. The result is a
+            read-only view of the shared data (unless subchannels are
+            selected).
+
+            :keyword start: The first index, or a slice.
+            :keyword end: The last index (exclusive).
+            :keyword step: The step between indices.
+            :keyword subchannels: A list of subchannel indices to include.
+                Defaults to all.
+            :return: A 2D array (subchannels x events).
+        """
+        key = start if isinstance(start, slice) else slice(start, end, step)
+        values = self._values[:, key]
+        if subchannels is not None:
+            values = values[list(subchannels)]
+        return values
+
+
+    def arraySlice(self, start=None, end=None, step=1):
+        """ Get the times and values of a range of events, by index.
+
+            :keyword start: The first index, or a slice.
+            :keyword end: The last index (exclusive).
+            :keyword step: The step between indices.
+            :return: A 2D array with a row of times followed by a row for
+                each subchannel.
+        """
+        key = start if isinstance(start, slice) else slice(start, end, step)
+        r = range(len(self))[key]
+        values = self._values[:, key]
+        out = np.empty((values.shape[0] + 1, values.shape[1]))
+        out[0] = self._timesFromIndices(np.arange(r.start, r.stop, r.step))
+        out[1:] = values
+        return out
+
+
+    def arrayRange(self, startTime=None, endTime=None, step=1):
+        """ Get the times and values of the events in a time interval.
+
+            :keyword startTime: The first time (microseconds), `None` to
+                start at the beginning.
+            :keyword endTime: The second time, or `None` to use the end.
+            :keyword step: The step between events.
+            :return: A 2D array with a row of times followed by a row for
+                each subchannel.
+        """
+        start, end = self.getRangeIndices(startTime, endTime)
+        return self.arraySlice(start, end, step)
+
+
+# ==============================================================================
+#
+# ==============================================================================
+
+def exportShared(dataset, channels=None, sessionId=None, display=False):
+    """ Place channels' data in shared memory, for use by other processes.
+
+        :param dataset: The `Dataset` to share. Its data must be fully
+            imported.
+        :keyword channels: A list of channel IDs to share. Defaults to all.
+        :keyword sessionId: The session to share. Defaults to the last.
+        :keyword display: If `True`, the final 'display' transform (e.g.
+            unit conversion) is applied to the values.
+        :return: A `SharedDataset`, which can be sent to other processes.
+            Call its `close()` method when the data is no longer needed.
+    """
+    if dataset.loading:
+        raise ValueError("Cannot share a dataset that is still loading")
+
+    memory = []
+    described = {}
+    try:
+        for chId, channel in dataset.channels.items():
+            if channels is not None and chId not in channels:
+                continue
+            session = channel.getSession(sessionId)
+            values = session.arrayValues(display=display) if len(session) else \
+                np.empty((len(channel.subchannels), 0))
+            arrays = {}
+            shm, arrays['values'] = _createMemory(np.asarray(values, dtype=np.float64))
+            memory.append(shm)
+            table = session._getBlockTable() if len(session) else \
+                [np.empty(0)] * len(BLOCK_TABLE)
+            for key, arr in zip(BLOCK_TABLE, table):
+                shm, arrays[key] = _createMemory(arr)
+                memory.append(shm)
+
+            described[chId] = {
+                'name': channel.name,
+                'subchannels': [sc.name for sc in channel.subchannels],
+                'units': [sc.units for sc in channel.subchannels],
+                'singleSample': bool(channel.singleSample),
+                'sampleRate': session.getSampleRate() if len(session) else None,
+                'length': len(session),
+                'segments': session._getSegmentBounds().tolist(),
+                'arrays': arrays,
+            }
+    except Exception:
+        for shm in memory:
+            shm.close()
+            shm.unlink()
+        raise
+
+    return SharedDataset(dataset.name, described, memory)
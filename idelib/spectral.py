@@ -0,0 +1,291 @@
+"""
+Spectral analysis of `EventArray` data: Welch power spectral density,
+frequency band RMS, and spectrograms. Data is read in batches of
+overlapping windows, so memory use is bounded regardless of the length of
+the recording. Windows never span a discontinuity (a gap between blocks).
+
+The functions here are also available as methods of `EventArray`
+(`getPSD()`, `getBandRMS()`, and `getSpectrogram()`).
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+__all__ = ['getContiguousRanges', 'welch', 'bandRMS', 'spectrogram']
+
+# ==============================================================================
+#
+# ==============================================================================
+
+logger = logging.getLogger('idelib')
+
+# The default number of samples processed in each batch of windows (per
+# subchannel). Limits the memory used.
+BATCH_SIZE = 2**20
+
+
+# ==============================================================================
+#
+# ==============================================================================
+
+def getContiguousRanges(eventArray, start=0, end=None, tolerance=None):
+    """ Get the ranges of event indices without discontinuities, i.e. in
+        which the blocks directly follow one another.
+
+        :param eventArray: The `EventArray` to check.
+        :keyword start: The first event index.
+        :keyword end: The last event index (exclusive). Defaults to the end.
+        :keyword tolerance: The amount of a sample period by which the time
+            between blocks may exceed the sample period before being
+            considered a gap. Defaults to using the discontinuities found
+            when the data was imported (see `EventArray.getSegments()`).
+        :return: A list of ranges, each a tuple containing the first and
+            last (exclusive) event index.
+    """
+    if end is None:
+        end = len(eventArray)
+    if end <= start:
+        return []
+
+    if tolerance is None:
+        bounds = eventArray._getSegmentBounds()
+    else:
+        starts, ends, firsts, _counts, _periods = eventArray._getBlockTable()
+        expected = 1e6 / eventArray.getSampleRate()
+        gaps = np.flatnonzero(starts[1:] - ends[:-1] > expected * (1 + tolerance)) + 1
+        bounds = firsts[gaps]
+    bounds = bounds[(bounds > start) & (bounds < end)]
+    edges = np.concatenate(([start], bounds, [end]))
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:])]
+
+
+def _getWindow(window, size):
+    """ Get the window function values. Named windows are periodic, as used
+        for spectral analysis.
+    """
+    if isinstance(window, str):
+        n = np.arange(size)
+        if window in ('hann', 'hanning'):
+            return 0.5 - 0.5 * np.cos(2 * np.pi * n / size)
+        elif window == 'hamming':
+            return 0.54 - 0.46 * np.cos(2 * np.pi * n / size)
+        elif window in ('boxcar', 'rectangular', 'rect'):
+            return np.ones(size)
+        raise ValueError("Unknown window type: %r" % window)
+
+    window = np.asarray(window, dtype=np.float64)
+    if window.shape != (size,):
+        raise ValueError("Window must have %d values, got shape %r" %
+                         (size, window.shape))
+    return window
+
+
+def _windowView(values, size, step):
+    """ Get a read-only view of the overlapping windows in each row of a 2D
+        array, without copying. Equivalent to NumPy's `sliding_window_view()`
+        (only in NumPy 1.20 and later) taking every `step`th window.
+
+        :return: An array view (rows x windows x `size`).
+    """
+    numWindows = max(0, (values.shape[-1] - size) // step + 1)
+    rowStride, colStride = values.strides
+    return as_strided(values, shape=(values.shape[0], numWindows, size),
+                      strides=(rowStride, colStride * step, colStride),
+                      writeable=False)
+
+
+def _batchPower(values, window, step):
+    """ Compute the power spectra of the overlapping windows in a batch of
+        data. Run in worker threads.
+
+        :return: An array of power (subchannels x windows x frequencies).
+    """
+    segments = _windowView(values, len(window), step)
+    segments = segments - segments.mean(axis=-1, keepdims=True)
+    segments *= window
+    spectrum = np.fft.rfft(segments, axis=-1)
+    return spectrum.real**2 + spectrum.imag**2
+
+
+def _iterPower(eventArray, startTime, endTime, windowSize, overlap, window,
+               display, maxWorkers, batchSize, groupSize=1):
+    """ Generate the power spectra of each window, batch by batch. Data is
+        read in the calling thread; the FFTs are computed in a thread pool,
+        with a limited number of batches in progress.
+
+        :return: A tuple containing the sample rate, the window function
+            values, and a generator yielding tuples of the batch's window
+            start indices and power (subchannels x windows x frequencies).
+    """
+    if windowSize < 2:
+        raise ValueError("windowSize must be at least 2, got %r" % windowSize)
+    if not 0 <= overlap < 1:
+        raise ValueError("overlap must be at least 0 and less than 1, got %r"
+                         % overlap)
+
+    window = _getWindow(window, windowSize)
+    step = max(1, int(windowSize * (1 - overlap)))
+    start, end = eventArray.getRangeIndices(startTime, endTime)
+    ranges = [(a, b) for a, b in getContiguousRanges(eventArray, start, end)
+              if b - a >= windowSize]
+    if not ranges:
+        raise ValueError("No contiguous data at least %d samples long in "
+                         "the specified range" % windowSize)
+
+    # Number of windows per batch, a multiple of the group size
+    perBatch = max(1, (batchSize - windowSize) // step + 1)
+    perBatch = max(groupSize, perBatch - perBatch % groupSize)
+
+    def _iterBatches():
+        for a, b in ranges:
+            numWindows = (b - a - windowSize) // step + 1
+            for w in range(0, numWindows, perBatch):
+                n = min(perBatch, numWindows - w)
+                lo = a + w * step
+                hi = lo + (n - 1) * step + windowSize
+                values = eventArray.arrayValues(lo, hi, display=display)
+                yield lo + np.arange(n) * step, values
+
+    def _generate():
+        maxPending = 2 * (maxWorkers or os.cpu_count() or 1)
+        with ThreadPoolExecutor(maxWorkers) as pool:
+            pending = deque()
+            for indices, values in _iterBatches():
+                pending.append((indices, pool.submit(_batchPower, values,
+                                                     window, step)))
+                if len(pending) >= maxPending:
+                    indices, future = pending.popleft()
+                    yield indices, future.result()
+            while pending:
+                indices, future = pending.popleft()
+                yield indices, future.result()
+
+    return eventArray.getSampleRate(), window, _generate()
+
+
+def _scaleDensity(power, fs, window):
+    """ Scale summed power as a one-sided power spectral density, in place.
+    """
+    power /= fs * (window * window).sum()
+    if len(window) % 2:
+        power[..., 1:] *= 2
+    else:
+        power[..., 1:-1] *= 2
+    return power
+
+
+def welch(eventArray, startTime=None, endTime=None, windowSize=4096,
+          overlap=0.5, window='hann', display=False, maxWorkers=None,
+          batchSize=BATCH_SIZE):
+    """ Compute the power spectral density of each subchannel using Welch's
+        method: the average of the spectra of overlapping, windowed, and
+        detrended (mean-removed) segments of the data.
+
+        :param eventArray: The `EventArray` to analyze.
+        :keyword startTime: The first time (in microseconds by default),
+            `None` to start at the beginning of the session.
+        :keyword endTime: The second time, or `None` to use the end of the
+            session.
+        :keyword windowSize: The number of samples in each segment.
+        :keyword overlap: The fraction of each segment overlapping the next.
+        :keyword window: The window function: 'hann', 'hamming', 'boxcar',
+            or an array of `windowSize` values.
+        :keyword display: If `True`, the final 'display' transform (e.g.
+            unit conversion) will be applied to the data.
+        :keyword maxWorkers: The maximum number of threads computing FFTs.
+            Defaults to the `ThreadPoolExecutor` default.
+        :keyword batchSize: The approximate number of samples (per
+            subchannel) read at once.
+        :return: A tuple containing an array of frequencies (Hz) and an
+            array of power spectral densities (subchannels x frequencies,
+            in units squared per Hz).
+    """
+    fs, win, batches = _iterPower(eventArray, startTime, endTime, windowSize,
+                                  overlap, window, display, maxWorkers,
+                                  batchSize)
+    total = None
+    count = 0
+    for _indices, power in batches:
+        summed = power.sum(axis=1)
+        total = summed if total is None else total + summed
+        count += power.shape[1]
+
+    freqs = np.fft.rfftfreq(windowSize, 1.0 / fs)
+    return freqs, _scaleDensity(total / count, fs, win)
+
+
+def bandRMS(eventArray, bands, startTime=None, endTime=None, **kwargs):
+    """ Compute the RMS of each subchannel within one or more frequency
+        bands, from the Welch power spectral density.
+
+        :param eventArray: The `EventArray` to analyze.
+        :param bands: A list of frequency bands, each a tuple containing
+            the lower and upper frequencies (Hz, inclusive).
+        :keyword startTime: The first time (in microseconds by default),
+            `None` to start at the beginning of the session.
+        :keyword endTime: The second time, or `None` to use the end of the
+            session.
+        :return: An array of RMS values (subchannels x bands).
+
+        Additional keyword arguments are passed to `welch()`.
+    """
+    freqs, psd = welch(eventArray, startTime, endTime, **kwargs)
+    df = freqs[1] - freqs[0]
+    out = np.empty((psd.shape[0], len(bands)))
+    for i, (lo, hi) in enumerate(bands):
+        mask = (freqs >= lo) & (freqs <= hi)
+        out[:, i] = np.sqrt(psd[:, mask].sum(axis=-1) * df)
+    return out
+
+
+def spectrogram(eventArray, startTime=None, endTime=None, windowSize=4096,
+                overlap=0.5, window='hann', average=1, display=False,
+                maxWorkers=None, batchSize=BATCH_SIZE):
+    """ Compute a spectrogram (power spectral density over time) of each
+        subchannel. Each time slice is the average of one or more
+        overlapping windows; slices never span discontinuities.
+
+        :param eventArray: The `EventArray` to analyze.
+        :keyword startTime: The first time (in microseconds by default),
+            `None` to start at the beginning of the session.
+        :keyword endTime: The second time, or `None` to use the end of the
+            session.
+        :keyword windowSize: The number of samples in each window.
+        :keyword overlap: The fraction of each window overlapping the next.
+        :keyword window: The window function: 'hann', 'hamming', 'boxcar',
+            or an array of `windowSize` values.
+        :keyword average: The number of consecutive windows averaged in
+            each time slice, to reduce the size of the results.
+        :keyword display: If `True`, the final 'display' transform (e.g.
+            unit conversion) will be applied to the data.
+        :keyword maxWorkers: The maximum number of threads computing FFTs.
+        :keyword batchSize: The approximate number of samples (per
+            subchannel) read at once.
+        :return: A tuple containing an array of the times at the center of
+            each slice (microseconds), an array of frequencies (Hz), and an
+            array of power spectral densities (subchannels x frequencies x
+            times).
+    """
+    average = max(1, int(average))
+    fs, win, batches = _iterPower(eventArray, startTime, endTime, windowSize,
+                                  overlap, window, display, maxWorkers,
+                                  batchSize, groupSize=average)
+    times = []
+    slices = []
+    for indices, power in batches:
+        groups = np.arange(0, len(indices), average)
+        counts = np.diff(np.append(groups, len(indices)))
+        slices.append(np.add.reduceat(power, groups, axis=1)
+                      / counts[np.newaxis, :, np.newaxis])
+        lastIndices = indices[groups + counts - 1] + windowSize - 1
+        times.append((eventArray._timesFromIndices(indices[groups])
+                      + eventArray._timesFromIndices(lastIndices)) / 2)
+
+    freqs = np.fft.rfftfreq(windowSize, 1.0 / fs)
+    sxx = _scaleDensity(np.concatenate(slices, axis=1), fs, win)
+    return np.concatenate(times), freqs, np.swapaxes(sxx, 1, 2)
@@ -9,10 +9,11 @@ being in how they are used.
 __all__ = ['Transform', 'Univariate', 'Bivariate', 'CombinedPoly', 'PolyPoly',
            'AccelTransform']
 
+from functools import wraps
+import importlib
 import logging
 import math
 import sys
-from time import sleep
 import warnings
 import weakref
 
@@ -26,7 +27,40 @@ else:
     Dict = dict
 
 logger = logging.getLogger('idelib')
-logging.basicConfig(format="%(asctime)s %(levelname)s: %(message)s")
+
+
+#===============================================================================
+# 
+#===============================================================================
+
+def _timed(method):
+    """ Decorator for `inplace()` methods, adding the time spent to the
+        parent `Dataset`'s ``'calibration'`` timer if instrumentation is
+        enabled (see `Dataset.enableStats()`).
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        stats = getattr(getattr(self, 'dataset', None), 'stats', None)
+        if stats is None:
+            return method(self, *args, **kwargs)
+        with stats.timer('calibration'):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _packGlobals(namespace):
+    """ Get a picklable version of a compiled transform function's globals:
+        modules are replaced by their names.
+    """
+    return {k: (True, v.__name__) if isinstance(v, type(math)) else (False, v)
+            for k, v in namespace.items() if k != '__builtins__'}
+
+
+def _unpackGlobals(packed):
+    """ Recreate the globals packed by `_packGlobals()`.
+    """
+    return {k: importlib.import_module(v) if isModule else v
+            for k, (isModule, v) in packed.items()}
 
 
 #===============================================================================
@@ -94,6 +128,32 @@ class Transform(object):
         return not self.__eq__(other)
 
 
+    def __getstate__(self):
+        # The compiled function and the (weak) set of watchers can't be
+        # pickled. They are recreated on first use after unpickling (see
+        # `__getattr__()`), when any transforms they use have been restored.
+        state = self.__dict__.copy()
+        function = state.pop('_function', None)
+        if function is not None:
+            state['_functionGlobals'] = _packGlobals(function.__globals__)
+        state['_watcherList'] = list(state.pop('_watchers', ()))
+        return state
+
+
+    def __getattr__(self, name):
+        # Only called if the attribute doesn't exist, i.e. after unpickling.
+        state = self.__dict__
+        if name == '_function' and '_functionGlobals' in state:
+            self._function = eval(state['_source'],
+                                  _unpackGlobals(state.pop('_functionGlobals')))
+            return self._function
+        elif name == '_watchers' and '_watcherList' in state:
+            self._watchers = weakref.WeakSet(state.pop('_watcherList'))
+            return self._watchers
+        raise AttributeError("%r object has no attribute %r" %
+                             (self.__class__.__name__, name))
+
+
     @property
     def function(self):
         """ The generated polynomial function itself. """
@@ -170,8 +230,46 @@ class ComplexTransform(Transform):
 
         Instances are function-like objects that take one argument: a sensor
         reading.
+
+        Subclasses that set `supportsOut` to `True` must implement `function`
+        with ufuncs, taking an optional `out` keyword argument (a float64
+        array the same shape as the input, into which the results are
+        written). Otherwise, the function's result is copied into `out`.
     """
+    supportsOut = False
+
+    @classmethod
+    def _arrayArgs(cls, values, out=None):
+        """ Helper method for `function` implementations that support `out`.
+            Normalizes the input to an array, allocating a float64 output array
+            if none is supplied.
+
+            :param values: A scalar or array-like of (real) numbers.
+            :keyword out: An optional array in which to store the results.
+            :return: A tuple containing the input as an array, the output
+                array, and whether the original input was a scalar.
+        """
+        scalar = np.isscalar(values)
+        values = np.asarray(values)
+        if values.dtype.kind not in 'biuf':
+            raise TypeError('Cannot convert values of type %s' % values.dtype)
+        if out is None:
+            out = np.empty(values.shape, dtype=np.float64)
+        return values, out, scalar
+
+
+    def _applyFunction(self, values, *args, out=None):
+        """ Apply `function` to an array of values, writing the results to
+            `out`.
+        """
+        if self.supportsOut:
+            self.function(values, *args, out=out)
+        else:
+            out[...] = self.function(values, *args)
+        return out
+
 
+    @_timed
     def inplace(self, values, y=None, timestamp=None, session=None, noBivariates=False, out=None):
         """ In-place transform for the `ComplexTransform` transform.  These functions
             can't be easily reduced and combined like polynomials, so this instead
@@ -188,9 +286,9 @@ class ComplexTransform(Transform):
         if len(self._variables) == 1:
 
             if scalar:
-                out = self.function(values)
+                out = float(self.function(values))
             else:
-                out[:] = self.function(values)
+                self._applyFunction(values, out=out)
         else:
 
             session = self.dataset.lastSession if session is None else session
@@ -217,13 +315,13 @@ class ComplexTransform(Transform):
             elif y is None and timestamp is None:
                 y = self._eventlist.getMean()
             elif y is None and timestamp is not None:
-                y = np.fromiter((self._eventlist[self._eventlist.getEventIndexNear(t)][0] for t in
-                                 timestamp), dtype=np.float64)
+                y = self._eventlist.getValuesAt(timestamp, method='nearest',
+                                                outOfRange=True)[1]
 
             if scalar:
                 out = self.function(values, y)
             else:
-                out[:] = self.function(values, y)
+                self._applyFunction(values, y, out=out)
 
         return out
 
@@ -267,6 +365,19 @@ class AccelTransform(Transform):
         return t
 
 
+    @_timed
+    def inplace(self, values, y=None, timestamp=None, session=None, noBivariates=False, out=None):
+        """ In-place transform for the `AccelTransform` transform. The user
+            can supply an `out` argument to save the results to that array,
+            or leave `out` equal to `None`.
+        """
+        if np.isscalar(values):
+            return float(values) * self.coefficients[0]
+        if out is None:
+            out = np.empty_like(values, dtype=np.float64)
+        return np.multiply(values, self.coefficients[0], out=out)
+
+
 #===============================================================================
 # Polynomial Generators
 #===============================================================================
@@ -434,6 +545,7 @@ class Univariate(Transform):
         self._function = eval(self._source, {'math': math})
 
 
+    @_timed
     def inplace(self, values, y=None, timestamp=None, session=None, noBivariates=False, out=None):
         """ In-place transform for the `Univariate` transform.  It reduces the
             number of array allocations/operations compared to the normal
@@ -537,6 +649,10 @@ class Bivariate(Univariate):
         Instances are function-like objects that take one argument: a sensor
         reading time and value.
     """
+
+    # The reference session for which waiting for data timed out, if any;
+    # it isn't waited for again. See `_waitForReference()`.
+    _timedOut = None
     
     def __init__(self, coeffs, calId=None, dataset=None, reference=0, 
                  reference2=0, channelId=None, subchannelId=None, varNames="xy",
@@ -701,6 +817,7 @@ class Bivariate(Univariate):
         self._noY = (0, 1) if 'y' not in src else False
 
 
+    @_timed
     def inplace(self, values, y=None, timestamp=None, session=None, noBivariates=False, out=None):
         """ In-place transform for the `Bivariate` transform.  It reduces the
             number of array allocations/operations compared to the normal
@@ -766,6 +883,9 @@ class Bivariate(Univariate):
                            err.__class__.__name__, self.id)
             return None
 
+        if not noBivariates:
+            self._waitForReference()
+
         if noBivariates:
             y = 0
         elif self.useMean:
@@ -773,7 +893,8 @@ class Bivariate(Univariate):
         elif y is None and timestamp is None:
             y = self._eventlist.getMean()
         elif y is None and timestamp is not None:
-            y = np.fromiter((self._eventlist[self._eventlist.getEventIndexNear(t)][0] for t in timestamp), dtype=np.float64)
+            y = self._eventlist.getValuesAt(timestamp, method='nearest',
+                                            outOfRange=True)[1]
 
         if len(self._fastCoeffs) == 1:
             if scalar:
@@ -819,7 +940,12 @@ class Bivariate(Univariate):
                 channel = self.dataset.channels[self.channelId][self.subchannelId]
                 self._eventlist = channel.getSession(session.sessionId)
                 self._sessionId = session.sessionId
-            if len(self._eventlist) == 0:
+            if noBivariates:
+                # The reference channel isn't used; don't wait for it.
+                ready = len(self._eventlist) > 0
+            else:
+                ready = self._waitForReference()
+            if not ready:
                 return timestamp, value
             
             # Optimization: don't check the other channel if Y is unused
@@ -857,8 +983,11 @@ class Bivariate(Univariate):
         return cal
 
 
-    def isValid(self, session=None, noBivariates=False, _retries=3):
-        """ Check the validity of the Transform.
+    def isValid(self, session=None, noBivariates=False):
+        """ Check the validity of the Transform. If the reference channel
+            has no data yet but is being imported in another thread, this
+            waits (once, up to `EventArray.WAIT_TIMEOUT`) for the importer
+            to add some.
         
             :keyword session: The session to check (could be valid in one and
                 invalid in another, e.g. one session has no temperature data).
@@ -877,18 +1006,33 @@ class Bivariate(Univariate):
                 channel = self.dataset.channels[self.channelId][self.subchannelId]
                 self._eventlist = channel.getSession(session.sessionId)
                 self._sessionId = session.sessionId
-            return self._eventlist and len(self._eventlist)
+            return self._waitForReference()
             
         except Exception as err:
-            # HACK: In multithreaded environments, there's a rare race 
-            # condition in which the main channel can be accessed before the
-            # calibration channel has loaded. Retry isValid() a few times.
             logger.debug(f'{type(self).__name__}.isValid(): {err!r}')
+            return False
 
-            if _retries == 0:
-                return False
-            
-            return self.isValid(session, noBivariates, _retries-1)
+
+    def _waitForReference(self):
+        """ Wait for the reference channel's data, if it has none yet and is
+            being imported in another thread. A session is only waited for
+            once; if that times out, later calls return immediately. Used
+            internally.
+
+            :return: `True` if the reference channel has data.
+        """
+        eventlist = self._eventlist
+        if eventlist is None:
+            return False
+        if len(eventlist):
+            return True
+        if (eventlist is self._timedOut
+                or not eventlist.dataset._isImportingElsewhere()):
+            return False
+        if eventlist.waitForData(timeout=eventlist.WAIT_TIMEOUT):
+            return True
+        self._timedOut = eventlist
+        return False
 
 
     @property
@@ -1020,6 +1164,7 @@ class CombinedPoly(Bivariate):
             if x is not None:
                 x.addWatcher(self)
 
+    @_timed
     def inplace(self, values, y=None, timestamp=None, session=None,
                 noBivariates=False, out=None):
         """ In-place transform for the `CombinedPoly` transform.  It reduces the
@@ -1130,9 +1275,9 @@ class CombinedPoly(Bivariate):
                                 )
 
                     if scalar:
-                        out = self.poly.function(values)
+                        out = self.poly.inplace(values)
                     else:
-                        out[:] = self.poly.function(values)
+                        self.poly.inplace(values, out=out)
                 else:
                     if scalar:
                         out = values
@@ -1158,9 +1303,8 @@ class CombinedPoly(Bivariate):
                 elif y is None and timestamp is None:
                     y = self._eventlist.getMean()
                 elif y is None and timestamp is not None:
-                    y = np.fromiter(
-                            (self._eventlist[self._eventlist.getEventIndexNear(t)][0] for t in
-                             timestamp), dtype=np.float64)
+                    y = self._eventlist.getValuesAt(timestamp, method='nearest',
+                                                    outOfRange=True)[1]
 
                 # Catches the case where the secondary subpoly is a `ComplexTransform`
                 if (self.variables[1] in self.subpolys
@@ -1344,15 +1488,9 @@ class PolyPoly(CombinedPoly):
                     self._eventlist = channel.getSession(session.sessionId)
                     self._sessionId = session.sessionId
                 
-                # XXX: Hack! EventList length can be 0 if a thread is running.
-                # This almost immediately gets fixed. Find real cause.
-                try:    
-                    y = self._eventlist.getMean()
-                except IndexError:
-                    sleep(0.001)
-                    if len(self._eventlist) == 0:
-                        return None
-                    y = self._eventlist.getMean()
+                if not self._waitForReference():
+                    return None
+                y = self._eventlist.getMean()
                     
                 return timestamp, self._function(y, *values)
             
@@ -1370,6 +1508,7 @@ class PolyPoly(CombinedPoly):
             raise
 
 
+    @_timed
     def inplace(self, values, y=None, timestamp=None, session=None, noBivariates=False, out=None):
         """ In-place transform for the `PolyPoly` transform.  It reduces the
             number of array allocations/operations compared to the normal
@@ -1403,15 +1542,9 @@ class PolyPoly(CombinedPoly):
                     self._eventlist = channel.getSession(session.sessionId)
                     self._sessionId = session.sessionId
 
-                # XXX: Hack! EventList length can be 0 if a thread is running.
-                # This almost immediately gets fixed. Find real cause.
-                try:
-                    y = self._eventlist.getMean()
-                except IndexError:
-                    sleep(0.001)
-                    if len(self._eventlist) == 0:
-                        return None
-                    y = self._eventlist.getMean()
+                if not self._waitForReference():
+                    return None
+                y = self._eventlist.getMean()
 
                 for i, poly in enumerate(self.polys):
                     if np.isscalar(out[i]):
@@ -179,6 +179,7 @@ class Pressure2Meters(UnitConverter, ComplexTransform):
     """
     convertsFrom = ('Pressure', 'Pa')
     units = ('Altitude', 'm')
+    supportsOut = True
     
     # Parameters: name, description, type, range, and default value.
     # The names must match keyword arguments in __init__ and object attributes.
@@ -201,6 +202,7 @@ class Pressure2Meters(UnitConverter, ComplexTransform):
         self._temp = temp
         self._tempK = temp + 273.15
         self.id = calId
+        self._variables = ("x",)
         self._lastSession = None
         self._timeOffset = 0
         self._watchers = weakref.WeakSet()
@@ -213,7 +215,7 @@ class Pressure2Meters(UnitConverter, ComplexTransform):
         # This is sort of a special case; the function is too complex to
         # nicely represent as a lambda, so the 'source' calls the object itself.
         # This is so the polynomial combination/reduction will work.
-        # `_function` is never actually called; `function` is overridden.
+        # `_function` is only used by `__call__()`; `function` is overridden.
         self.T_2 = self._tempK - 71.5
         self.h_1 = ((8.31432*self.T_2*(math.log(101325/22632.1)))/((-9.80665)*0.0289644))
         self._str = "Pressure2Meters.convert(x)"
@@ -240,59 +242,80 @@ class Pressure2Meters(UnitConverter, ComplexTransform):
         self._tempK = t + 273.15
         self._build()
 
-    def function(self, p):
-        p = np.asarray(p)
-        result = np.full_like(p, fill_value=20e3)  # filled with default value
+    def function(self, p, out=None):
+        """ Convert pressure to altitude. Array input is converted using
+            ufuncs, without intermediate copies of the data.
+
+            :param p: A pressure (Pascals), or an array of pressures.
+            :keyword out: An optional float64 array in which to store the
+                results. May be the input array itself.
+            :return: The altitude (meters); a float if `p` was a scalar,
+                otherwise an array (`out`, if supplied).
+        """
+        p, out, scalar = self._arrayArgs(p, out)
 
         sp = self._sealevel / p
-        mask = (sp < 4.47704808656731)
-        if mask.any():
-            foo = np.power((p[mask]/self._sealevel), -0.1902632365084836)
-            result[mask] = (self._tempK*((1.0/foo)-1.0))/-0.0065
-
-        mask = (sp < 18.507221149648668) & ~mask
-        if mask.any():
-            T_2 = self._tempK - 71.5
-#             h_2 = (8.31432*T_2*(math.log(p/self._sealevel)))/-0.28404373326
-#             h_1 = ((T_2*12.462865699354536)/-0.28404373326)+11000
-            h_2 = (T_2*np.log(p[mask]/self._sealevel))/-0.03416319473631036
-            h_1 = (T_2/-0.02279120549896569)+11000.0
-            result[mask] = h_1+h_2
-
-        return result
-
-    def revert(self, h):
-        h = np.asarray(h)
-        result = np.full_like(h, fill_value=5474.89)  # filled with default value
+        ratio = np.divide(p, self._sealevel)
+        lower = (sp < 4.47704808656731)
+        upper = (sp < 18.507221149648668) & ~lower
+
+        out.fill(20e3)  # default value
+
+        np.power(ratio, 0.1902632365084836, out=out, where=lower)
+        np.subtract(out, 1.0, out=out, where=lower)
+        np.multiply(out, self._tempK / -0.0065, out=out, where=lower)
+
+        T_2 = self._tempK - 71.5
+#         h_2 = (8.31432*T_2*(math.log(p/self._sealevel)))/-0.28404373326
+#         h_1 = ((T_2*12.462865699354536)/-0.28404373326)+11000
+        np.log(ratio, out=out, where=upper)
+        np.multiply(out, T_2 / -0.03416319473631036, out=out, where=upper)
+        np.add(out, (T_2 / -0.02279120549896569) + 11000.0, out=out, where=upper)
+
+        return float(out) if scalar else out
+
+    def revert(self, h, out=None):
+        """ Convert altitude back to pressure.
+
+            :param h: An altitude (meters), or an array of altitudes.
+            :keyword out: An optional float64 array in which to store the
+                results. May be the input array itself.
+            :return: The pressure (Pascals); a float if `h` was a scalar,
+                otherwise an array (`out`, if supplied).
+        """
+        h, out, scalar = self._arrayArgs(h, out)
 
         M = 0.0289644  # [kg/mol] molar mass of Earth's air
         g = 9.80665  # [m/s^2] gravitational acceleration constant
         R = 8.31432  # [(N*m)/(mol*k)] universal gas constant
+        L_a = -0.0065  # [K/m] temperature lapse rate
+        h_a = 0.0  # [m] height above sea level (differing altitudes have differing time lapse rates)
+        h_b = 11000
 
         t = self._tempK
         p_a = self._sealevel
 
-        mask = (h < 11000)
-        if mask.any():
-            # [K/m] temperature lapse rate
-            L_a = -0.0065
-            # [m] height above sea level (differing altitudes have differing time lapse rates)
-            h_a = 0.0
-            result[mask] = self._sealevel*np.power(
-                self._tempK / (self._tempK + L_a*(h[mask]-h_a)),
-                (g*M)/(R*L_a)
-                )
-
-        mask = (h <= 20000) & ~mask
-        if mask.any():
-            L_a = -0.0065
-            h_a = 0.0
-            h_b = 11000
-            p_b = p_a*np.power(t/(t+(L_a*(h_b-h_a))), (g*M)/(R*L_a))
-            T_1 = t+(11000*(-0.0065))
-            result[mask] = p_b*np.exp((-g*M*(h[mask]-h_b))/(R*T_1))
-
-        return result
+        lower = (h < 11000)
+        upper = (h <= 20000) & ~lower
+
+        # Computed before `out` is modified, in case `out` is `h`
+        np.subtract(h, h_a, out=out, where=lower)
+        np.subtract(h, h_b, out=out, where=upper)
+        out[~(lower | upper)] = 5474.89  # default value
+
+        np.multiply(out, L_a, out=out, where=lower)
+        np.add(out, t, out=out, where=lower)
+        np.divide(t, out, out=out, where=lower)
+        np.power(out, (g*M)/(R*L_a), out=out, where=lower)
+        np.multiply(out, p_a, out=out, where=lower)
+
+        p_b = p_a*np.power(t/(t+(L_a*(h_b-h_a))), (g*M)/(R*L_a))
+        T_1 = t+(11000*(-0.0065))
+        np.multiply(out, (-g*M)/(R*T_1), out=out, where=upper)
+        np.exp(out, out=out, where=upper)
+        np.multiply(out, p_b, out=out, where=upper)
+
+        return float(out) if scalar else out
 
 
 @registerConverter
@@ -309,11 +332,17 @@ class Pressure2Feet(Pressure2Meters):
         self._function = eval(self._source, 
                               {'Pressure2Feet': self, 'math': math, 'np': np})
 
-    def function(self, press):
-        return 3.2808399*Pressure2Meters.function(self, press)
-
-    def revert(self, v):
-        return Pressure2Meters.revert(self, v/3.2808399)
+    def function(self, press, out=None):
+        result = Pressure2Meters.function(self, press, out=out)
+        if np.isscalar(result):
+            return 3.2808399 * result
+        return np.multiply(result, 3.2808399, out=result)
+
+    def revert(self, v, out=None):
+        v, out, scalar = self._arrayArgs(v, out)
+        np.divide(v, 3.2808399, out=out)
+        result = Pressure2Meters.revert(self, out, out=out)
+        return float(result) if scalar else result
 
 # ==============================================================================
 # 
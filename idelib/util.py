@@ -2,15 +2,19 @@
 Utility functions for doing low-level, general-purpose EBML reading and writing.
 """
 
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import io
 from io import IOBase
 import logging
+import os
 import os.path
 from pathlib import Path
+from types import MappingProxyType
 
-from ebmlite import loadSchema
-
-from .importer import filterTime, openFile, _getSize
-from .dataset import Dataset
+from .importer import filterTime, openFile, _getSize, _getBlockTimes, _TimeFilter
+from .dataset import Dataset, getSchema
+from .parsers import valEval
 
 # ==============================================================================
 #
@@ -32,7 +36,7 @@ def verify(data, schema=None):
         :return: `True`. Any problems will raise exceptions.
     """
     if schema is None:
-        schema = loadSchema('mide_ide.xml')
+        schema = getSchema()
     return schema.verify(data)
 
 
@@ -64,8 +68,7 @@ def extractTime(doc, out, startTime=0, endTime=None, channels=None,
             (will be `True` when the split is complete). If the updater object
             has a `cancelled` attribute that is `True`, the import will be
             aborted. The default callback is `None` (nothing will be notified).
-        :return: The total number of bytes written, and total number of
-            ChannelDataBlock elements copied.
+        :return: The total number of bytes written.
     """
     if isinstance(doc, (str, Path)):
         doc = openFile(doc)
@@ -90,19 +93,23 @@ def extractTime(doc, out, startTime=0, endTime=None, channels=None,
         raise TypeError("unsupported type for output; expected filename "
                         "or stream, got {} ".format(type(out)))
 
+    # Find the byte ranges of the elements to copy, merging adjacent ones,
+    # then copy them in bulk. The ranges are kept in the order `filterTime()`
+    # yields them, since a block before the interval may be written late.
+    ranges = []
     try:
         for n, el in enumerate(filterTime(doc, startTime, endTime, channels=channels), 1):
             if updater:
                 if updater.cancelled:
                     break
 
-                if n % increment == 0:
+                if n % increment == 0 and el is not None:
                     updater(percent=el.offset/totalSize)
 
             if el is not None:
-                data = el.getRaw()
-                fs.write(data)
-                copiedBytes += len(data)
+                _addRange(ranges, *_getElementRange(el))
+
+        copiedBytes = _copyRanges(doc.ebmldoc.stream, fs, ranges)
 
     except (StopIteration, KeyboardInterrupt):
         pass
@@ -117,6 +124,187 @@ def extractTime(doc, out, startTime=0, endTime=None, channels=None,
     return copiedBytes
 
 
+def splitTime(doc, windows, channels=None, updater=None, bufferSize=256*1024):
+    """ Extract several intervals from an IDE file, each to its own file, in
+        a single pass through the source. The intervals may overlap. Each
+        output is the same as `extractTime()` would produce for its interval.
+
+        :param doc: A loaded `Dataset` or the name of an IDE file.
+        :param windows: A list of ``(startTime, endTime, out)`` tuples. The
+            times are relative to the start of the recording (`endTime` can
+            be `None`); `out` is a filename or stream to which to save the
+            interval's data.
+        :param channels: A list of channel IDs to specifically export. If
+            `None`, all channels will be exported.
+        :param updater: A function (or function-like object) to notify as
+            work is done. See `extractTime()`.
+        :param bufferSize: The write buffer size for output files.
+        :return: A list of the number of bytes written for each window.
+    """
+    if isinstance(doc, (str, Path)):
+        doc = openFile(doc)
+
+    totalSize = 1
+    increment = 50
+    if updater:
+        totalSize = _getSize(doc.ebmldoc)
+
+    windows = list(windows)
+    for _startTime, _endTime, out in windows:
+        if not isinstance(out, (str, Path, IOBase)) and not hasattr(out, 'seek'):
+            raise TypeError("unsupported type for output; expected filename "
+                            "or stream, got {} ".format(type(out)))
+
+    filters = []
+    streams = []
+    opened = []
+    for startTime, endTime, out in windows:
+        filters.append(_TimeFilter(startTime, endTime, channels))
+        if isinstance(out, (str, Path)):
+            fs = open(out, 'wb', buffering=bufferSize)
+            opened.append(fs)
+        else:
+            fs = out
+        streams.append(fs)
+
+    written = [0] * len(streams)
+    timeScalars = doc._parsers['ChannelDataBlock'].timeScalars
+
+    try:
+        for n, el in enumerate(doc.ebmldoc, 1):
+            if updater:
+                if updater.cancelled:
+                    break
+
+                if n % increment == 0:
+                    updater(percent=el.offset/totalSize)
+
+            # The raw bytes of each element are read once, no matter how
+            # many windows include it.
+            raw = {}
+            if el.name == 'ChannelDataBlock':
+                blockTimes = _getBlockTimes(el, timeScalars)
+                if blockTimes is None:
+                    continue
+                for i, timeFilter in enumerate(filters):
+                    for blockEl in timeFilter.filterBlock(el, *blockTimes):
+                        data = raw.get(blockEl.offset)
+                        if data is None:
+                            data = raw[blockEl.offset] = blockEl.getRaw()
+                        streams[i].write(data)
+                        written[i] += len(data)
+            else:
+                data = el.getRaw()
+                for i, fs in enumerate(streams):
+                    fs.write(data)
+                    written[i] += len(data)
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        for fs in opened:
+            fs.close()
+
+    if updater:
+        updater(done=True)
+
+    return written
+
+
+# ==============================================================================
+#
+# ==============================================================================
+
+COPY_SIZE = 8 * 1024 * 1024  # Maximum size of each read when copying data
+
+# Stream types that are backed by an actual file descriptor. Other streams
+# with a `fileno()` method may not be (e.g. `SpooledTemporaryFile`, which
+# is moved to disk when `fileno()` is called).
+_FILE_TYPES = (io.FileIO, io.BufferedReader, io.BufferedWriter, io.BufferedRandom)
+
+
+def _getElementRange(el):
+    """ Get the offset and total size (including EBML headers) of an
+        element.
+
+        :param el: An EBML element.
+        :return: A tuple containing the element's offset and size.
+    """
+    return el.offset, el.payloadOffset - el.offset + el.size
+
+
+def _addRange(ranges, offset, size):
+    """ Add a byte range to a list of ranges, extending the last range
+        instead if the new one immediately follows it.
+
+        :param ranges: A list of ``[offset, size]`` lists.
+        :param offset: The offset of the new range.
+        :param size: The size of the new range.
+    """
+    if ranges and ranges[-1][0] + ranges[-1][1] == offset:
+        ranges[-1][1] += size
+    else:
+        ranges.append([offset, size])
+
+
+def _copyRanges(source, dest, ranges, bufferSize=COPY_SIZE):
+    """ Copy byte ranges from one stream to another. If both are actual
+        files, `os.copy_file_range()` is used where available; otherwise,
+        the data is copied using large reads and writes. The source stream's
+        position is restored afterwards.
+
+        :param source: The stream from which to copy.
+        :param dest: The stream to which to write.
+        :param ranges: A list of ``(offset, size)`` ranges, copied in order.
+        :param bufferSize: The maximum size of each individual read.
+        :return: The total number of bytes copied.
+    """
+    copied = 0
+    originalPos = source.tell()
+
+    fastCopy = (hasattr(os, 'copy_file_range')
+                and isinstance(source, _FILE_TYPES)
+                and isinstance(dest, _FILE_TYPES))
+    if fastCopy:
+        dest.flush()
+
+    try:
+        for offset, size in ranges:
+            end = offset + size
+            if fastCopy:
+                try:
+                    pos = dest.tell()
+                    while offset < end:
+                        n = os.copy_file_range(source.fileno(), dest.fileno(),
+                                               end - offset, offset, pos)
+                        if n == 0:
+                            break
+                        offset += n
+                        pos += n
+                        copied += n
+                    dest.seek(pos)
+                except OSError:
+                    # Not supported between these files; copy the rest
+                    # 'manually'.
+                    fastCopy = False
+                    dest.seek(pos)
+
+            source.seek(offset)
+            while offset < end:
+                data = source.read(min(bufferSize, end - offset))
+                if not data:
+                    break
+                dest.write(data)
+                offset += len(data)
+                copied += len(data)
+
+    finally:
+        source.seek(originalPos)
+
+    return copied
+
+
 # ==============================================================================
 #
 # ==============================================================================
@@ -174,6 +362,20 @@ def _getBlockTime(doc, el):
     :param el: The `ChannelDataBlock EBML element to process
     :return: A tuple containing channel ID, start time, and end time.
     """
+    return _getRawBlockTime(el, doc._parsers['ChannelDataBlock'].timeScalars)
+
+
+def _getRawBlockTime(el, timeScalars):
+    """
+    Get the ID and start and end times of an IDE `ChannelDataBlock`, using
+    a dictionary of time scalars instead of a `Dataset`'s parsers. Used by
+    `_getBlockTime()` and `probe()`.
+
+    :param el: The `ChannelDataBlock EBML element to process
+    :param timeScalars: A dictionary of channel time scalars, keyed by
+        channel ID.
+    :return: A tuple containing channel ID, start time, and end time.
+    """
     start = end = None
     chId = blockStart = blockEnd = None
     for subEl in el:
@@ -186,7 +388,7 @@ def _getBlockTime(doc, el):
 
     # TODO: Modulus correction, if still needed (i.e., very old files)
     blockEnd = blockEnd or blockStart
-    scalar = doc._parsers['ChannelDataBlock'].timeScalars.get(chId, 1)
+    scalar = timeScalars.get(chId, 1)
     if blockStart is not None:
         # logger.warning("getLength: {} missing <EndTimeCodeAbs> subelement, skipping.".format(el))
         start = blockStart // (1.0 / scalar)
@@ -206,16 +408,37 @@ def _getLength(doc):
     :return: The timestamps of the first and last samples in the file, in
         microseconds, relative to the start of the recording.
     """
+    # Use the cached EBML document size if the IDE was already fully imported,
+    # otherwise use `None` so `_getLastSync()` will calculate it (faster than
+    # getting uncached `doc.ebmldoc.size`)
+    streamLength = None if doc.loading else doc.ebmldoc.size
+    return _scanLength(doc.ebmldoc, doc._parsers['ChannelDataBlock'].timeScalars,
+                       streamLength)
+
+
+def _scanLength(ebmldoc, timeScalars, streamLength=None):
+    """
+    Retrieve the start and end times of an EBML IDE document, reading only
+    its first few blocks and the blocks following its last `Sync`. Used by
+    `_getLength()` and `probe()`.
+
+    :param ebmldoc: The `ebmlite` document of the IDE file.
+    :param timeScalars: A dictionary of channel time scalars, keyed by
+        channel ID.
+    :param streamLength: The length of the file, if already known.
+    :return: The timestamps of the first and last samples in the file, in
+        microseconds, relative to the start of the recording.
+    """
     start = float('infinity')
     end = 0
 
     # Get starting time, reading several blocks since different channels
     # may not be in chronological order.
     count = 0
-    for el in doc.ebmldoc:
+    for el in ebmldoc:
         if el.name != "ChannelDataBlock":
             continue
-        _chId, blockStart, _blockEnd = _getBlockTime(doc, el)
+        _chId, blockStart, _blockEnd = _getRawBlockTime(el, timeScalars)
         start = min(blockStart, start) if blockStart is not None else blockStart
 
         count += 1
@@ -224,20 +447,15 @@ def _getLength(doc):
 
     # Get ending time by jumping to a Sync near the end and reading blocks
     # from there to the end of file.
-    stream = doc.ebmldoc.stream
-
-    # Use the cached EBML document size if the IDE was already fully imported,
-    # otherwise use `None` so `_getLastSync()` will calculate it (faster than
-    # getting uncached `doc.ebmldoc.size`)
-    streamLength = None if doc.loading else doc.ebmldoc.size
+    stream = ebmldoc.stream
     stream.seek(_getLastSync(stream, streamLength))
-    temp_ebml = doc.ebmldoc.schema.load(stream)
+    temp_ebml = ebmldoc.schema.load(stream)
 
     for el in temp_ebml:
         if el.name != "ChannelDataBlock":
             continue
 
-        _chId, _blockStart, blockEnd = _getBlockTime(doc, el)
+        _chId, _blockStart, blockEnd = _getRawBlockTime(el, timeScalars)
         if blockEnd:
             end = max(blockEnd, end)
 
@@ -267,6 +485,129 @@ def getLength(doc):
     raise TypeError("getLength() needs a filename, stream, or Dataset; got {}".format(type(doc)))
 
 
+# ==============================================================================
+#
+# ==============================================================================
+
+#: The summary of a recording produced by `probe()`. Times are in
+#: microseconds, relative to the start of the recording; `channels` is a
+#: tuple of `ProbeChannel`.
+ProbeResult = namedtuple('ProbeResult',
+                         ('filename', 'size', 'recorderInfo', 'channels',
+                          'utcStartTime', 'startTime', 'endTime', 'duration'))
+
+#: The description of a single channel in a `ProbeResult`. `subchannels` is
+#: a tuple of ``(subchannelId, name, units)`` tuples.
+ProbeChannel = namedtuple('ProbeChannel',
+                          ('id', 'name', 'parser', 'format', 'sampleRate',
+                           'subchannels'))
+
+# Root elements that mark the start of the recorded data.
+_DATA_ELEMENTS = ('ChannelDataBlock', 'SimpleChannelDataBlock')
+
+
+def _probeChannel(data, timeScalars):
+    """ Create a `ProbeChannel` from a dumped `Channel` element, and record
+        its time scalar. Used by `probe()`.
+    """
+    chId = data.get('ChannelID')
+    scale = data.get('TimeCodeScale')
+    if scale is not None:
+        timeScalars[chId] = valEval(scale) * 1000000.0
+
+    sampleRate = data.get('SampleRate')
+    if sampleRate is not None:
+        sampleRate = valEval(sampleRate)
+
+    subchannels = []
+    for sub in data.get('SubChannel', ()):
+        units = sub.get('SubChannelLabel'), sub.get('SubChannelUnits')
+        if units[0] is None:
+            units = units[1], units[1]
+        subchannels.append((sub.get('SubChannelID'),
+                            sub.get('SubChannelName'),
+                            None if None in units else units))
+
+    return ProbeChannel(chId, data.get('ChannelName'),
+                        data.get('ChannelParser'), data.get('ChannelFormat'),
+                        sampleRate, tuple(subchannels))
+
+
+def probe(source):
+    """ Quickly summarize an IDE file without importing it. Only the header
+        elements and the trailing `Sync` region are read; no `Dataset`,
+        element parsers, or data blocks are created, so this is suitable for
+        cataloging large numbers of recordings.
+
+        :param source: The IDE filename or a stream containing IDE data.
+        :return: A `ProbeResult` named tuple. Mappings within it are
+            read-only.
+    """
+    if isinstance(source, (str, Path)):
+        with open(source, 'rb') as fs:
+            return probe(fs)
+
+    if not (hasattr(source, 'seek') and hasattr(source, 'tell')):
+        raise TypeError("probe() needs a filename or stream; got {}".format(type(source)))
+
+    schema = getSchema()
+    ebmldoc = schema.load(source, 'MideDocument', headers=True)
+
+    recorderInfo = {}
+    channels = []
+    timeScalars = {}
+    utcStartTime = None
+
+    for el in ebmldoc:
+        if el.name in _DATA_ELEMENTS:
+            break
+        elif el.name == 'TimeBaseUTC':
+            utcStartTime = el.value
+        elif el.name == 'RecordingProperties':
+            props = el.dump()
+            info = props.get('RecorderInfo', {})
+            info.pop('Attribute', None)
+            recorderInfo.update(info)
+            for ch in props.get('ChannelList', {}).get('Channel', ()):
+                channels.append(_probeChannel(ch, timeScalars))
+
+    size = _getSize(source)
+    start, end = _scanLength(ebmldoc, timeScalars, size)
+    if start is None or start == float('infinity'):
+        start = end = duration = None
+    else:
+        duration = end - start
+
+    return ProbeResult(getattr(ebmldoc, 'filename', None), size,
+                       MappingProxyType(recorderInfo), tuple(channels),
+                       utcStartTime, start, end, duration)
+
+
+def probeFiles(filenames, maxWorkers=None, ignoreErrors=False):
+    """ Summarize several IDE files concurrently, using a pool of threads.
+        See `probe()`.
+
+        :param filenames: A list of IDE filenames.
+        :keyword maxWorkers: The maximum number of threads to use. `None`
+            uses the `concurrent.futures` default.
+        :keyword ignoreErrors: If `True`, files that fail to be read will
+            produce `None` (and log a warning) rather than raising.
+        :return: A list of `ProbeResult` named tuples, in the same order as
+            `filenames`.
+    """
+    def _probe(filename):
+        try:
+            return probe(filename)
+        except Exception as err:
+            if not ignoreErrors:
+                raise
+            logger.warning("probeFiles(): could not read {}: {!r}".format(filename, err))
+            return None
+
+    with ThreadPoolExecutor(max_workers=maxWorkers) as pool:
+        return list(pool.map(_probe, filenames))
+
+
 # ==============================================================================
 #
 # ==============================================================================
@@ -0,0 +1,66 @@
+"""
+Tests of the benchmark suite's synthetic recording generator.
+"""
+from io import BytesIO
+
+import numpy as np
+import pytest  # type: ignore
+
+from benchmarks import run
+from benchmarks.synthetic import writeRecording, TIME_SCALE
+from idelib import importer
+
+
+# ==============================================================================
+#
+# ==============================================================================
+
+CHANNELS = {
+    8: {'format': '<hhh', 'sampleRate': 1000.0, 'blockSize': 100},
+    40: {'format': '>ff', 'sampleRate': 10.0, 'blockSize': 4},
+}
+
+
+def _makeDataset(**kwargs):
+    stream = BytesIO()
+    counts = writeRecording(stream, **kwargs)
+    stream.seek(0)
+    doc = importer.openFile(stream)
+    importer.readData(doc)
+    return doc, counts, stream.getvalue()
+
+
+def test_writeRecording():
+    doc, counts, data = _makeDataset(channels=CHANNELS, duration=5.0,
+                                     gaps=[(2.0, 0.5)])
+    assert sorted(doc.channels) == [8, 40]
+    assert counts == {8: 4500, 40: 42}
+    for chId, count in counts.items():
+        session = doc.channels[chId].getSession()
+        assert len(session) == count
+        assert len(doc.channels[chId].subchannels) == len(CHANNELS[chId]['format']) - 1
+
+    session = doc.channels[8].getSession()
+    segments = session.getSegments()
+    assert len(segments) == 2
+    np.testing.assert_allclose(segments[:, 0], [0, 2.5e6], atol=1e6 / TIME_SCALE)
+
+    # The same arguments always produce the same file
+    assert _makeDataset(channels=CHANNELS, duration=5.0, gaps=[(2.0, 0.5)])[2] == data
+    assert _makeDataset(channels=CHANNELS, duration=5.0, seed=1)[2] != data
+
+
+def test_writeRecordingErrors():
+    with pytest.raises(ValueError):
+        writeRecording(BytesIO(), channels={8: {'format': '<hf', 'sampleRate': 10}})
+
+
+def test_compare():
+    baseline = {'results': {'small': {'importFile': {'seconds': 1.0},
+                                      'getMean': {'seconds': 1.0}}}}
+    results = {'results': {'small': {'importFile': {'seconds': 1.1},
+                                     'getMean': {'seconds': 1.5},
+                                     'getMax': {'seconds': 1.0}}}}
+    comparison = run.compare(results, baseline, threshold=0.2)
+    assert [(c[1], c[-1]) for c in comparison] == [('importFile', False),
+                                                    ('getMean', True)]
@@ -8,6 +8,8 @@ Basic IDE library unit tests.
     `calibration.AccelTransform`. These classes may be refactored out in the
     future.
 """
+import pickle
+import shutil
 import struct
 from io import StringIO, BytesIO
 import sys
@@ -25,6 +27,7 @@ from idelib.dataset import (Cascading,
                             Plot,
                             Sensor,
                             Session,
+                            SingleSampleEventArray,
                             SubChannel,
                             Transformable,
                             WarningRange,
@@ -33,6 +36,7 @@ from idelib.transforms import Transform, CombinedPoly, PolyPoly
 from idelib.transforms import AccelTransform, Univariate
 from idelib import importer
 from idelib import parsers
+from idelib import rolling
 
 from testing.utils import nullcontext
 
@@ -113,9 +117,11 @@ def S5E25D40Block0s():
     return {80: np.array([[-0.08140442447167624, 0.030588803898888246, 0.9691399523949171],
                          [-0.0719850778533001, 0.0387078153564799, 0.9768253581441608],
                          [-0.024634808792385235, 0.05523737946861323, 1.095283125791875]]),
-            8:  np.array([[-12.637846860537504, -10.553908103208101, -11.177535620699224],
-                        [-12.632327454464878, -10.54744928909388, -11.17038782667181],
-                        [-12.623128444343838, -10.540067787249058, -11.160176692346933]]),
+            # Ch8 is temperature compensated using the exact (float64) mean
+            # of ch20, not the mean of its float32 block means.
+            8:  np.array([[-12.637846894405609, -10.553908137442047, -11.177535582388689],
+                        [-12.632327488316232, -10.547449323308225, -11.17038778838321],
+                        [-12.62312847816727, -10.540067821440996, -11.160176654089664]]),
             20: np.array([[102150.0, 21.780000686645508],
                           [102153.13110351562, 22.036001205444336],
                           [102157.00073242188, 22.1299991607666]]),
@@ -133,9 +139,9 @@ def S5E25D40Block0s():
 @pytest.fixture(scope="session")
 def XformS5E25D40Block0s():
     # the expected values of the first block of each transformed channel's MMM
-    return {8: np.array([[9.543397173413723, 11.867961374296353, 13.912108941026776],
-                        [9.552495679176754, 11.875262229083035, 13.92243287008154],
-                        [9.557954782634571, 11.881650477021381, 13.929659620419873]]),
+    return {8: np.array([[9.54339713959029, 11.867961340104415, 13.912108979284042],
+                        [9.5524956453254, 11.875262194868693, 13.92243290837014],
+                        [9.557954748766466, 11.881650442787436, 13.929659658730408]]),
             80: np.array([[-0.112179830308469, 0.030588803898888246, -1.0917475374833345],
                           [-0.06482956124755412,  0.0387078153564799, -0.9732897698356204],
                           [-0.05541021462917799, 0.05523737946861323, -0.9656043640863767]]),
@@ -155,6 +161,39 @@ def testIDE():
     return doc
 
 
+@pytest.fixture(scope="module")
+def SSX66115IDE():
+    # Shared by tests; those changing its state must restore it.
+    doc = importer.openFile(_load_file('./testing/SSX66115.IDE'))
+    importer.readData(doc)
+    return doc
+
+
+@pytest.fixture(scope="module")
+def SSX66115Generic():
+    # SSX66115.IDE with all sessions using the general `EventArray`, even
+    # those of single-sample channels. For comparison.
+    doc = importer.openFile(_load_file('./testing/SSX66115.IDE'))
+    with mock.patch('idelib.dataset.SingleSampleEventArray', EventArray):
+        importer.readData(doc)
+    return doc
+
+
+# Sessions and time ranges of SSX66115.IDE for testing range queries
+rangeSessions = pytest.mark.parametrize(
+        'channelId, subchannelId', [(8, None), (8, 2), (36, 0), (32, None)])
+RANGE_TIMES = [(None, None), (1e6, 2e6), (1234567, 1260000), (5e6, None)]
+rangeTimes = pytest.mark.parametrize('startTime, endTime', RANGE_TIMES)
+
+
+def _getSession(doc, channelId, subchannelId=None):
+    """ Get the first session of a channel or subchannel. """
+    channel = doc.channels[channelId]
+    if subchannelId is not None:
+        channel = channel[subchannelId]
+    return channel.getSession()
+
+
 @pytest.fixture
 def SSX70065IDE():
     doc = importer.openFile(_load_file('./testing/SSX70065.IDE'))
@@ -1005,7 +1044,8 @@ class TestSubChannel:
         channel2.subchannels = [GenericObject()]
         parentList = dataset.channels[32].getSession()
         parentList.dataset.addSession(0, 1, 2)
-        eventArray = EventArray(
+        # channel2 has the `singleSample` hint
+        eventArray = SingleSampleEventArray(
             subChannel1,
             session=dataset.lastSession,
             parentList=subChannel1.parent.getSession())
@@ -1462,6 +1502,110 @@ class TestEventArray:
         assert eventArray.getRangeIndices(start, end) == expected
 
 
+    @pytest.mark.parametrize('subchannelId', [None, 2])
+    def testGetSegments(self, DiscontinuitiesIDE, subchannelId):
+        """ Test for the `getSegments()` method, and the discontinuities
+            found on import.
+        """
+        channel = DiscontinuitiesIDE.channels[8]
+        if subchannelId is not None:
+            channel = channel[subchannelId]
+        eventArray = channel.getSession()
+        n = len(eventArray)
+
+        segments = eventArray.getSegments(indices=True)
+        np.testing.assert_array_equal(segments, [[0, 5538], [5538, 24878],
+                                                 [24878, 45070], [45070, n]])
+
+        times = eventArray.arraySlice()[0]
+        np.testing.assert_array_equal(
+            eventArray.getSegments(),
+            np.column_stack((times[segments[:, 0]], times[segments[:, 1] - 1])))
+
+        # Time-limited
+        start, end = eventArray.getRangeIndices(245e6, 260e6)
+        np.testing.assert_array_equal(
+            eventArray.getSegments(245e6, 260e6, indices=True),
+            [[start, 24878], [24878, 45070], [45070, end]])
+        assert len(eventArray.getSegments(1e99, 2e99)) == 0
+
+        # The time between samples in a segment is never (much) more than
+        # the sample period; between segments, it is.
+        period = 1e6 / eventArray.getSampleRate()
+        for a, b in segments:
+            assert np.diff(times[a:b]).max() < period * 1.5
+        assert (times[segments[1:, 0]] - times[segments[:-1, 1] - 1]
+                > period * 1.5).all()
+
+        # Other channels have their own discontinuities
+        assert len(channel.dataset.channels[32].getSession().getSegments()) == 3
+
+
+    @pytest.mark.parametrize('cls', [EventArray, SingleSampleEventArray])
+    def testGapsWithoutSampleRate(self, SSX66115IDE, cls):
+        """ Test finding discontinuities in single-sample data without a
+            nominal sample rate, including consecutive ones.
+        """
+        channel = SSX66115IDE.channels[36]
+        assert not channel.sampleRate
+        eventArray = cls(channel, SSX66115IDE.lastSession)
+        value = np.zeros(1, dtype=eventArray._npType)[0]
+
+        gaps = []
+        for i, t in enumerate([0, 1, 2, 3, 4, 9, 13, 14, 15, 16.4, 17.4]):
+            block = GenericObject()
+            block.startTime = block.endTime = t * 1e6
+            block.numSamples = 1
+            if i and eventArray._isGapBefore(block):
+                gaps.append(i)
+            if cls is SingleSampleEventArray:
+                eventArray._data.append(block.startTime, value)
+            else:
+                eventArray._data.append(block)
+
+        assert gaps == [5, 6]
+
+
+    def testBlockTableExtended(self, SSX66115IDE):
+        """ Test that the block table is extended, rather than rebuilt, as
+            blocks are added.
+        """
+        source = SSX66115IDE.channels[8].getSession()
+        eventArray = EventArray(source.parent, source.session)
+        half = len(source._data) // 2
+        eventArray._data.extend(source._data[:half])
+        eventArray._getBlockTable()
+
+        # Blocks already in the table aren't read again
+        eventArray._data[:half] = [None] * half
+        eventArray._data.extend(source._data[half:])
+        for result, expected in zip(eventArray._getBlockTable(),
+                                    source._getBlockTable()):
+            np.testing.assert_array_equal(result, expected)
+
+
+    def testTimesAcrossGaps(self, DiscontinuitiesIDE):
+        """ Test that times computed by index are correct after
+            discontinuities.
+        """
+        eventArray = DiscontinuitiesIDE.channels[8].getSession()
+        n = len(eventArray)
+        times = np.concatenate([d.startTime + np.arange(d.numSamples)
+                                * (d.endTime - d.startTime) / (d.numSamples - 1)
+                                for d in eventArray._data])
+
+        np.testing.assert_array_equal(eventArray.arraySlice()[0], times)
+        np.testing.assert_array_equal(eventArray._inplaceTime(3, n, 7), times[3::7])
+
+        indices = np.array([0, 5537, 5538, 24878, 45069, 45070, n - 1])
+        np.testing.assert_array_equal(eventArray._inplaceTimeFromIndices(indices),
+                                      times[indices])
+
+        # Jittered sample times are those of actual events
+        jittered = eventArray.arrayJitterySlice(step=10, jitter=1)[0]
+        assert np.isin(jittered, times).all()
+
+
     @pytest.mark.parametrize(
             'args, kwargs, expectedIdx',
             [
@@ -1634,52 +1778,91 @@ class TestEventArray:
                 [_min, _mean, _max],
                 )
 
-    def testGetMax(self):
-        """ Test for getMax method. """
-        # Stub dependencies
-        eventArray = mock.Mock(spec=EventArray)
-        eventArray.configure_mock(
-            _data=mock.Mock(__getitem__=lambda self, idx: mock.Mock(
-                indexRange=(mock.sentinel.start, mock.sentinel.end)
-            )),
-            hasMinMeanMax=False,
-            hasSubchannels=False,
-            arrayMinMeanMax=(
-                lambda *a, **kw:
-                np.array([[(0, 3)], [(0, 4)], [(0, 5)]])
-            ),
-            arraySlice=(
-                lambda *a, **kw:
-                np.array([(0, 0, 0, 0), (3, 3.5, 4.5, 5)])
-            ),
-        )
-
-        # Run test
-        np.testing.assert_array_equal(EventArray.getMax(eventArray), (0, 5))
-
-    def testGetMin(self):
-        """ test for getMin method. """
-        # Stub dependencies
-        eventArray = mock.Mock(spec=EventArray)
-        eventArray.configure_mock(
-            _data=mock.Mock(__getitem__=lambda self, idx: mock.Mock(
-                indexRange=(mock.sentinel.start, mock.sentinel.end)
-            )),
-            hasMinMeanMax=False,
-            hasSubchannels=False,
-            arrayMinMeanMax=(
-                lambda *a, **kw:
-                np.array([[(0, 3)], [(0, 4)], [(0, 5)]])
-            ),
-            arraySlice=(
-                lambda *a, **kw:
-                np.array([(0, 0, 0, 0), (3, 3.5, 4.5, 5)])
-            ),
-        )
-
-        # Run test
-        np.testing.assert_array_equal(EventArray.getMin(eventArray), (0, 3))
-        assert eventArray._computeMinMeanMax.call_count == 1
+    @rangeSessions
+    @pytest.mark.parametrize('startTime, endTime',
+                             RANGE_TIMES + [(7325367, 7535358),  # tied maximums
+                                            (-2e6, -1e6)])       # no events
+    @pytest.mark.parametrize('removeMean', [False, True])
+    def testGetMaxMin(self, SSX66115IDE, channelId, subchannelId, startTime,
+                      endTime, removeMean):
+        """ Test getMax/getMin (and the event indices) against the full data.
+            Ties go to the first event, as with `argmax()`/`argmin()`.
+        """
+        eventArray = _getSession(SSX66115IDE, channelId, subchannelId)
+        # Only applicable to channels that allow it (i.e. not temperature,
+        # etc.); `arraySlice()` removes the mean of the slice regardless.
+        removeMean = removeMean and eventArray.allowMeanRemoval
+        eventArray.removeMean = removeMean
+        try:
+            start, end = eventArray.getRangeIndices(startTime, endTime)
+            if end <= start:
+                assert eventArray.getMax(startTime, endTime) is None
+                assert eventArray.getMinIndex(startTime, endTime) is None
+                return
+
+            data = eventArray.arraySlice(start, end)
+            maxIdx = data[1:].max(axis=0).argmax()
+            minIdx = data[1:].min(axis=0).argmin()
+
+            if not removeMean:
+                assert eventArray._getExtremaTable() is not None
+            np.testing.assert_array_equal(eventArray.getMax(startTime, endTime),
+                                          data[:, maxIdx])
+            np.testing.assert_array_equal(eventArray.getMin(startTime, endTime),
+                                          data[:, minIdx])
+            assert eventArray.getMaxIndex(startTime, endTime) == start + maxIdx
+            assert eventArray.getMinIndex(startTime, endTime) == start + minIdx
+        finally:
+            eventArray.removeMean = False
+
+    @pytest.mark.parametrize('channelId, subchannelId, threshold, kwargs', [
+        (8, None, 5, {}),
+        (8, None, 5, {'axes': [1, 2]}),
+        (8, None, 5, {'minGap': 1000}),
+        (8, None, 5, {'preTrigger': 5000, 'postTrigger': 5000}),
+        (8, None, 5, {'startTime': 4e6, 'endTime': 5e6}),
+        (8, 1, 100, {}),  # no events
+    ])
+    def testFindEvents(self, SSX66115IDE, channelId, subchannelId, threshold, kwargs):
+        """ Test threshold event detection against the full data, and that
+            blocks below the threshold aren't read.
+        """
+        eventArray = _getSession(SSX66115IDE, channelId, subchannelId)
+
+        start, end = eventArray.getRangeIndices(kwargs.get('startTime'),
+                                                kwargs.get('endTime'))
+        data = eventArray.arraySlice(start, end)
+        rows = [a + 1 for a in kwargs.get('axes', range(len(data) - 1))]
+        times = data[0, (np.abs(data[rows]) >= threshold).any(axis=0)]
+
+        # Data is read via the parent's cache. Discard any cached extrema
+        # (from other tests), which would hide a full scan of the data.
+        source = eventArray._parentList if subchannelId is not None else eventArray
+        source._blockExtrema = None
+        with mock.patch.object(source, '_accessCache',
+                               wraps=source._accessCache) as accessCache:
+            events = eventArray.findEvents(threshold, **kwargs)
+        numRead = sum(len(range(*c.args)) for c in accessCache.call_args_list)
+        assert numRead < len(eventArray) / 2
+
+        if not len(times):
+            assert events.shape == (0, 2)
+            accessCache.assert_not_called()
+            return
+
+        # Every detection falls within exactly one event
+        pre = kwargs.get('preTrigger', 0)
+        post = kwargs.get('postTrigger', 0)
+        inside = ((times[:, np.newaxis] >= events[:, 0])
+                  & (times[:, np.newaxis] <= events[:, 1]))
+        np.testing.assert_array_equal(inside.sum(axis=1), 1)
+        np.testing.assert_array_equal(events[:, 0] + pre,
+                                      times[np.searchsorted(times, events[:, 0] + pre)])
+        assert (events[:, 1] >= events[:, 0]).all()
+        assert (events[1:, 0] > events[:-1, 1]).all()
+        if not (pre or post):
+            gaps = events[1:, 0] - events[:-1, 1]
+            assert (gaps > kwargs.get('minGap', 0)).all()
 
     @pytest.mark.parametrize(
             'kwargs, expected',
@@ -1739,6 +1922,300 @@ class TestEventArray:
         with raises:
             np.testing.assert_equal(eventArray.getValueAt(at), expected)
 
+    @pytest.mark.parametrize('method', ['linear', 'nearest', 'previous'])
+    def testGetValuesAt(self, testIDE, method):
+        """ Test for getValuesAt method. """
+        eventArray = testIDE.channels[8].getSession()
+        data = eventArray.arraySlice()
+        times = np.array([0, 1, 999.5, 1000, 1500, 250000, 998999, 999000])
+
+        result = eventArray.getValuesAt(times, method=method)
+        np.testing.assert_equal(result[0], times)
+
+        before = np.searchsorted(data[0], times, side='right') - 1
+        after = np.minimum(before + 1, data.shape[1] - 1)
+        for i in range(1, len(data)):
+            if method == 'linear':
+                expected = np.interp(times, data[0], data[i])
+            elif method == 'previous':
+                expected = data[i][before]
+            else:
+                nearer = (data[0][after] - times) < (times - data[0][before])
+                expected = data[i][np.where(nearer, after, before)]
+            np.testing.assert_almost_equal(result[i], expected)
+
+        # Single values should match `getValueAt()`
+        for t in times[1:-1]:
+            np.testing.assert_almost_equal(
+                    eventArray.getValuesAt([t])[:, 0], eventArray.getValueAt(t))
+
+        # SubChannels
+        subResult = testIDE.channels[8][1].getSession().getValuesAt(times, method=method)
+        np.testing.assert_almost_equal(subResult, result[[0, 2]])
+
+    def testGetValuesAtOutOfRange(self, testIDE):
+        """ Test for getValuesAt method with times outside the data. """
+        eventArray = testIDE.channels[8].getSession()
+        data = eventArray.arraySlice()
+
+        with pytest.raises(IndexError):
+            eventArray.getValuesAt([-1, 10])
+        with pytest.raises(IndexError):
+            eventArray.getValuesAt([10, 1e9])
+        with pytest.raises(ValueError):
+            eventArray.getValuesAt([10], method='cubic')
+
+        result = eventArray.getValuesAt([-1, 1e9], outOfRange=True)
+        np.testing.assert_equal(result[1:, 0], data[1:, 0])
+        np.testing.assert_equal(result[1:, 1], data[1:, -1])
+
+        # Single-sample channel
+        single = testIDE.channels[36].getSession()
+        singleData = single.arraySlice()
+        result = single.getValuesAt(singleData[0][:10] + 1, method='previous')
+        np.testing.assert_equal(result[1:], singleData[1:, :10])
+
+    @pytest.mark.parametrize('subchannelId', [None, 0, 1])
+    def testSingleSample(self, SSX66115IDE, SSX66115Generic, subchannelId):
+        """ Test the single-sample EventArray against the general
+            implementation (the same file, imported without the hint).
+        """
+        eventArray = _getSession(SSX66115IDE, 36, subchannelId)
+        expected = _getSession(SSX66115Generic, 36, subchannelId)
+        assert isinstance(eventArray, SingleSampleEventArray)
+        assert type(expected) is EventArray
+        assert type(_getSession(SSX66115IDE, 8)) is EventArray
+
+        # Only the times and values are kept, not the data blocks. The data
+        # is shared with SubChannels, and is counted by the Channel's session.
+        usage = _getSession(SSX66115IDE, 36).memoryUsage()
+        assert usage['blocks'] == usage['elements'] == 0
+        assert usage['cache'] == eventArray._data.values.nbytes
+
+        n = len(eventArray)
+        assert n == len(expected) > 1
+        data = eventArray.arraySlice()
+        times = data[0]
+        np.testing.assert_array_equal(data, expected.arraySlice())
+        np.testing.assert_array_equal(eventArray.arraySlice(1, n, 3),
+                                      expected.arraySlice(1, n, 3))
+        np.testing.assert_array_equal(eventArray._inplaceTime(1, n, 2),
+                                      expected._inplaceTime(1, n, 2))
+        indices = np.array([0, 3, n - 1])
+        np.testing.assert_array_equal(eventArray._inplaceTimeFromIndices(indices),
+                                      times[indices])
+        # Blocks' recorded end times aren't kept; compare starts and indices
+        table, expectedTable = eventArray._getBlockTable(), expected._getBlockTable()
+        for i in (0, 2, 3):
+            np.testing.assert_array_equal(table[i], expectedTable[i])
+        np.testing.assert_array_equal(eventArray.getSegments(), expected.getSegments())
+
+        queries = np.concatenate(([times[0] - 1], times, times[:-1] + 1,
+                                  [times[-1] + 1]))
+        for t in queries:
+            assert (eventArray.getEventIndexBefore(t)
+                    == expected.getEventIndexBefore(t))
+            assert (eventArray.getEventIndexNear(t)
+                    == expected.getEventIndexNear(t))
+            assert (eventArray._getBlockIndexWithTime(t)
+                    == expected._getBlockIndexWithTime(t))
+        np.testing.assert_array_equal(eventArray._getEventIndicesBefore(queries),
+                                      expected._getEventIndicesBefore(queries))
+        for startTime, endTime in RANGE_TIMES:
+            assert (eventArray.getRangeIndices(startTime, endTime)
+                    == expected.getRangeIndices(startTime, endTime))
+        np.testing.assert_array_equal(eventArray.getValuesAt(times[1:], 'previous'),
+                                      eventArray.arraySlice(1))
+
+        # Each value is its own minimum, mean and maximum
+        mmm = eventArray.arrayMinMeanMax()
+        np.testing.assert_array_equal(mmm, expected.arrayMinMeanMax())
+        np.testing.assert_array_equal(mmm[0], mmm[1])
+        np.testing.assert_array_equal(mmm[1], mmm[2])
+        np.testing.assert_array_equal(mmm[1][1:], data[1:])
+        np.testing.assert_array_equal(
+            eventArray.arrayMinMeanMax(1e6, 2e6, times=False, display=True),
+            expected.arrayMinMeanMax(1e6, 2e6, times=False, display=True))
+        for span in (-1, 5):
+            np.testing.assert_allclose(eventArray._getBlockRollingMean(3, span),
+                                       expected._getBlockRollingMean(3, span))
+
+        # The general implementation updates the blocks' end times; last.
+        for idx in (0, n // 2, n - 1):
+            assert (eventArray.getSampleRate(idx)
+                    == pytest.approx(expected.getSampleRate(idx)))
+
+        # Pickled sessions keep the arrays
+        unpickled = pickle.loads(pickle.dumps(eventArray))
+        assert isinstance(unpickled, SingleSampleEventArray)
+        np.testing.assert_array_equal(unpickled.arraySlice(), data)
+
+    @pytest.mark.parametrize('filename', ['./testing/SSX66115.IDE', './testing/SSX_Data.IDE'])
+    def testColumnarCache(self, filename):
+        """ Test that the columnar cache produces the same results as the
+            structured cache.
+        """
+        doc = importer.openFile(_load_file(filename))
+        importer.readData(doc)
+        columnarDoc = importer.openFile(_load_file(filename))
+        importer.readData(columnarDoc, columnar=True)
+        assert columnarDoc.columnarCache
+
+        for chId, channel in doc.channels.items():
+            eventArray = channel.getSession()
+            columnar = columnarDoc.channels[chId].getSession()
+            if not len(eventArray):
+                continue
+            assert columnar._columns is not None
+            assert eventArray._columns is None
+
+            np.testing.assert_array_equal(columnar.arraySlice(),
+                                          eventArray.arraySlice())
+            np.testing.assert_array_equal(columnar.arrayValues(3, 100, 2),
+                                          eventArray.arrayValues(3, 100, 2))
+            times = eventArray.arraySlice(0, 10)[0] + 1
+            np.testing.assert_array_equal(columnar.getValuesAt(times, 'previous', True),
+                                          eventArray.getValuesAt(times, 'previous', True))
+
+            for subId, subchannel in enumerate(channel.subchannels):
+                sub = columnarDoc.channels[chId][subId].getSession()
+                raw = sub._accessCache(None, None, 1)
+                assert raw.flags.c_contiguous and not raw.flags.writeable
+                np.testing.assert_array_equal(
+                    raw, subchannel.getSession()._accessCache(None, None, 1))
+                np.testing.assert_array_equal(
+                    sub.arraySlice(), subchannel.getSession().arraySlice())
+
+    @pytest.mark.parametrize('columnar', [False, True])
+    @pytest.mark.parametrize('filename', ['./testing/SSX66115.IDE', './testing/SSX_Data.IDE'])
+    def testDropCache(self, filename, columnar):
+        """ Test that released data is transparently reloaded. """
+        doc = importer.openFile(_load_file(filename))
+        importer.readData(doc, columnar=columnar)
+
+        for chId, channel in doc.channels.items():
+            eventArray = channel.getSession()
+            if not len(eventArray):
+                continue
+            expected = eventArray.arraySlice()
+            subExpected = channel[0].getSession().arrayValues()
+
+            assert eventArray.isCached
+            if channel.singleSample:
+                # Single-sample data is kept in memory; nothing to release
+                assert not eventArray.dropCache()
+                assert eventArray.isCached
+                np.testing.assert_array_equal(eventArray.arraySlice(), expected)
+                continue
+
+            assert eventArray.dropCache()
+            assert not eventArray.isCached
+            assert not channel[0].getSession().isCached
+            assert eventArray.memoryUsage()['cache'] == 0
+            assert all(d._payload is None for d in eventArray._data)
+
+            np.testing.assert_array_equal(eventArray.arraySlice(), expected)
+            assert eventArray.isCached
+            assert (eventArray._columns is not None) == columnar
+
+            # Dropping via a subchannel drops the parent's data
+            assert channel[0].getSession().dropCache()
+            assert not eventArray.isCached
+            np.testing.assert_array_equal(channel[0].getSession().arrayValues(),
+                                          subExpected)
+
+        dropped = [ch for ch in doc.channels.values() if not ch.singleSample]
+        assert doc.dropCaches() == len(dropped)
+        for channel in dropped:
+            assert not channel.getSession().isCached
+        doc.close()
+
+    def testMemoryUsage(self):
+        """ Test the memory accounting of a dataset. """
+        doc = importer.openFile(_load_file('./testing/SSX66115.IDE'))
+        importer.readData(doc, columnar=True)
+
+        usage = doc.memoryUsage()
+        assert usage['total'] == sum(c['total'] for c in usage['channels'].values())
+        for chId, channel in doc.channels.items():
+            eventArray = channel.getSession()
+            sessionUsage = usage['channels'][chId]['sessions'][0]
+            assert sessionUsage['total'] == sum(v for k, v in sessionUsage.items()
+                                                if k != 'total')
+            assert sessionUsage['cache'] == eventArray._cacheArray.nbytes
+            assert sessionUsage['columns'] > 0
+            # Block payloads are views of the cache
+            assert sessionUsage['payloads'] == 0
+
+            # Subchannels share their parent's data
+            subUsage = channel[0].getSession().memoryUsage()
+            assert subUsage['cache'] == subUsage['blocks'] == 0
+
+        before = usage['channels'][8]['total']
+        doc.channels[8].getSession().dropCache()
+        after = doc.memoryUsage()['channels'][8]['total']
+        assert before - after >= doc.channels[8].getSession()._npType.itemsize * len(
+            doc.channels[8].getSession())
+        doc.close()
+
+    @rangeSessions
+    @rangeTimes
+    def testRangeStats(self, SSX66115IDE, channelId, subchannelId, startTime, endTime):
+        """ Test range statistics computed from the cumulative block sums
+            (getMean, getRMS, getStd) against the full data.
+        """
+        eventArray = _getSession(SSX66115IDE, channelId, subchannelId)
+
+        start, end = eventArray.getRangeIndices(startTime, endTime)
+        vals = eventArray.arrayValues(start, end)
+
+        assert eventArray._getLinearXform() is not None
+        np.testing.assert_allclose(eventArray.getMean(startTime, endTime),
+                                   vals.mean(), rtol=1e-9)
+        rms = eventArray.getRMS(startTime, endTime)
+        std = eventArray.getStd(startTime, endTime)
+        if subchannelId is not None:
+            vals = vals[0]
+        np.testing.assert_allclose(rms, np.sqrt(np.mean(vals**2, axis=-1)), rtol=1e-9)
+        np.testing.assert_allclose(std, np.std(vals, axis=-1), rtol=1e-7, atol=1e-9)
+
+        # Mean removal uses the same means
+        eventArray.removeMean = True
+        try:
+            removed = eventArray.arraySlice(start, end)
+        finally:
+            eventArray.removeMean = False
+        np.testing.assert_allclose(removed[1:].mean(axis=-1), 0, atol=1e-9)
+
+    def testRangeStatsNonlinear(self, SSX66115IDE):
+        """ Test range statistics computed from the calibrated values, as
+            when the calibration isn't linear, without the session's
+            `removeMean` being changed (e.g. seen by another thread).
+        """
+        eventArray = _getSession(SSX66115IDE, 8)
+        start, end = eventArray.getRangeIndices(1e6, 2e6)
+        vals = eventArray.arrayValues(start, end)
+
+        arrayValues = EventArray.arrayValues
+        removeMeans = []
+
+        def recordingArrayValues(session, *args, **kwargs):
+            removeMeans.append(eventArray.removeMean)
+            return arrayValues(session, *args, **kwargs)
+
+        eventArray.removeMean = True
+        try:
+            with mock.patch.object(EventArray, '_getRangeStats', return_value=None), \
+                    mock.patch.object(EventArray, 'arrayValues', recordingArrayValues):
+                rms = eventArray.getRMS(1e6, 2e6)
+                std = eventArray.getStd(1e6, 2e6)
+        finally:
+            eventArray.removeMean = False
+
+        assert removeMeans == [True, True]
+        np.testing.assert_allclose(rms, np.sqrt(np.mean(vals**2, axis=-1)), rtol=1e-9)
+        np.testing.assert_allclose(std, np.std(vals, axis=-1), rtol=1e-9)
+
     @pytest.mark.parametrize(
             't, expected',
             [
@@ -1791,24 +2268,51 @@ class TestEventArray:
         eventArray1._data[0].mean = [4]
         eventArray1._data[0].max = [5]
 
-    def testMeanRemovalSingleBlock(self, testIDE):
-        """ Testing mean removal for spans less than one block """
+    def testRollingMeanRemoval(self, testIDE):
+        """ Testing rolling mean removal, with a span shorter than the data """
 
         eventArray = testIDE.channels[8].getSession()
         eventArray.removeMean = False
 
         unremovedData = eventArray[:]
+        span = (unremovedData[0, -1] - unremovedData[0, 0]) / 10
+        unremovedData[1:] -= rolling.rollingStat(unremovedData[0],
+                                                 unremovedData[1:], span)
 
-        eventArray.rollingMeanSpan = 1
+        eventArray.rollingMeanSpan = span
         eventArray.removeMean = True
 
-        # for d in eventArray._data:
-        #     unremovedData[1:, slice(*d.indexRange)] -= d.mean[:, np.newaxis]
-        unremovedData[1:] -= unremovedData[1:].mean(axis=1, keepdims=True)
-
         removedData = eventArray[:]
+        np.testing.assert_allclose(removedData, unremovedData, atol=1e-12)
 
-        np.testing.assert_array_equal(removedData, unremovedData)
+        # Values only
+        np.testing.assert_allclose(eventArray.arrayValues(),
+                                   unremovedData[1:], atol=1e-12)
+
+    @pytest.mark.parametrize('stat', rolling.STATISTICS)
+    def testArrayRolling(self, testIDE, stat):
+        """ Test rolling statistics, computed in chunks. """
+        eventArray = testIDE.channels[8].getSession()
+        data = eventArray[:]
+        span = (data[0, -1] - data[0, 0]) / 20
+        expected = rolling.rollingStat(data[0], data[1:], span, stat)
+
+        with mock.patch.object(EventArray, 'STATS_CHUNK_SIZE', 100):
+            result = eventArray.arrayRolling(span=span, stat=stat)
+            np.testing.assert_array_equal(result[0], data[0])
+            np.testing.assert_allclose(result[1:], expected, atol=1e-12)
+
+            result = eventArray.arrayRolling(10, 500, 3, span=span, stat=stat)
+            np.testing.assert_allclose(result[1:], expected[:, 10:500:3], atol=1e-12)
+
+        sub = testIDE.channels[8][1].getSession()
+        np.testing.assert_allclose(sub.arrayRolling(span=span, stat=stat)[1],
+                                   expected[1], atol=1e-12)
+
+        with pytest.raises(ValueError):
+            eventArray.arrayRolling(span=0)
+        with pytest.raises(ValueError):
+            eventArray.arrayRolling(stat='median')
 
     def testMeanRemovalFullFile(self, testIDE):
         """ Testing mean removal spanning the full file """
@@ -1885,6 +2389,163 @@ class TestPlot:
         pass
 
 
+class TestWarningRange:
+    """ Tests for the WarningRange class. """
+
+    @pytest.fixture
+    def dataset(self):
+        doc = importer.openFile(_load_file('./testing/SSX66115.IDE'))
+        importer.readData(doc)
+        return doc
+
+    @pytest.fixture(params=[(25.8, 26.0), (None, 25.9), (25.9, None)])
+    def warning(self, dataset, request):
+        low, high = request.param
+        return WarningRange(dataset, warningId=99, channelId=59,
+                            subchannelId=1, low=low, high=high)
+
+    @staticmethod
+    def _getRangeScalar(warning, start, end):
+        """ Reference (per-event) implementation of `getRange()`. """
+        source = warning.getSessionSource()
+        times, values = source.arraySlice(*source.getRangeIndices(start, end))
+
+        outOfRange = not warning.getValueAt(start)[-1]
+        result = [[start, start]] if outOfRange else []
+        for t, v in zip(times, values):
+            if warning.valid(v):
+                if outOfRange:
+                    result[-1][1] = t
+                    outOfRange = False
+            elif not outOfRange:
+                result.append([t, t])
+                outOfRange = True
+        if outOfRange:
+            result[-1][1] = -1
+        return result
+
+    def testGetRange(self, warning):
+        source = warning.getSessionSource()
+        times = source.arraySlice()[0]
+        assert len(warning.getIntervals()) > 0
+
+        for start, end in ((times[0], times[-1]),
+                           (times[10], times[100]),
+                           (times[10] + 1, times[100] - 1),
+                           (times[55], times[56]),
+                           (times[-20], times[-1])):
+            assert warning.getRange(start, end) == self._getRangeScalar(warning, start, end)
+
+        assert warning.getRange() == self._getRangeScalar(warning, times[0], times[-1])
+
+    def testGetIntervals(self, warning):
+        source = warning.getSessionSource()
+        times, values = source.arraySlice()
+        intervals = warning.getIntervals()
+
+        for t, v in zip(times, values):
+            inside = ((intervals[:, 0] <= t)
+                      & ((t < intervals[:, 1]) | (intervals[:, 1] == -1)))
+            assert inside.any() != warning.valid(v)
+
+    def testTransformChanged(self, dataset, warning):
+        before = warning.getIntervals()
+        warning.source.setTransform(Univariate((1, 100)))
+        dataset.updateTransforms()
+
+        after = warning.getIntervals()
+        fresh = WarningRange(dataset, warningId=99, channelId=59, subchannelId=1,
+                             low=warning.low, high=warning.high)
+        np.testing.assert_array_equal(after, fresh.getIntervals())
+        assert not np.array_equal(after, before)
+
+
+#===============================================================================
+#--- Pickling test cases
+#===============================================================================
+
+class TestPickle:
+    """ Tests for pickling `Dataset` and `EventArray` objects. """
+
+    @pytest.fixture(params=['./test.ide', './testing/SSX_Data.IDE',
+                            './testing/Discontinuities.IDE'])
+    def dataset(self, request):
+        doc = importer.importFile(request.param)
+        yield doc
+        doc.close()
+
+    @staticmethod
+    def _assertSessionsEqual(old, new):
+        assert len(new) == len(old)
+        if len(old):
+            np.testing.assert_array_equal(new.arraySlice(), old.arraySlice())
+            np.testing.assert_array_equal(new.getSegments(), old.getSegments())
+
+    def testDataset(self, dataset):
+        doc = pickle.loads(pickle.dumps(dataset))
+        assert doc.filename == dataset.filename
+        assert sorted(doc.channels) == sorted(dataset.channels)
+
+        for chId, ch in dataset.channels.items():
+            newCh = doc.channels[chId]
+            session = ch.getSession()
+            newSession = newCh.getSession()
+            assert newSession.dataset is doc
+            self._assertSessionsEqual(session, newSession)
+
+            for subId, subch in enumerate(ch.subchannels):
+                newSub = newCh[subId]
+                assert newSub.name == subch.name
+                assert newSub.getSession()._data is newSession._data
+                self._assertSessionsEqual(subch.getSession(), newSub.getSession())
+
+        # Pickling an unpickled Dataset
+        doc2 = pickle.loads(pickle.dumps(doc))
+        for chId, ch in dataset.channels.items():
+            self._assertSessionsEqual(ch.getSession(),
+                                      doc2.channels[chId].getSession())
+
+    def testEventArray(self, dataset):
+        for ch in dataset.channels.values():
+            for source in [ch] + list(ch.subchannels):
+                session = source.getSession()
+                self._assertSessionsEqual(session, pickle.loads(pickle.dumps(session)))
+
+    def testLoading(self):
+        doc = importer.openFile('./test.ide')
+        importer.readData(doc, startTime=0, endTime=1)
+        doc.loading = True
+        with pytest.raises(TypeError):
+            pickle.dumps(doc.channels[8].getSession())
+        doc.close()
+
+    def testBytesIO(self):
+        """ Test pickling a Dataset read from a stream with no filename. """
+        with open('./test.ide', 'rb') as f:
+            doc = importer.openFile(BytesIO(f.read()))
+        importer.readData(doc)
+
+        doc2 = pickle.loads(pickle.dumps(doc))
+        assert doc2.ebmldoc.stream is not doc.ebmldoc.stream
+        for chId, ch in doc.channels.items():
+            self._assertSessionsEqual(ch.getSession(),
+                                      doc2.channels[chId].getSession())
+        doc.close()
+        doc2.close()
+
+    def testFileChanged(self, tmp_path):
+        filename = tmp_path / 'test.ide'
+        shutil.copyfile('./test.ide', filename)
+        doc = importer.importFile(str(filename))
+        data = pickle.dumps(doc)
+        doc.close()
+
+        with open(filename, 'ab') as f:
+            f.write(b'\x00' * 16)
+        with pytest.raises(IOError):
+            pickle.loads(data)
+
+
 #===============================================================================
 #--- Data test cases
 #===============================================================================
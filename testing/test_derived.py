@@ -0,0 +1,156 @@
+"""
+Tests of derived (virtual) channels.
+"""
+from io import StringIO
+import pickle
+
+import numpy as np
+import pytest  # type: ignore
+
+from idelib import importer
+from idelib.derived import DerivedChannel, DerivedEventArray
+
+
+# ==============================================================================
+#
+# ==============================================================================
+
+def _resultant(xyz):
+    return np.sqrt((xyz ** 2).sum(axis=0))
+
+
+@pytest.fixture(params=['./test.ide', './testing/Discontinuities.IDE'])
+def dataset(request):
+    doc = importer.importFile(request.param)
+    yield doc
+    doc.close()
+
+
+def test_values(dataset):
+    accel = dataset.channels[8]
+    derived = dataset.addDerivedChannel([accel], _resultant, name="Resultant",
+                                        units=('Acceleration', 'g'))
+    assert isinstance(derived, DerivedChannel)
+    assert dataset.channels[derived.id] is derived
+    assert derived[0].name == "Resultant"
+    assert derived[0].units == ('Acceleration', 'g')
+
+    source = accel.getSession()
+    session = derived[0].getSession()
+    assert isinstance(session, DerivedEventArray)
+    assert len(session) == len(source)
+
+    expected = _resultant(source.arrayValues())
+    np.testing.assert_array_equal(session.arraySlice()[0], source.arraySlice()[0])
+    np.testing.assert_allclose(session.arrayValues()[0], expected)
+    np.testing.assert_allclose(session.arraySlice(5, 500, 3)[1], expected[5:500:3])
+    np.testing.assert_allclose(session[-1][1], expected[-1])
+    np.testing.assert_array_equal(session.getSegments(), source.getSegments())
+    assert session.getMean() == pytest.approx(expected.mean())
+    assert session.getMax()[1] == pytest.approx(expected.max())
+
+
+def test_minMeanMax(dataset):
+    accel = dataset.channels[8]
+    derived = dataset.addDerivedChannel([accel], _resultant)
+    session = derived[0].getSession()
+    expected = _resultant(accel.getSession().arrayValues())
+
+    mmm = session.arrayMinMeanMax()
+    _starts, _ends, firsts, counts, _periods = session._getBlockTable()
+    for i, (first, count) in enumerate(zip(firsts, counts)):
+        values = expected[first:first + count]
+        np.testing.assert_allclose(mmm[:, 1, i],
+                                   (values.min(), values.mean(), values.max()))
+
+
+def test_lazy(dataset):
+    derived = dataset.addDerivedChannel([dataset.channels[8]], _resultant)
+    session = derived.getSession()
+    assert not any(b.payload is not None for b in session._data)
+
+    session.arraySlice(0, 10)
+    assert session._data[0].payload is not None
+    assert session._data[-1].payload is None
+    assert not session.isCached
+
+    session.arraySlice()
+    assert session.isCached
+    assert derived[0].getSession().isCached
+
+    assert session.dropCache()
+    assert not session.isCached
+    assert all(b.payload is None for b in session._data)
+    np.testing.assert_allclose(derived[0].getSession().arrayValues()[0],
+                               _resultant(dataset.channels[8].getSession().arrayValues()))
+
+
+def test_subchannels(dataset):
+    accel = dataset.channels[8]
+    derived = dataset.addDerivedChannel([accel[0], accel[1]],
+                                        lambda x, y: (x + y, x - y),
+                                        names=['Sum', 'Difference'])
+    assert [sc.name for sc in derived.subchannels] == ['Sum', 'Difference']
+
+    x, y = accel.getSession().arrayValues()[:2]
+    values = derived.getSession().arrayValues()
+    np.testing.assert_allclose(values, (x + y, x - y))
+    np.testing.assert_allclose(derived[1].getSession().arrayValues()[0], x - y)
+
+    out = StringIO()
+    num, _elapsed = derived.getSession().exportCsv(out)
+    assert num == len(x)
+    assert len(out.getvalue().splitlines()) == len(x)
+
+    # Derived from a derived channel
+    double = dataset.addDerivedChannel([derived[0]], lambda v: v * 2)
+    np.testing.assert_allclose(double[0].getSession().arrayValues()[0], (x + y) * 2)
+
+
+def test_interpolated():
+    doc = importer.importFile('./testing/Discontinuities.IDE')
+    a, b = doc.channels[8][2], doc.channels[32][2]
+    derived = doc.addDerivedChannel([a, b], np.subtract)
+
+    times, values = a.getSession().arraySlice()
+    expected = values - b.getSession().getValuesAt(times, outOfRange=True)[1]
+    np.testing.assert_allclose(derived[0].getSession().arrayValues()[0], expected)
+    doc.close()
+
+
+def test_updateTransforms():
+    doc = importer.importFile('./test.ide')
+    derived = doc.addDerivedChannel([doc.channels[8][0]], lambda x: x)
+    session = derived[0].getSession()
+    session.arraySlice()
+    assert session.isCached
+
+    doc.updateTransforms()
+    assert not session.isCached
+    assert all(b.mean is None for b in session._data)
+    np.testing.assert_allclose(session.arrayValues(),
+                               doc.channels[8][0].getSession().arrayValues())
+    doc.close()
+
+
+def test_pickle():
+    doc = importer.importFile('./test.ide')
+    derived = doc.addDerivedChannel([doc.channels[8]], np.negative)
+    derived.getSession().arraySlice()
+
+    doc2 = pickle.loads(pickle.dumps(doc))
+    np.testing.assert_allclose(doc2.channels[derived.id].getSession().arrayValues(),
+                               -doc.channels[8].getSession().arrayValues())
+    doc.close()
+    doc2.close()
+
+
+def test_errors(dataset):
+    with pytest.raises(ValueError):
+        dataset.addDerivedChannel([], _resultant)
+    with pytest.raises(TypeError):
+        dataset.addDerivedChannel([dataset.channels[8].getSession()], _resultant)
+    with pytest.raises(ValueError):
+        dataset.addDerivedChannel([dataset.channels[8]], _resultant, names=['a', 'b'])
+    with pytest.raises(ValueError):
+        dataset.addDerivedChannel([dataset.channels[8]], _resultant, channelId=8)
@@ -2,10 +2,16 @@
 Tests for special features of the importing functions.
 """
 import os.path
+import subprocess
+import sys
+import threading
+import time
 
+import mock
 import pytest  # type: ignore
 
 from idelib import importer
+from idelib.dataset import EventArray
 from testing.file_streams import makeStreamLike
 
 
@@ -114,3 +120,129 @@ class TestImportRange:
             "Imported file did not contain data for specified channel"
         assert len(doc.channels[32].getSession()) == 0, \
             "Imported file contains data from excluded channel"
+
+
+# ==============================================================================
+#
+# ==============================================================================
+
+class TestThreadedImport:
+
+    def test_waitForData(self):
+        """ Test waiting for data being imported in another thread. """
+        doc = importer.openFile(makeStreamLike('./test.ide'))
+        session = doc.channels[8].getSession()
+        assert doc.loading
+        assert not session.waitForData(timeout=0.01)
+        assert not doc.waitForLoad(timeout=0.01)
+
+        thread = threading.Thread(target=importer.readData, args=(doc,))
+        thread.start()
+        try:
+            assert session.waitForData(timeout=30)
+            assert len(session._data) > 0
+            assert doc.channels[8][0].getSession().waitForData(timeout=30)
+            assert doc.waitForLoad(timeout=30)
+        finally:
+            thread.join()
+
+        assert not doc.loading
+        numBlocks = len(session._data)
+        # Loading is done, so this returns immediately.
+        assert not session.waitForData(numBlocks + 1)
+        assert session.waitForData(numBlocks)
+        doc.close()
+
+    def test_bivariateReference(self):
+        """ Test that a bivariate transform waits for its reference channel
+            while importing, rather than failing.
+        """
+        doc = importer.openFile(makeStreamLike('./testing/SSX66115.IDE'))
+        xform = doc.transforms[1]
+        assert not xform._eventlist
+
+        thread = threading.Thread(target=importer.readData, args=(doc,))
+        thread.start()
+        try:
+            assert xform.isValid()
+            assert len(xform._eventlist) > 0
+        finally:
+            thread.join()
+        doc.close()
+
+
+    def test_bivariateNotImporting(self):
+        """ Test that a bivariate transform doesn't wait for its reference
+            channel if no import is running, even though the dataset is
+            still `loading` (opened but not read).
+        """
+        doc = importer.openFile(makeStreamLike('./testing/SSX66115.IDE'))
+        xform = doc.channels[8][0].transform
+        assert doc.loading
+
+        start = time.time()
+        for _ in range(3):
+            assert xform(1000, 1.0) == (1000, 1.0)
+        assert not xform.isValid()
+        assert time.time() - start < EventArray.WAIT_TIMEOUT / 2
+        doc.close()
+
+    def test_bivariateWaitsOnce(self):
+        """ Test that a bivariate transform waits for its reference channel
+            being imported in another thread only once per session, and not
+            at all if the reference isn't used.
+        """
+        doc = importer.openFile(makeStreamLike('./testing/SSX66115.IDE'))
+        xform = doc.channels[8][0].transform
+
+        # Stands in for a thread running `readData()`
+        done = threading.Event()
+        doc._importThread = threading.Thread(target=done.wait)
+        doc._importThread.start()
+        try:
+            with mock.patch.object(EventArray, 'waitForData',
+                                   return_value=False) as waitForData:
+                assert xform(1000, 1.0, noBivariates=True) == (1000, 1.0)
+                waitForData.assert_not_called()
+                for _ in range(3):
+                    assert xform(1000, 1.0) == (1000, 1.0)
+                waitForData.assert_called_once()
+        finally:
+            done.set()
+            doc._importThread.join()
+        doc.close()
+
+
+class TestLazyImport:
+
+    def test_import_idelib(self):
+        """ Test that importing the package doesn't import the importer
+            (and NumPy), and that the lazy attributes are available.
+        """
+        code = ("import sys, idelib; "
+                "print('idelib.importer' in sys.modules, 'numpy' in sys.modules); "
+                "idelib.importFile; idelib.matfile; idelib.unit_conversion; "
+                "print('idelib.importer' in sys.modules)")
+        result = subprocess.run([sys.executable, '-c', code], check=True,
+                                capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(__file__)))
+        assert result.stdout.split() == ['False', 'False', 'True']
+
+        import idelib
+        assert idelib.importFile is importer.importFile
+        assert 'multi_importer' in dir(idelib)
+        with pytest.raises(AttributeError):
+            idelib.bogus
+
+    def test_schema_cached(self):
+        """ Test that the schema and element tables are shared by datasets. """
+        from idelib.dataset import getSchema
+        doc1 = importer.openFile(makeStreamLike('./test.ide'))
+        doc2 = importer.openFile(makeStreamLike('./test.ide'))
+        try:
+            assert doc1.ebmldoc.schema is doc2.ebmldoc.schema is getSchema()
+            assert sorted(doc1._parsers) == sorted(doc2._parsers)
+            assert importer._getElementTable.cache_info().hits > 0
+        finally:
+            doc1.close()
+            doc2.close()
@@ -0,0 +1,98 @@
+"""
+Tests of the optional import/query instrumentation.
+"""
+import threading
+
+import numpy as np
+import pytest  # type: ignore
+
+from idelib import importer
+from idelib.instrumentation import Stats, TimedLock
+from testing.file_streams import makeStreamLike
+
+
+# ==============================================================================
+#
+# ==============================================================================
+
+@pytest.fixture
+def instrumentedDataset():
+    events = []
+    doc = importer.openFile(makeStreamLike('./test.ide'))
+    stats = doc.enableStats(hook=lambda event, s: events.append(event))
+    importer.readData(doc)
+    yield doc, stats, events
+    doc.close()
+
+
+def test_importStats(instrumentedDataset):
+    doc, stats, events = instrumentedDataset
+    assert doc.stats is stats
+    assert events == ['parse', 'finish', 'fillCaches', 'import']
+
+    numBlocks = sum(len(ea._data) for ch in doc._channels.values()
+                    for ea in ch.sessions.values())
+    assert stats.blocksAppended == numBlocks
+    assert stats.elements['ChannelDataBlock'] > 0
+    assert 0 < stats.bytesRead <= len(makeStreamLike('./test.ide').read())
+    for name in ('ebml', 'parse', 'append', 'finish', 'fillCaches', 'lockWait'):
+        assert stats.times[name] >= 0, name
+    assert stats.times['append'] <= stats.times['parse']
+    assert stats.lockWaits >= numBlocks
+
+    d = stats.asDict()
+    assert d['blocksAppended'] == numBlocks
+    assert d['elements']['ChannelDataBlock'] == stats.elements['ChannelDataBlock']
+
+
+def test_queryStats(instrumentedDataset):
+    doc, stats, _events = instrumentedDataset
+    stats.reset()
+    assert stats.times == {} and stats.cacheHits == 0
+
+    session = doc.channels[8].getSession()
+    values = session.arrayValues()
+    assert stats.cacheHits > 0
+    assert stats.cacheMisses == 0
+    assert stats.times['calibration'] > 0
+
+    # Disabling restores the original lock, and stops counting
+    hits = stats.cacheHits
+    assert doc.disableStats() is stats
+    assert doc.stats is None
+    assert not isinstance(doc._channelDataLock, TimedLock)
+    assert session._channelDataLock is doc._channelDataLock
+    np.testing.assert_array_equal(session.arrayValues(), values)
+    assert stats.cacheHits == hits
+
+
+def test_disabled():
+    doc = importer.openFile(makeStreamLike('./test.ide'))
+    importer.readData(doc)
+    assert doc.stats is None
+    assert doc.disableStats() is None
+    doc.close()
+
+
+def test_timer():
+    stats = Stats()
+    with stats.timer('x'):
+        with stats.timer('x'):
+            pass
+        with stats.timer('y'):
+            pass
+    assert set(stats.times) == {'x', 'y'}
+    assert stats.times['x'] >= stats.times['y']
+
+    assert list(stats.timeIterator('it', range(3))) == [0, 1, 2]
+    assert stats.times['it'] >= 0
+
+
+def test_timedLock():
+    stats = Stats()
+    lock = TimedLock(threading.Lock(), stats)
+    with lock:
+        assert lock.locked()
+        assert not lock.acquire(blocking=False)
+    assert not lock.locked()
+    assert stats.lockWaits == 2
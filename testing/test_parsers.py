@@ -1,3 +1,5 @@
+from io import BytesIO
+import threading
 import unittest
 import mock
 import struct
@@ -5,8 +7,11 @@ import struct
 from ebmlite.core import *  # type: ignore
 import numpy as np  # type: ignore
 
-from idelib.importer import openFile
+from idelib.importer import openFile, readData
 from idelib.parsers import ChannelDataBlockParser, ChannelDataBlock
+from idelib.parsers import SimpleChannelDataBlock, SimpleChannelDataBlockParser
+from idelib.parsers import AccelerometerParser, MPL3115PressureTempParser
+from idelib.parsers import PackedParser, getFormatParser
 
 from .file_streams import makeStreamLike
 
@@ -120,6 +125,240 @@ class TestChannelDataBlock(unittest.TestCase):
         self.assertFalse(self.block.isValidLength(parser))
 
 
+class TestUnpackArray(unittest.TestCase):
+    """ Tests for the vectorized `unpack_array()` of special-case parsers """
+
+    def testUnpackArray(self):
+        rng = np.random.default_rng(42)
+        for parser in (MPL3115PressureTempParser(), AccelerometerParser(),
+                       AccelerometerParser(">HHH")):
+            with self.subTest(parser=parser):
+                # Random data, with an incomplete sample at the end
+                data = rng.integers(0, 256, parser.size * 500 + 3,
+                                    dtype=np.uint8).tobytes()
+                result = parser.unpack_array(data)
+                self.assertEqual(result.dtype, parser.dtype)
+                expected = [parser.unpack_from(data, i)
+                            for i in range(0, parser.size * 500, parser.size)]
+                self.assertEqual([tuple(x) for x in result], expected)
+
+
+class TestSimpleChannelDataBlock(unittest.TestCase):
+    """ Tests for SimpleChannelDataBlock, using a synthetic legacy recording
+        (no recorder description; default channels).
+    """
+
+    def setUp(self):
+        schema = loadSchema('mide_ide.xml')
+        rng = np.random.default_rng(0)
+        self.stream = BytesIO()
+        schema.encode(self.stream, [], headers=True)
+        blockEl = schema['SimpleChannelDataBlock']
+        for i in range(20):
+            # Accelerometer (channel 0) and pressure/temperature (channel 1)
+            t = (i * 7000) % 2**16
+            accel = rng.integers(0, 2**16, 30, dtype=np.uint16).astype('<u2')
+            self.stream.write(blockEl.encode(struct.pack('>HB', t, 0)
+                                             + accel.tobytes()))
+            self.stream.write(blockEl.encode(struct.pack('>HB', (t + 5) % 2**16, 1)
+                                             + rng.bytes(5)))
+        self.stream.seek(0)
+
+        self.doc = openFile(self.stream)
+        self.elements = [el for el in self.doc.ebmldoc
+                         if el.name == 'SimpleChannelDataBlock']
+
+    def testImport(self):
+        """ Test that data parsed with `unpack_array()` on import matches
+            the data parsed one sample at a time.
+        """
+        readData(self.doc)
+        parser = self.doc.channels[1].parser
+        session = self.doc.channels[1].getSession()
+        expected = [parser.unpack_from(el.value, 3)
+                    for el in self.elements if el.value[2] == 1]
+        self.assertEqual(len(session), len(expected))
+        np.testing.assert_array_equal(session.arrayValues(),
+                                      np.array(expected).T)
+
+    def testImportTimes(self):
+        """ Test that deferred (vectorized) timestamp correction gets the
+            same times as correcting block by block (when streaming).
+        """
+        readData(self.doc)
+        stream = BytesIO(self.stream.getvalue())
+        streamed = openFile(stream)
+        readData(streamed, streaming=True)
+
+        for chId in (0, 1):
+            times = self.doc.channels[chId].getSession()._getBlockTable()[0]
+            expected = streamed.channels[chId].getSession()._getBlockTable()[0]
+            np.testing.assert_array_equal(times, expected)
+            self.assertEqual(len(times), 20)
+            self.assertTrue((np.diff(times) > 0).all())
+
+    def testStreamingDefault(self):
+        """ Test that blocks are only deferred if the import can't be
+            observed: not with an updater, or in a thread other than main.
+        """
+        finish = SimpleChannelDataBlockParser.finish
+        lengths = {}
+
+        def recordingFinish(handler):
+            # Data added before any deferred blocks are
+            doc = handler.doc
+            lengths.setdefault(doc, len(doc.channels[0].getSession()))
+            finish(handler)
+
+        docs = [self.doc] + [openFile(BytesIO(self.stream.getvalue()))
+                             for _ in range(3)]
+        with mock.patch.object(SimpleChannelDataBlockParser, 'finish',
+                               recordingFinish):
+            readData(docs[0])
+            readData(docs[1], updater=lambda **kw: None)
+            thread = threading.Thread(target=readData, args=(docs[2],))
+            thread.start()
+            thread.join()
+            readData(docs[3], updater=lambda **kw: None, streaming=False)
+
+        self.assertEqual([lengths[doc] for doc in docs], [0, 200, 200, 0])
+        for doc in docs:
+            self.assertEqual(len(doc.channels[0].getSession()), 200)
+
+    def testFixOverflows(self):
+        """ Test vectorized timestamp correction against `fixOverflow()`,
+            including rollovers and non-modulo timestamps.
+        """
+        rng = np.random.default_rng(1)
+        timestamps = np.cumsum(rng.integers(0, 30000, 200)) % 2**16
+        timestamps[[50, 51, 120]] += 2**20
+        handler = SimpleChannelDataBlockParser(self.doc)
+        handler.lastStamp[0] = 1000
+        block = SimpleChannelDataBlock(self.elements[0])
+        expected = [handler.fixOverflow(block, t) for t in timestamps.tolist()]
+        state = handler.timestampOffset[0], handler.lastStamp[0]
+
+        handler = SimpleChannelDataBlockParser(self.doc)
+        handler.lastStamp[0] = 1000
+        np.testing.assert_array_equal(handler.fixOverflows(0, timestamps[:100]),
+                                      expected[:100])
+        np.testing.assert_array_equal(handler.fixOverflows(0, timestamps[100:]),
+                                      expected[100:])
+        self.assertEqual((handler.timestampOffset[0], handler.lastStamp[0]), state)
+
+    def testParseWith(self):
+        parser = AccelerometerParser()
+        block = SimpleChannelDataBlock(self.elements[0])
+        data = self.elements[0].value
+        expected = [parser.unpack_from(data, i)
+                    for i in range(block.headerSize, len(data), parser.size)]
+
+        self.assertEqual([tuple(x) for x in block.parseWith(parser)], expected)
+        self.assertEqual([tuple(x) for x in block.parseWith(parser, 2, 8, 3)],
+                         expected[2:8:3])
+        np.testing.assert_array_equal(block.parseWith(parser, subchannel=1),
+                                      [x[1] for x in expected])
+        self.assertEqual([tuple(x) for x in
+                          block.parseByIndexWith(parser, [1, 4, 100])],
+                         [expected[1], expected[4]])
+
+        # Parsers without `unpack_array()` parse one sample at a time
+        structParser = struct.Struct('<HHH')
+        self.assertEqual(list(block.parseWith(structParser, 2, 8, 3)),
+                         [structParser.unpack_from(data, block.headerSize + i*6)
+                          for i in range(2, 8, 3)])
+
+
+class TestPackedParser(unittest.TestCase):
+    """ Tests for PackedParser (packed integers of arbitrary bit widths) """
+
+    def testKnownValues(self):
+        parser = PackedParser('<i24i24')
+        data = (-5).to_bytes(3, 'little', signed=True) + (70000).to_bytes(3, 'little')
+        self.assertEqual(parser.size, 6)
+        self.assertEqual(parser.unpack_from(data), (-5, 70000))
+
+        parser = PackedParser('>2i24')
+        data = (-5).to_bytes(3, 'big', signed=True) + (70000).to_bytes(3, 'big')
+        self.assertEqual(parser.unpack_from(data), (-5, 70000))
+
+        # Two 12-bit values in 3 bytes
+        self.assertEqual(PackedParser('<u12u12').unpack_from(b'\x23\xc1\xab'),
+                         (0x123, 0xabc))
+        self.assertEqual(PackedParser('>u12u12').unpack_from(b'\x12\x3a\xbc'),
+                         (0x123, 0xabc))
+        self.assertEqual(PackedParser('>i12i12').unpack_from(b'\xff\xf8\x00'),
+                         (-1, -2048))
+
+        # Padding
+        parser = PackedParser('<x4u12')
+        self.assertEqual(parser.size, 2)
+        self.assertEqual(len(parser.dtype), 1)
+        self.assertEqual(parser.unpack_from(b'\x3f\x12'), (0x123,))
+
+        self.assertEqual(parser.ranges, ((0, 4095),))
+        self.assertEqual(PackedParser('<i24').ranges, ((-2**23, 2**23-1),))
+
+    def testUnpackArray(self):
+        rng = np.random.default_rng(42)
+        for fmt in ('<i24i24i24', '>i24i24i24', '<i12i12', '>u12u12',
+                    '<3i12x4', '>i20u4', '<i32u32i5', '>x3i32u1', 'u1i7'):
+            with self.subTest(format=fmt):
+                parser = PackedParser(fmt)
+                data = rng.bytes(parser.size * 200)
+                result = parser.unpack_array(data)
+                self.assertEqual(result.dtype, parser.dtype)
+                expected = [parser.unpack_from(data, i)
+                            for i in range(0, len(data), parser.size)]
+                self.assertEqual([tuple(x) for x in result.tolist()], expected)
+
+    def testGetFormatParser(self):
+        self.assertIsInstance(getFormatParser('<i24i24i24'), PackedParser)
+        self.assertIsInstance(getFormatParser(b'<3u12'), PackedParser)
+        self.assertIsInstance(getFormatParser('<hhh'), struct.Struct)
+        self.assertIsInstance(getFormatParser('<i2i'), struct.Struct)
+        self.assertEqual(getFormatParser('<i24'), PackedParser('<i24'))
+
+        self.assertRaises(ValueError, PackedParser, '<hhh')
+        self.assertRaises(ValueError, PackedParser, '<i33')
+        self.assertRaises(ValueError, PackedParser, '<i0')
+
+    def testImport(self):
+        """ Test importing a channel with a packed format. """
+        schema = loadSchema('mide_ide.xml')
+        rng = np.random.default_rng(0)
+        stream = BytesIO()
+        schema.encode(stream, [], headers=True)
+        stream.write(schema['RecordingProperties'].encode({'ChannelList': {
+            'Channel': [{'ChannelID': 5,
+                         'ChannelFormat': '<i24i24i24',
+                         'SubChannel': [{'SubChannelID': i,
+                                         'SubChannelUnits': 'counts'}
+                                        for i in range(3)]}]}}))
+        payloads = []
+        for i in range(10):
+            payloads.append(rng.bytes(9 * 100))
+            stream.write(schema['ChannelDataBlock'].encode(
+                {'ChannelIDRef': 5,
+                 'StartTimeCodeAbsMod': i * 1000,
+                 'EndTimeCodeAbsMod': i * 1000 + 990,
+                 'ChannelDataPayload': payloads[-1]}))
+        stream.seek(0)
+
+        doc = openFile(stream)
+        readData(doc)
+        self.assertIsInstance(doc.channels[5].parser, PackedParser)
+
+        session = doc.channels[5].getSession()
+        data = b''.join(payloads)
+        expected = np.array([[int.from_bytes(data[i:i+3], 'little', signed=True)
+                              for i in range(j, len(data), 9)]
+                             for j in (0, 3, 6)])
+        np.testing.assert_array_equal(session.arrayValues(), expected)
+        np.testing.assert_array_equal(
+            doc.channels[5][1].getSession().arrayValues()[0], expected[1])
+
+
 def tuplify(arr):
 
     out = []
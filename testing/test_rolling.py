@@ -0,0 +1,77 @@
+import numpy as np
+import pytest  # type: ignore
+
+from idelib import rolling
+
+
+# ==============================================================================
+#
+# ==============================================================================
+
+_REFERENCE = {
+    'mean': lambda x: x.mean(axis=-1),
+    'rms': lambda x: np.sqrt((x * x).mean(axis=-1)),
+    'std': lambda x: x.std(axis=-1),
+    'min': lambda x: x.min(axis=-1),
+    'max': lambda x: x.max(axis=-1),
+}
+
+
+@pytest.fixture
+def signal():
+    """ Irregularly spaced samples, with a discontinuity. """
+    rng = np.random.default_rng(1234)
+    times = np.cumsum(rng.uniform(0.5, 1.5, 3000))
+    times[2000:] += 500
+    values = rng.normal(1000, 10, (3, 3000))
+    return times, values
+
+
+def test_getWindowBounds():
+    times = np.arange(10, dtype=np.float64)
+    lo, hi = rolling.getWindowBounds(times, 4)
+    np.testing.assert_array_equal(lo, np.maximum(np.arange(10) - 1, 0))
+    np.testing.assert_array_equal(hi, np.minimum(np.arange(10) + 3, 10))
+
+    lo, hi = rolling.getWindowBounds(times, 4, at=np.array([-10, 4.5]))
+    np.testing.assert_array_equal(lo, [0, 3])
+    np.testing.assert_array_equal(hi, [0, 7])
+
+
+@pytest.mark.parametrize('stat', rolling.STATISTICS)
+@pytest.mark.parametrize('span', [0.5, 7.3, 100, 1e6])
+def test_rollingStat(signal, stat, span):
+    times, values = signal
+    result = rolling.rollingStat(times, values, span, stat)
+    assert result.shape == values.shape
+
+    lo, hi = rolling.getWindowBounds(times, span)
+    expected = np.stack([_REFERENCE[stat](values[:, a:b])
+                         for a, b in zip(lo, hi)], axis=-1)
+    # Cumulative sums lose some precision relative to the signal's scale
+    np.testing.assert_allclose(result, expected, rtol=1e-9,
+                               atol=1e-7 * np.abs(values).max())
+
+    # 1D values
+    np.testing.assert_allclose(rolling.rollingStat(times, values[0], span, stat),
+                               result[0])
+
+
+def test_windowStat():
+    values = np.array([[3, 1, 4, 1, 5, 9, 2, 6]], dtype=np.float64)
+    lo = np.array([0, 2, 5, 7])
+    hi = np.array([8, 5, 6, 8])
+    np.testing.assert_array_equal(rolling.windowStat(values, lo, hi, 'max'),
+                                  [[9, 5, 9, 6]])
+    np.testing.assert_array_equal(rolling.windowStat(values, lo, hi, 'min'),
+                                  [[1, 1, 9, 6]])
+    np.testing.assert_allclose(rolling.windowStat(values, lo, hi, 'mean'),
+                               [[31 / 8, 10 / 3, 9, 6]])
+    assert rolling.windowStat(values, [], [], 'mean').shape == (1, 0)
+
+    with pytest.raises(ValueError):
+        rolling.windowStat(values, [2], [2], 'mean')
+    with pytest.raises(ValueError):
+        rolling.windowStat(values, lo, hi, 'median')
+    with pytest.raises(ValueError):
+        rolling.rollingStat(np.arange(8), values, 0)
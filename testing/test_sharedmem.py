@@ -0,0 +1,92 @@
+"""
+Tests of sharing channel data with other processes via shared memory.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import pickle
+
+import numpy as np
+import pytest  # type: ignore
+
+from idelib import importer
+from idelib.sharedmem import SharedDataset, SharedEventArray
+
+
+# ==============================================================================
+#
+# ==============================================================================
+
+def _channelStats(args):
+    """ Worker function for `test_processPool()`. """
+    shared, chId = args
+    with shared.attach() as view:
+        ea = view.channels[chId]
+        values = ea.arrayValues()
+        return chId, len(ea), values.mean(axis=1).tolist(), values.flags.writeable
+
+
+@pytest.fixture(params=['./test.ide', './testing/Discontinuities.IDE'])
+def dataset(request):
+    doc = importer.importFile(request.param)
+    yield doc
+    doc.close()
+
+
+def test_attach(dataset):
+    with dataset.exportShared() as shared:
+        assert isinstance(shared, SharedDataset)
+        shared = pickle.loads(pickle.dumps(shared))
+
+        with shared.attach() as view:
+            assert sorted(view.channels) == sorted(dataset.channels)
+            for chId, ea in view.channels.items():
+                session = dataset.channels[chId].getSession()
+                assert isinstance(ea, SharedEventArray)
+                assert len(ea) == len(session)
+                if not len(session):
+                    continue
+
+                np.testing.assert_array_equal(ea.arraySlice(), session.arraySlice())
+                np.testing.assert_array_equal(ea.arraySlice(1, 20, 3),
+                                              session.arraySlice(1, 20, 3))
+                np.testing.assert_array_equal(ea[-1], session[-1])
+                np.testing.assert_array_equal(ea.getSegments(), session.getSegments())
+                assert ea.getSampleRate() == session.getSampleRate()
+
+                start, end = ea.getInterval()
+                for t0, t1 in ((None, None), (start + 1000, (start + end) / 2),
+                               (start - 10, end + 10)):
+                    assert ea.getRangeIndices(t0, t1) == session.getRangeIndices(t0, t1)
+                    np.testing.assert_array_equal(ea.arrayRange(t0, t1),
+                                                  session.arrayRange(t0, t1))
+
+                with pytest.raises(ValueError):
+                    ea.arrayValues()[0, 0] = 1
+
+
+def test_channels():
+    doc = importer.importFile('./test.ide')
+    with doc.exportShared(channels=[8]) as shared:
+        assert list(shared.channels) == [8]
+        assert shared.nbytes == sum(
+            np.prod(shape) * np.dtype(dtype).itemsize
+            for _name, shape, dtype in shared.channels[8]['arrays'].values())
+    doc.close()
+
+
+def test_processPool():
+    doc = importer.importFile('./test.ide')
+    expected = {chId: ch.getSession().arrayValues().mean(axis=1)
+                for chId, ch in doc.channels.items()}
+
+    with doc.exportShared() as shared:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(2, mp_context=context) as pool:
+            results = list(pool.map(_channelStats,
+                                    [(shared, chId) for chId in expected]))
+
+    for chId, length, means, writeable in results:
+        assert length == len(doc.channels[chId].getSession())
+        np.testing.assert_allclose(means, expected[chId])
+        assert not writeable
+    doc.close()
@@ -0,0 +1,160 @@
+import os.path
+
+import numpy as np
+import pytest  # type: ignore
+
+from idelib import importer
+from idelib import spectral
+
+
+# ==============================================================================
+#
+# ==============================================================================
+
+def _openFile(name):
+    doc = importer.openFile(os.path.join(os.path.dirname(__file__), name))
+    importer.readData(doc)
+    return doc
+
+
+@pytest.fixture(scope='module')
+def ssx66115():
+    doc = _openFile("SSX66115.IDE")
+    yield doc
+    doc.close()
+
+
+@pytest.fixture(scope='module')
+def discontinuities():
+    doc = _openFile("Discontinuities.IDE")
+    yield doc
+    doc.close()
+
+
+# ==============================================================================
+#
+# ==============================================================================
+
+def test_getContiguousRanges(ssx66115, discontinuities):
+    eventArray = ssx66115.channels[8].getSession()
+    assert spectral.getContiguousRanges(eventArray) == [(0, len(eventArray))]
+    assert spectral.getContiguousRanges(eventArray, 100, 200) == [(100, 200)]
+    assert spectral.getContiguousRanges(eventArray, 100, 100) == []
+
+    eventArray = discontinuities.channels[8].getSession()
+    ranges = spectral.getContiguousRanges(eventArray)
+    assert len(ranges) > 1
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(eventArray)
+    assert ranges == [tuple(r) for r in eventArray.getSegments(indices=True)]
+    assert ranges == spectral.getContiguousRanges(eventArray, tolerance=0.5)
+
+    # Ranges split where the time between samples jumps
+    times = eventArray.arraySlice()[0]
+    period = 1e6 / eventArray.getSampleRate()
+    for _a, b in ranges[:-1]:
+        assert times[b] - times[b-1] > period * 1.5
+    for a, b in ranges:
+        assert np.diff(times[a:b]).max() < period * 1.5
+
+
+@pytest.mark.parametrize('kwargs', [
+    {},
+    {'windowSize': 1000, 'overlap': 0.25},
+    {'window': 'boxcar', 'windowSize': 512},
+    {'batchSize': 5000, 'maxWorkers': 2},
+])
+def test_welch(ssx66115, kwargs):
+    """ Test Welch's method against SciPy. """
+    signal = pytest.importorskip('scipy.signal')
+
+    eventArray = ssx66115.channels[8].getSession()
+    values = eventArray.arrayValues()
+    windowSize = kwargs.get('windowSize', 4096)
+    overlap = kwargs.get('overlap', 0.5)
+
+    freqs, psd = eventArray.getPSD(**kwargs)
+    expectedFreqs, expected = signal.welch(
+        values, fs=eventArray.getSampleRate(), nperseg=windowSize,
+        noverlap=windowSize - int(windowSize * (1 - overlap)),
+        window=kwargs.get('window', 'hann'))
+
+    np.testing.assert_allclose(freqs, expectedFreqs)
+    np.testing.assert_allclose(psd, expected, rtol=1e-9, atol=1e-15)
+
+
+def test_welchDiscontinuities(discontinuities):
+    """ Test that windows don't span discontinuities. """
+    eventArray = discontinuities.channels[8].getSession()
+    windowSize = 1024
+    ranges = spectral.getContiguousRanges(eventArray)
+
+    total = 0
+    count = 0
+    for a, b in ranges:
+        if b - a < windowSize:
+            continue
+        values = eventArray.arrayValues(a, b)
+        for w in range(a, b - windowSize + 1, windowSize // 2):
+            psd = spectral._batchPower(values[:, w - a:w - a + windowSize],
+                                       spectral._getWindow('hann', windowSize),
+                                       windowSize // 2)
+            total = total + psd.sum(axis=1)
+            count += 1
+
+    _freqs, psd = eventArray.getPSD(windowSize=windowSize)
+    expected = spectral._scaleDensity(total / count, eventArray.getSampleRate(),
+                                      spectral._getWindow('hann', windowSize))
+    np.testing.assert_allclose(psd, expected, rtol=1e-9)
+
+
+def test_bandRMS(ssx66115):
+    """ Test that the RMS of all bands matches the RMS of the
+        mean-removed data (approximately, due to windowing).
+    """
+    eventArray = ssx66115.channels[8][0].getSession()
+    values = eventArray.arrayValues()
+    rms = eventArray.getBandRMS([(0, 1e6), (0, 100), (100, 1e6)],
+                                windowSize=1024)
+    assert rms.shape == (1, 3)
+    np.testing.assert_allclose(rms[0, 0], values.std(), rtol=0.1)
+    np.testing.assert_allclose(rms[0, 1]**2 + rms[0, 2]**2, rms[0, 0]**2,
+                               rtol=0.05)
+
+
+@pytest.mark.parametrize('average', [1, 3])
+def test_spectrogram(ssx66115, average):
+    """ Test the spectrogram's shape, and spot-check a time slice. """
+    eventArray = ssx66115.channels[8].getSession()
+    windowSize = 1024
+    step = windowSize // 2
+    times, freqs, sxx = eventArray.getSpectrogram(windowSize=windowSize,
+                                                  average=average,
+                                                  batchSize=10000)
+
+    numWindows = (len(eventArray) - windowSize) // step + 1
+    assert sxx.shape == (3, len(freqs), len(times))
+    assert len(times) == -(-numWindows // average)
+    assert (np.diff(times) > 0).all()
+
+    # Spot-check a slice
+    lo = step * average
+    hi = lo + (average - 1) * step + windowSize
+    window = spectral._getWindow('hann', windowSize)
+    power = spectral._batchPower(eventArray.arrayValues(lo, hi), window, step)
+    expected = spectral._scaleDensity(power.mean(axis=1),
+                                      eventArray.getSampleRate(), window)
+    np.testing.assert_allclose(sxx[:, :, 1], expected, rtol=1e-9)
+    sliceTimes = eventArray.arraySlice(lo, hi)[0]
+    np.testing.assert_allclose(times[1], (sliceTimes[0] + sliceTimes[-1]) / 2)
+
+
+def test_errors(ssx66115):
+    eventArray = ssx66115.channels[8].getSession()
+    with pytest.raises(ValueError):
+        eventArray.getPSD(windowSize=1)
+    with pytest.raises(ValueError):
+        eventArray.getPSD(overlap=1)
+    with pytest.raises(ValueError):
+        eventArray.getPSD(window='bogus')
+    with pytest.raises(ValueError):
+        eventArray.getPSD(0, 1000, windowSize=4096)
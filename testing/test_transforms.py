@@ -1,4 +1,5 @@
 from collections import namedtuple
+import pickle
 
 import pytest
 import numpy as np
@@ -116,6 +117,15 @@ class TestTransform:
 
         assert tf in list(tf._watchers)
 
+    def testPickle(self, univariate):
+        """ Check that the compiled function is rebuilt after unpickling """
+        tf = pickle.loads(pickle.dumps(univariate))
+
+        assert tf == univariate
+        assert tf._source == univariate._source
+        assert tf.function(2.5) == univariate.function(2.5)
+        assert len(tf._watchers) == 0
+
 
 class TestAccelTransform:
 
@@ -144,6 +154,18 @@ class TestAccelTransform:
 
         assert tf == tf.copy()
 
+    def testInplace(self):
+        tf = AccelTransform()
+        values = np.arange(-32768, 32767, 1000, dtype=np.int16)
+        expected = values * (100 / 32767.0)
+
+        np.testing.assert_allclose(tf.inplace(values), expected)
+        assert tf.inplace(-32767) == pytest.approx(-100)
+
+        out = np.zeros_like(values, dtype=np.float64)
+        assert tf.inplace(values, out=out) is out
+        np.testing.assert_allclose(out, expected)
+
 
 class TestUnivariate:
 
@@ -165,6 +187,12 @@ class TestUnivariate:
 
 class TestBivariate:
 
+    def testPickle(self, bivariate):
+        tf = pickle.loads(pickle.dumps(bivariate))
+
+        assert tf._source == bivariate._source
+        assert tf.function(10.0, 20.0) == bivariate.function(10.0, 20.0)
+
     @pytest.mark.parametrize('useTimestamp, noBivariates, useMean',
                            [(True,          True,         True),
                             (True,          True,         False),
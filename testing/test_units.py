@@ -3,7 +3,8 @@ import numpy as np
 
 import pytest
 
-from idelib.unit_conversion import (Celsius2Fahrenheit,
+from idelib.unit_conversion import (CONVERTERS,
+                                    Celsius2Fahrenheit,
                                     Celsius2Kelvin,
                                     Gravity2MPerSec2,
                                     Meters2Feet,
@@ -49,6 +50,48 @@ def test_converters_revert(input, output, converter):
     assert converter.revert(output) == pytest.approx(input)
 
 
+@pytest.mark.parametrize('converter', CONVERTERS)
+@pytest.mark.parametrize('dtype', [np.float64, np.int32])
+def test_converters_inplace(converter, dtype):
+    """ Test that the array path matches the scalar path. """
+    converter = converter()
+    values = np.linspace(0, 120000, 101).astype(dtype)
+
+    with np.errstate(divide='ignore'):
+        expected = [converter.convert(float(v)) for v in values]
+        result = converter.inplace(values)
+        assert result.dtype == np.float64
+        np.testing.assert_allclose(result, expected)
+
+        out = np.empty(values.shape)
+        assert converter.inplace(values, out=out) is out
+        np.testing.assert_allclose(out, expected)
+
+        # Output to the input array
+        values = values.astype(np.float64)
+        converter.inplace(values, out=values)
+        np.testing.assert_allclose(values, expected)
+
+        assert converter.inplace(80000) == pytest.approx(converter.convert(80000.0))
+
+
+@pytest.mark.parametrize('converter', [Pressure2Feet, Pressure2Meters])
+def test_converters_out(converter):
+    converter = converter()
+    values = np.array([0, 1000, 80000, 101325, 200000], dtype=np.int32)
+
+    with np.errstate(divide='ignore'):
+        expected = converter.function(values.astype(np.float64))
+        out = np.empty(values.shape)
+        assert converter.function(values, out=out) is out
+        np.testing.assert_allclose(out, expected)
+
+    assert isinstance(converter.convert(80000), float)
+    reverted = converter.revert(expected[1:], out=expected[1:])
+    np.testing.assert_allclose(reverted[1:], values[2:])
+    np.testing.assert_allclose(expected[2:], values[2:])
+
+
 unsafe_table = [(None, TypeError,  Celsius2Fahrenheit()),
                 ('a',  TypeError,  Celsius2Fahrenheit()),
                 (None, TypeError,  Celsius2Kelvin()),
@@ -100,6 +100,87 @@ class TestExtractTime:
             "Extracted file contain data from excluded channel"
 
 
+    @pytest.mark.parametrize('channels', [None, [8, 36]])
+    def test_extractTime_verbatim(self, channels, tmp_path):
+        """
+        Test that the extracted data is identical to the filtered elements.
+        """
+        expected = b''.join(el.getRaw() for el in
+                            importer.filterTime(self.dataset,
+                                                self.extractionStart,
+                                                self.extractionEnd,
+                                                channels=channels)
+                            if el is not None)
+
+        # Stream (buffered copy)
+        out = tempfile.SpooledTemporaryFile(suffix=".ide")
+        copied = util.extractTime(self.dataset, out,
+                                  startTime=self.extractionStart,
+                                  endTime=self.extractionEnd,
+                                  channels=channels)
+        out.seek(0)
+        assert out.read() == expected
+        assert copied == len(expected)
+
+        # Files (`os.copy_file_range()`, if available)
+        filename = tmp_path / 'extracted.ide'
+        with open(self.dataset.filename, 'rb') as fs:
+            dataset = importer.openFile(fs)
+            copied = util.extractTime(dataset, filename,
+                                      startTime=self.extractionStart,
+                                      endTime=self.extractionEnd,
+                                      channels=channels)
+        assert filename.read_bytes() == expected
+        assert copied == len(expected)
+
+
+    def test_copyRanges(self):
+        source = makeStreamLike('./testing/SSX66115.IDE')
+        source.seek(10)
+        ranges = []
+        for offset, size in ((0, 10), (10, 5), (100, 20), (50, 10)):
+            util._addRange(ranges, offset, size)
+        assert ranges == [[0, 15], [100, 20], [50, 10]]
+
+        out = tempfile.SpooledTemporaryFile()
+        assert util._copyRanges(source, out, ranges, bufferSize=7) == 45
+        assert source.tell() == 10
+
+        with open('./testing/SSX66115.IDE', 'rb') as fs:
+            data = fs.read()
+        out.seek(0)
+        assert out.read() == data[:15] + data[100:120] + data[50:60]
+
+
+    def test_splitTime(self):
+        """
+        Test that each window of a split matches `extractTime()`.
+        """
+        lastTime = self.dataset.sessions[0].lastTime
+        windows = [(0, lastTime * .25),
+                   (lastTime * .2, lastTime * .6),  # overlaps previous
+                   (self.extractionStart, self.extractionEnd),
+                   (lastTime * .9, None)]
+
+        outs = [tempfile.SpooledTemporaryFile(suffix=".ide") for _ in windows]
+        written = util.splitTime(self.dataset,
+                                 [w + (out,) for w, out in zip(windows, outs)],
+                                 channels=[8, 36])
+
+        for (start, end), out, size in zip(windows, outs, written):
+            expected = tempfile.SpooledTemporaryFile(suffix=".ide")
+            util.extractTime(self.dataset, expected, startTime=start,
+                             endTime=end, channels=[8, 36])
+            expected.seek(0)
+            out.seek(0)
+            data = out.read()
+            assert data == expected.read()
+            assert size == len(data)
+
+        with pytest.raises(TypeError):
+            util.splitTime(self.dataset, [(0, None, None)])
+
+
     def test_extractTime_error(self):
         with pytest.raises(TypeError):
             util.extractTime(self.dataset, None)
@@ -179,6 +260,9 @@ class TestGetLength:
     def test_getBlockSize(self):
         # Check _getBlockSize() gets the same values as the 'real' parser
         for channel in self.dataset.channels.values():
+            if channel.singleSample:
+                # Single-sample sessions keep only times and values
+                continue
             for block in channel.getSession()._data:
                 cid, start, end = util._getBlockTime(self.dataset, block.element)
 
@@ -225,3 +309,71 @@ class TestGetLength:
 
         with pytest.raises(TypeError):
             util.getExitCondition(None)
+
+
+# ==============================================================================
+#
+# ==============================================================================
+
+class TestProbe:
+    """
+    Test `util.probe()` and `util.probeFiles()`.
+    """
+
+    @classmethod
+    def setup_class(cls):
+        cls.idefile = os.path.join(os.path.dirname(__file__), "SSX66115.IDE")
+        cls.dataset = importer.importFile(cls.idefile)
+
+
+    @classmethod
+    def teardown_class(cls):
+        cls.dataset.close()
+
+
+    def test_probe(self):
+        result = util.probe(self.idefile)
+
+        assert result.startTime == self.dataset.lastSession.firstTime
+        assert result.endTime == self.dataset.lastSession.lastTime
+        assert result.duration == result.endTime - result.startTime
+        assert result.utcStartTime == self.dataset.lastSession.utcStartTime
+        assert result.size == os.path.getsize(self.idefile)
+        assert result.recorderInfo['RecorderSerial'] == self.dataset.recorderInfo['RecorderSerial']
+
+        assert [ch.id for ch in result.channels] == list(self.dataset.channels)
+        for ch in result.channels:
+            channel = self.dataset.channels[ch.id]
+            assert ch.name == channel.name
+            for sc, subchannel in zip(ch.subchannels, channel.subchannels):
+                # Unnamed subchannels get a default name in the Dataset
+                assert sc[1] in (None, subchannel.name)
+            assert [sc[2] for sc in ch.subchannels] == [sc.units for sc in channel.subchannels]
+
+        with pytest.raises(TypeError):
+            result.recorderInfo['RecorderSerial'] = 0
+
+
+    def test_probe_stream(self):
+        with makeStreamLike('./testing/SSX66115.IDE') as fs:
+            result = util.probe(fs)
+
+        assert result.startTime == self.dataset.lastSession.firstTime
+        assert result.endTime == self.dataset.lastSession.lastTime
+
+        with pytest.raises(TypeError):
+            util.probe(None)
+
+
+    def test_probeFiles(self):
+        filenames = [self.idefile,
+                     os.path.join(os.path.dirname(__file__), "SSX70065.IDE")]
+        results = util.probeFiles(filenames, maxWorkers=2)
+
+        assert results == [util.probe(f) for f in filenames]
+
+        with pytest.raises(IOError):
+            util.probeFiles(filenames + ['not_a_file.ide'])
+
+        results = util.probeFiles(filenames + ['not_a_file.ide'], ignoreErrors=True)
+        assert results[-1] is None